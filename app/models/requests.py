@@ -5,6 +5,8 @@ from typing import Optional
 class GeneratePlaylistRequest(BaseModel):
     query: str
     spotify_access_token: str
+    fresh: bool = False  # Skip cached suggestions and always ask the LLM
+    market: Optional[str] = None  # ISO country code for fallback tracks; defaults to the first FALLBACK_POOL_MARKETS entry
 
 class SearchTracksRequest(BaseModel):
     tracks: list[str]
@@ -11,6 +11,7 @@ import base64
 from app.models.responses import AuthResponse, CallbackResponse
 from app.database import get_db
 from app.services.user_service import UserService
+from app.services.http_client import get_http_client, SPOTIFY_API_BASE_URL, SPOTIFY_ACCOUNTS_BASE_URL
 
 router = APIRouter()
 
@@ -20,10 +21,10 @@ oauth_states = {}
 async def get_spotify_user_profile(access_token: str) -> dict:
     """Fetch user profile from Spotify API"""
     headers = {"Authorization": f"Bearer {access_token}"}
-    async with httpx.AsyncClient() as client:
-        response = await client.get("https://api.spotify.com/v1/me", headers=headers, timeout=10.0)
-        response.raise_for_status()
-        return response.json()
+    client = get_http_client()
+    response = await client.get(f"{SPOTIFY_API_BASE_URL}/v1/me", headers=headers, timeout=10.0)
+    response.raise_for_status()
+    return response.json()
 
 @router.get("", response_model=AuthResponse)
 async def spotofy_auth_no_slash():
@@ -112,15 +113,15 @@ async def spotify_callback(code: str = None, state: str = None, error: str = Non
     }
     
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://accounts.spotify.com/api/token",
-                data=token_data,
-                headers=token_headers,
-                timeout=15.0
-            )
-            response.raise_for_status()
-            token_info = response.json()
+        client = get_http_client()
+        response = await client.post(
+            f"{SPOTIFY_ACCOUNTS_BASE_URL}/api/token",
+            data=token_data,
+            headers=token_headers,
+            timeout=15.0
+        )
+        response.raise_for_status()
+        token_info = response.json()
         
         # Fetch user profile from Spotify
         try:
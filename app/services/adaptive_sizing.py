@@ -0,0 +1,158 @@
+import logging
+import math
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional
+
+from app.services.app_config import AdaptiveSizingConfig
+from app.services.suggestion_cache import normalize_query
+
+logger = logging.getLogger(__name__)
+
+class _Rate:
+    """Exponentially weighted ratio with a sample count"""
+    __slots__ = ("value", "samples")
+
+    def __init__(self, value: Optional[float] = None):
+        self.value = value
+        self.samples = 0
+
+    def update(self, observed: float, alpha: float) -> None:
+        self.value = observed if self.value is None else alpha * observed + (1 - alpha) * self.value
+        self.samples += 1
+
+class _QueryStats:
+    __slots__ = ("parse_rate", "match_rate", "tokens_per_track")
+
+    def __init__(self):
+        self.parse_rate = _Rate()        # valid tracks / suggestions requested
+        self.match_rate = _Rate()        # unique Spotify matches / suggestions searched
+        self.tokens_per_track = _Rate()  # completion tokens / valid track
+
+class SuggestionSize(NamedTuple):
+    count: int
+    max_completion_tokens: Optional[int]  # None = use the configured stage budget
+
+class SuggestionSizer:
+    """
+    Chooses how many suggestions to request, and the output token budget, from
+    observed per-request outcomes instead of a fixed 35 tracks x 80 tokens.
+
+    Every request records suggestions requested, valid tracks parsed, Spotify
+    matches and completion tokens used. Rates are kept globally and per
+    normalized query; a query's own rates are blended with the global ones in
+    proportion to how many samples it has, so rare queries lean on the global
+    model. The count is sized so the expected number of Spotify matches reaches
+    the target (the playlist's target_tracks), within min_count..max_count.
+    Until both a parse and a match rate have been observed the default count is
+    kept, so a cold start costs what a fixed count did.
+    """
+
+    # Starting point before anything has been observed (roughly today's behaviour)
+    DEFAULT_PARSE_RATE = 0.95
+    DEFAULT_MATCH_RATE = 0.85
+
+    def __init__(self, alpha: float = 0.2, prior_strength: float = 5.0, max_queries: int = 2000, count_step: int = 5):
+        self.alpha = alpha
+        self.prior_strength = prior_strength  # samples a query needs before its own rate counts as much as the global one
+        self.max_queries = max_queries
+        self.count_step = count_step          # counts move in steps rather than on every small rate change
+        self._global = _QueryStats()
+        self._queries: "OrderedDict[str, _QueryStats]" = OrderedDict()
+        self.requests = 0
+        self.suggestions_requested = 0
+        self.tracks_parsed = 0
+        self.spotify_matches = 0
+        self.completion_tokens = 0
+
+    def _query(self, query: str) -> _QueryStats:
+        key = normalize_query(query)
+        stats = self._queries.get(key)
+        if stats is None:
+            stats = self._queries[key] = _QueryStats()
+            while len(self._queries) > self.max_queries:
+                self._queries.popitem(last=False)
+        else:
+            self._queries.move_to_end(key)
+        return stats
+
+    def _blend(self, local: _Rate, global_rate: _Rate, default: float) -> float:
+        prior = global_rate.value if global_rate.value is not None else default
+        if local.value is None:
+            return prior
+        weight = local.samples / (local.samples + self.prior_strength)
+        return weight * local.value + (1 - weight) * prior
+
+    def record_generation(self, query: str, requested: int, parsed: int, completion_tokens: Optional[int]) -> None:
+        """Record the outcome of one bulk suggestion call"""
+        if requested <= 0:
+            return
+        self.requests += 1
+        self.suggestions_requested += requested
+        self.tracks_parsed += parsed
+        stats = self._query(query)
+        parse_rate = min(parsed / requested, 1.0)
+        for target in (stats, self._global):
+            target.parse_rate.update(parse_rate, self.alpha)
+        if completion_tokens and parsed:
+            self.completion_tokens += completion_tokens
+            for target in (stats, self._global):
+                target.tokens_per_track.update(completion_tokens / parsed, self.alpha)
+
+    def record_matches(self, query: str, searched: int, matched: int) -> None:
+        """Record how many searched suggestions resolved to unique Spotify tracks"""
+        if searched <= 0:
+            return
+        self.spotify_matches += matched
+        match_rate = min(matched / searched, 1.0)
+        stats = self._query(query)
+        for target in (stats, self._global):
+            target.match_rate.update(match_rate, self.alpha)
+
+    def choose(self, query: str, config: AdaptiveSizingConfig, default_count: int, target_matches: int) -> SuggestionSize:
+        if not config.enabled:
+            return SuggestionSize(default_count, None)
+
+        if self._global.parse_rate.value is None or self._global.match_rate.value is None:
+            return SuggestionSize(default_count, None)
+
+        key = normalize_query(query)
+        stats = self._queries.get(key) or _QueryStats()
+        parse_rate = self._blend(stats.parse_rate, self._global.parse_rate, self.DEFAULT_PARSE_RATE)
+        match_rate = self._blend(stats.match_rate, self._global.match_rate, self.DEFAULT_MATCH_RATE)
+        expected_yield = max(parse_rate * match_rate, 0.05)
+
+        count = math.ceil(target_matches / expected_yield / self.count_step) * self.count_step
+        count = max(config.min_count, min(config.max_count, count))
+
+        tokens_per_track = self._blend(stats.tokens_per_track, self._global.tokens_per_track, 0.0)
+        max_tokens = None
+        if tokens_per_track > 0:
+            max_tokens = int(math.ceil(count * tokens_per_track * config.token_headroom)) + 50
+
+        logger.debug(f"Sized '{query}': parse {parse_rate:.2f} x match {match_rate:.2f} -> {count} suggestions, "
+                     f"{max_tokens or 'default'} tokens")
+        return SuggestionSize(count, max_tokens)
+
+    def stats(self) -> Dict:
+        def value(rate: _Rate):
+            return round(rate.value, 3) if rate.value is not None else None
+
+        return {
+            "requests": self.requests,
+            "suggestions_requested": self.suggestions_requested,
+            "tracks_parsed": self.tracks_parsed,
+            "spotify_matches": self.spotify_matches,
+            "completion_tokens": self.completion_tokens,
+            "queries_tracked": len(self._queries),
+            "parse_rate": value(self._global.parse_rate),
+            "match_rate": value(self._global.match_rate),
+            "tokens_per_track": value(self._global.tokens_per_track)
+        }
+
+_sizer: Optional[SuggestionSizer] = None
+
+def get_suggestion_sizer() -> SuggestionSizer:
+    global _sizer
+    if _sizer is None:
+        _sizer = SuggestionSizer()
+    return _sizer
@@ -0,0 +1,172 @@
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+CONFIG_PATH = Path(__file__).parent.parent.parent / ".config" / "config.json"
+
+STAGE_TRACK_GENERATION = "track_generation"
+STAGE_ADDITIONAL_TRACKS = "additional_tracks"
+STAGE_PLAYLIST_TITLE = "playlist_title"
+
+class StageConfig(NamedTuple):
+    model: str
+    temperature: float
+    max_completion_tokens: int
+    tokens_per_track: Optional[int] = None  # scales the token budget with the track count when set
+
+    def token_budget(self, count: Optional[int] = None) -> int:
+        if self.tokens_per_track and count:
+            return int(count * self.tokens_per_track)
+        return self.max_completion_tokens
+
+class AdaptiveSizingConfig(NamedTuple):
+    enabled: bool = False
+    min_count: int = 20
+    max_count: int = 65          # room to reach target_tracks (50) at the default parse/match rates
+    token_headroom: float = 1.3  # budget = observed tokens/track * count * headroom
+
+class PipelineConfig(NamedTuple):
+    search_concurrency: int = 10      # Spotify searches in flight per request
+    suggestion_queue_size: int = 20   # suggestions buffered ahead of the search workers
+    event_queue_size: int = 100       # search results/events buffered ahead of the consumer
+    stream_suggestions: bool = True   # overlap LLM streaming with search; False = one bulk call first
+    race_search_strategies: bool = False  # start fallback search queries early instead of one after another
+    strategy_race_delay: float = 0.2      # head start for the plain query before fallbacks join the race
+    match_min_score: float = 0.65         # lowest track_matching score accepted as the suggested song
+    catalog_min_score: float = 0.9        # lowest score at which a catalog row skips the Spotify search
+
+# Used for anything config.json doesn't override
+DEFAULT_STAGES = {
+    STAGE_TRACK_GENERATION: {"temperature": 0.7, "max_completion_tokens": 2800, "tokens_per_track": 80},
+    STAGE_ADDITIONAL_TRACKS: {"temperature": 0.8, "max_completion_tokens": 2000},
+    STAGE_PLAYLIST_TITLE: {"temperature": 0.7, "max_completion_tokens": 100}
+}
+
+class AppConfig:
+    """
+    Settings from .config/config.json: playlist shape and per-stage model,
+    temperature and token budget for each LLM call.
+
+    `model_to_use` is the default model for every stage; a stage entry under
+    "stages" overrides any of its fields. Like the prompts, the file is
+    re-read when its mtime changes and an invalid edit keeps the old settings.
+    """
+
+    def __init__(self, path: Path = CONFIG_PATH):
+        self.path = Path(path)
+        self.app_title = "Aelyra"
+        self.songs_to_return = 10
+        self.alternatives_per_track = 4
+        self.suggestion_count = 35
+        self.default_model = "gpt-4o-mini"
+        self.stages: Dict[str, StageConfig] = {}
+        self.title_models: List[str] = []
+        self.title_routing = False
+        self.adaptive_sizing = AdaptiveSizingConfig()
+        self.pipeline = PipelineConfig()
+        self._mtime: Optional[int] = None
+        self.load()
+
+    @staticmethod
+    def _build_stage(name: str, overrides: dict, default_model: str) -> StageConfig:
+        settings = {"model": default_model, **DEFAULT_STAGES[name], **overrides}
+        return StageConfig(
+            model=str(settings["model"]),
+            temperature=float(settings["temperature"]),
+            max_completion_tokens=int(settings["max_completion_tokens"]),
+            tokens_per_track=int(settings["tokens_per_track"]) if settings.get("tokens_per_track") else None
+        )
+
+    def load(self) -> None:
+        """(Re)load config.json, raising ValueError if it's unreadable or invalid"""
+        try:
+            mtime = self.path.stat().st_mtime_ns
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+
+            default_model = str(data.get("model_to_use", "gpt-4o-mini"))
+            stage_overrides = data.get("stages", {})
+            stages = {
+                name: self._build_stage(name, stage_overrides.get(name, {}), default_model)
+                for name in DEFAULT_STAGES
+            }
+            songs_to_return = int(data.get("songs_to_return", 10))
+            alternatives_per_track = int(data.get("alternatives_per_track", 4))
+            suggestion_count = int(data.get("suggestion_count", 35))
+            title_router = data.get("title_router", {})
+            title_models = [str(model) for model in title_router.get("models", [])]
+            sizing = data.get("adaptive_sizing", {})
+            adaptive_sizing = AdaptiveSizingConfig(
+                enabled=bool(sizing.get("enabled", False)),
+                min_count=int(sizing.get("min_count", 20)),
+                max_count=int(sizing.get("max_count", 65)),
+                token_headroom=float(sizing.get("token_headroom", 1.3))
+            )
+            pipeline_settings = data.get("pipeline", {})
+            pipeline = PipelineConfig(
+                search_concurrency=int(pipeline_settings.get("search_concurrency", 10)),
+                suggestion_queue_size=int(pipeline_settings.get("suggestion_queue_size", 20)),
+                event_queue_size=int(pipeline_settings.get("event_queue_size", 100)),
+                stream_suggestions=bool(pipeline_settings.get("stream_suggestions", True)),
+                race_search_strategies=bool(pipeline_settings.get("race_search_strategies", False)),
+                strategy_race_delay=float(pipeline_settings.get("strategy_race_delay", 0.2)),
+                match_min_score=float(pipeline_settings.get("match_min_score", 0.65)),
+                catalog_min_score=float(pipeline_settings.get("catalog_min_score", 0.9))
+            )
+        except (OSError, json.JSONDecodeError, TypeError, ValueError, AttributeError) as e:
+            logger.error(f"Failed to load config {self.path.name}: {str(e)}")
+            raise ValueError(f"Failed to load configuration file: {self.path.name}")
+
+        if songs_to_return < 1 or suggestion_count < 1 or alternatives_per_track < 0:
+            raise ValueError("songs_to_return and suggestion_count must be positive, alternatives_per_track non-negative")
+        if not 1 <= adaptive_sizing.min_count <= adaptive_sizing.max_count:
+            raise ValueError("adaptive_sizing needs 1 <= min_count <= max_count")
+        if min(pipeline.search_concurrency, pipeline.suggestion_queue_size, pipeline.event_queue_size) < 1:
+            raise ValueError("pipeline concurrency and queue sizes must be positive")
+
+        self.app_title = data.get("app_title", self.app_title)
+        self.songs_to_return = songs_to_return
+        self.alternatives_per_track = alternatives_per_track
+        self.suggestion_count = suggestion_count
+        self.default_model = default_model
+        self.stages = stages
+        self.title_models = title_models or [stages[STAGE_PLAYLIST_TITLE].model]
+        self.title_routing = bool(title_router.get("enabled", False)) and len(self.title_models) > 1
+        self.adaptive_sizing = adaptive_sizing
+        self.pipeline = pipeline
+        self._mtime = mtime
+        logger.info(f"Loaded app config: {songs_to_return} songs from {suggestion_count} suggestions, "
+                    + ", ".join(f"{name}={stage.model}" for name, stage in stages.items()))
+
+    def reload_if_changed(self) -> bool:
+        try:
+            if self.path.stat().st_mtime_ns == self._mtime:
+                return False
+        except OSError as e:
+            logger.error(f"Failed to check {self.path.name}: {str(e)}")
+            return False
+        try:
+            self.load()
+            return True
+        except ValueError as e:
+            logger.error(f"Keeping previous config, reload failed: {str(e)}")
+            return False
+
+    def stage(self, name: str) -> StageConfig:
+        return self.stages[name]
+
+    @property
+    def target_tracks(self) -> int:
+        """Unique Spotify tracks needed to fill every group (1 main + alternatives)"""
+        return self.songs_to_return * (1 + self.alternatives_per_track)
+
+_app_config: Optional[AppConfig] = None
+
+def get_app_config() -> AppConfig:
+    global _app_config
+    if _app_config is None:
+        _app_config = AppConfig()
+    return _app_config
@@ -0,0 +1,198 @@
+import logging
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Sentinel for get() callers that need to tell a miss apart from a cached None
+MISSING = object()
+
+def estimate_size(value: Any, _depth: int = 0) -> int:
+    """
+    Cheap recursive estimate of the memory held by a cached value.
+    Only walks the container types our API responses are made of.
+    """
+    size = sys.getsizeof(value)
+    if _depth > 6:
+        return size
+    if isinstance(value, dict):
+        for k, v in value.items():
+            size += estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        for item in value:
+            size += estimate_size(item, _depth + 1)
+    return size
+
+class _NamespaceStats:
+    __slots__ = ("hits", "misses", "sets", "evictions", "expirations", "entries", "bytes")
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.entries = 0
+        self.bytes = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "sets": self.sets,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "entries": self.entries,
+            "bytes": self.bytes
+        }
+
+class TTLCache:
+    """
+    Bounded in-memory cache with LRU eviction and per-entry TTL.
+
+    Entries live in per-function namespaces that share one entry/byte budget,
+    so the cache as a whole never grows past max_entries or max_bytes.
+    Expired entries are removed lazily on lookup and by a periodic sweep.
+    """
+
+    def __init__(self, max_entries: int = 5000, max_bytes: int = 50 * 1024 * 1024,
+                 default_ttl: float = 300, sweep_interval: float = 60):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.sweep_interval = sweep_interval
+
+        # (namespace, key) -> (value, expires_at, size); ordered oldest -> most recently used
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[Any, float, int]]" = OrderedDict()
+        self._stats: Dict[str, _NamespaceStats] = {}
+        self._total_bytes = 0
+        self._last_sweep = time.monotonic()
+
+    def _ns(self, namespace: str) -> _NamespaceStats:
+        stats = self._stats.get(namespace)
+        if stats is None:
+            stats = self._stats[namespace] = _NamespaceStats()
+        return stats
+
+    def _remove(self, full_key: Tuple[str, Hashable]) -> None:
+        _, _, size = self._entries.pop(full_key)
+        stats = self._ns(full_key[0])
+        stats.entries -= 1
+        stats.bytes -= size
+        self._total_bytes -= size
+
+    def get(self, namespace: str, key: Hashable, default: Any = None) -> Any:
+        """Return a cached value, or default on a miss or expired entry"""
+        full_key = (namespace, key)
+        stats = self._ns(namespace)
+        entry = self._entries.get(full_key)
+
+        if entry is not None:
+            value, expires_at, _ = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(full_key)
+                stats.hits += 1
+                return value
+            self._remove(full_key)
+            stats.expirations += 1
+
+        stats.misses += 1
+        return default
+
+    def set(self, namespace: str, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value, evicting least recently used entries to stay within budget"""
+        full_key = (namespace, key)
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            logger.debug(f"Not caching {namespace} entry of {size} bytes (exceeds cache budget)")
+            return
+
+        if full_key in self._entries:
+            self._remove(full_key)
+
+        expires_at = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+        self._entries[full_key] = (value, expires_at, size)
+        stats = self._ns(namespace)
+        stats.sets += 1
+        stats.entries += 1
+        stats.bytes += size
+        self._total_bytes += size
+
+        self._maybe_sweep()
+        self._evict()
+
+    def delete(self, namespace: str, key: Hashable) -> bool:
+        full_key = (namespace, key)
+        if full_key in self._entries:
+            self._remove(full_key)
+            return True
+        return False
+
+    def clear(self, namespace: Optional[str] = None) -> None:
+        """Drop every entry, or only the entries of one namespace"""
+        if namespace is None:
+            self._entries.clear()
+            self._total_bytes = 0
+            for stats in self._stats.values():
+                stats.entries = 0
+                stats.bytes = 0
+            return
+
+        for full_key in [k for k in self._entries if k[0] == namespace]:
+            self._remove(full_key)
+
+    def _evict(self) -> None:
+        while self._entries and (len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes):
+            full_key = next(iter(self._entries))
+            self._remove(full_key)
+            self._ns(full_key[0]).evictions += 1
+
+    def _maybe_sweep(self) -> None:
+        if time.monotonic() - self._last_sweep >= self.sweep_interval:
+            self.sweep_expired()
+
+    def sweep_expired(self) -> int:
+        """Remove all expired entries. Returns the number removed."""
+        now = time.monotonic()
+        self._last_sweep = now
+        expired = [k for k, (_, expires_at, _) in self._entries.items() if expires_at <= now]
+        for full_key in expired:
+            self._remove(full_key)
+            self._ns(full_key[0]).expirations += 1
+        if expired:
+            logger.debug(f"Swept {len(expired)} expired cache entries")
+        return len(expired)
+
+    def items(self, namespace: str) -> List[Tuple[Hashable, Any, float]]:
+        """Live entries of a namespace as (key, value, remaining_ttl), oldest first"""
+        now = time.monotonic()
+        return [
+            (key, value, expires_at - now)
+            for (ns, key), (value, expires_at, _) in self._entries.items()
+            if ns == namespace and expires_at > now
+        ]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters, overall and per namespace"""
+        namespaces = {name: stats.as_dict() for name, stats in self._stats.items()}
+        hits = sum(s.hits for s in self._stats.values())
+        misses = sum(s.misses for s in self._stats.values())
+        return {
+            "entries": len(self._entries),
+            "bytes": self._total_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            "evictions": sum(s.evictions for s in self._stats.values()),
+            "expirations": sum(s.expirations for s in self._stats.values()),
+            "namespaces": namespaces
+        }
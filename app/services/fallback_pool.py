@@ -0,0 +1,185 @@
+import asyncio
+import base64
+import logging
+import os
+import time
+from typing import Dict, List, Optional
+
+from app.services.http_client import get_http_client, SPOTIFY_ACCOUNTS_BASE_URL
+from app.services.rate_limiter import request_priority, PRIORITY_SPECULATIVE
+from app.services.spotify_service import SpotifyService
+
+logger = logging.getLogger(__name__)
+
+# Last-resort searches that don't depend on the query, so their results can be shared
+GENERIC_FALLBACK_SEARCHES = ("popular songs", "top hits", "best songs")
+
+class FallbackPool:
+    """
+    Precomputed generic fallback tracks per Spotify market.
+
+    A background task re-runs GENERIC_FALLBACK_SEARCHES for every configured
+    market every `refresh_interval` seconds with an app (client credentials)
+    token, so the request path only reads memory. Without app credentials the
+    pool is filled from the first request that has to run the searches itself,
+    and that market's entry is then reused until it is `refresh_interval` old.
+    """
+
+    def __init__(self, markets: List[str], refresh_interval: float = 6 * 3600, tracks_per_search: int = 10,
+                 enabled: bool = True):
+        self.markets = markets or ["US"]
+        self.default_market = self.markets[0]
+        self.refresh_interval = refresh_interval
+        self.tracks_per_search = tracks_per_search
+        self.enabled = enabled
+        self._pools: Dict[str, List[Dict]] = {}
+        self._refreshed_at: Dict[str, float] = {}
+        self._app_token: Optional[str] = None
+        self._app_token_expires = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+
+    def market_for(self, market: Optional[str]) -> str:
+        """The market a pool entry is kept under (the first configured one when none is given)"""
+        return (market or self.default_market).upper()
+
+    def get(self, market: Optional[str] = None) -> List[Dict]:
+        """Pooled tracks for a market (empty if missing or older than two refresh intervals)"""
+        market = self.market_for(market)
+        tracks = self._pools.get(market)
+        fresh = tracks and time.time() - self._refreshed_at[market] < 2 * self.refresh_interval
+        if not self.enabled or not fresh:
+            self.misses += 1
+            return []
+        self.hits += 1
+        return list(tracks)
+
+    def store(self, market: Optional[str], tracks: List[Dict]) -> None:
+        if not self.enabled or not tracks:
+            return
+        market = self.market_for(market)
+        unique = list({track["spotify_id"]: track for track in tracks if track.get("spotify_id")}.values())
+        self._pools[market] = unique
+        self._refreshed_at[market] = time.time()
+
+    def needs_refresh(self, market: Optional[str] = None) -> bool:
+        market = self.market_for(market)
+        return time.time() - self._refreshed_at.get(market, 0.0) >= self.refresh_interval
+
+    async def _get_app_token(self) -> Optional[str]:
+        """Client credentials token for searches made outside any user request"""
+        if self._app_token and time.time() < self._app_token_expires - 60:
+            return self._app_token
+        client_id = os.getenv("SPOTIFY_CLIENT_ID")
+        client_secret = os.getenv("SPOTIFY_CLIENT_SECRET")
+        if not client_id or not client_secret:
+            return None
+        auth_b64 = base64.b64encode(f"{client_id}:{client_secret}".encode("ascii")).decode("ascii")
+        response = await get_http_client().post(
+            f"{SPOTIFY_ACCOUNTS_BASE_URL}/api/token",
+            data={"grant_type": "client_credentials"},
+            headers={"Authorization": f"Basic {auth_b64}", "Content-Type": "application/x-www-form-urlencoded"},
+            timeout=15.0
+        )
+        response.raise_for_status()
+        token_info = response.json()
+        self._app_token = token_info["access_token"]
+        self._app_token_expires = time.time() + float(token_info.get("expires_in", 3600))
+        return self._app_token
+
+    async def refresh(self, spotify_service: SpotifyService, market: Optional[str] = None) -> int:
+        """Run the generic searches concurrently and replace the market's pool. Returns the pool size."""
+        market = self.market_for(market)
+        with request_priority(PRIORITY_SPECULATIVE):
+            results = await asyncio.gather(
+                *(spotify_service.search_track(term, limit=self.tracks_per_search, market=market)
+                  for term in GENERIC_FALLBACK_SEARCHES),
+                return_exceptions=True
+            )
+        tracks = []
+        for term, result in zip(GENERIC_FALLBACK_SEARCHES, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Fallback pool search failed for '{term}' ({market}): {str(result)}")
+            else:
+                tracks.extend(result)
+        if not tracks:
+            self.refresh_failures += 1
+            return 0
+        self.store(market, tracks)
+        self.refreshes += 1
+        logger.info(f"Refreshed fallback pool for {market}: {len(self._pools[market])} tracks")
+        return len(self._pools[market])
+
+    async def refresh_all(self) -> None:
+        try:
+            token = await self._get_app_token()
+        except Exception as e:
+            self.refresh_failures += 1
+            logger.error(f"Failed to get Spotify app token for the fallback pool: {str(e)}")
+            return
+        if token is None:
+            logger.info("Spotify client credentials not configured, fallback pool fills from requests")
+            return
+        spotify_service = SpotifyService(token)
+        for market in self.markets:
+            if self.needs_refresh(market):
+                await self.refresh(spotify_service, market)
+
+    def stats(self) -> Dict:
+        now = time.time()
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "markets": {
+                market: {"tracks": len(tracks), "age_seconds": round(now - self._refreshed_at[market], 1)}
+                for market, tracks in self._pools.items()
+            },
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures
+        }
+
+_fallback_pool: Optional[FallbackPool] = None
+_refresh_task: Optional[asyncio.Task] = None
+
+def get_fallback_pool() -> FallbackPool:
+    global _fallback_pool
+    if _fallback_pool is None:
+        markets = [market.strip().upper() for market in os.getenv("FALLBACK_POOL_MARKETS", "US").split(",") if market.strip()]
+        _fallback_pool = FallbackPool(
+            markets=markets,
+            refresh_interval=float(os.getenv("FALLBACK_POOL_REFRESH_INTERVAL", str(6 * 3600))),
+            enabled=os.getenv("FALLBACK_POOL_ENABLED", "True").lower() == "true"
+        )
+    return _fallback_pool
+
+async def _refresh_periodically() -> None:
+    pool = get_fallback_pool()
+    # Check well inside the refresh interval so a failed refresh is retried soon
+    check_interval = min(pool.refresh_interval, 300)
+    while True:
+        try:
+            await pool.refresh_all()
+        except Exception as e:
+            logger.error(f"Fallback pool refresh failed: {str(e)}")
+        await asyncio.sleep(check_interval)
+
+def start_fallback_pool() -> None:
+    """Start refreshing the fallback pool in the background (called from the lifespan)"""
+    global _refresh_task
+    if get_fallback_pool().enabled and _refresh_task is None:
+        _refresh_task = asyncio.create_task(_refresh_periodically())
+
+async def stop_fallback_pool() -> None:
+    global _refresh_task
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+        try:
+            await _refresh_task
+        except asyncio.CancelledError:
+            pass
+        _refresh_task = None
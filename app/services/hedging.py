@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class LatencyTracker:
+    """Rolling window of recent call latencies for one stage"""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, p: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, max(0, math.ceil(p * len(ordered)) - 1))
+        return ordered[index]
+
+class _StageStats:
+    __slots__ = ("latency", "calls", "hedged", "hedge_wins", "budget_denied")
+
+    def __init__(self, window: int):
+        self.latency = LatencyTracker(window)
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.budget_denied = 0
+
+class HedgePolicy:
+    """
+    Hedged requests for slow LLM calls.
+
+    Latency is tracked per stage (bulk generation, fallback generation, title...).
+    When a call runs past the stage's rolling percentile latency, a second identical
+    call is issued; whichever finishes first wins and the other is cancelled.
+    Hedges are capped at `budget` as a fraction of calls per stage so the extra
+    cost stays bounded. Until `min_samples` latencies are known nothing is hedged.
+    """
+
+    def __init__(self, enabled: bool = False, percentile: float = 0.9, min_samples: int = 20,
+                 budget: float = 0.1, min_delay: float = 1.0, window: int = 200):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.budget = budget
+        self.min_delay = min_delay
+        self.window = window
+        self._stages: Dict[str, _StageStats] = {}
+
+    def _stage(self, stage: str) -> _StageStats:
+        stats = self._stages.get(stage)
+        if stats is None:
+            stats = self._stages[stage] = _StageStats(self.window)
+        return stats
+
+    def hedge_delay(self, stage: str) -> Optional[float]:
+        """How long to wait before hedging a call for this stage (None = don't hedge)"""
+        stats = self._stage(stage)
+        if not self.enabled or len(stats.latency) < self.min_samples:
+            return None
+        return max(self.min_delay, stats.latency.percentile(self.percentile))
+
+    def _within_budget(self, stats: _StageStats) -> bool:
+        return stats.hedged + 1 <= self.budget * stats.calls
+
+    async def run(self, stage: str, call: Callable[[], Awaitable[Any]],
+                  discard: Optional[Callable[[Any], Awaitable[Any]]] = None) -> Any:
+        """
+        Run call(), hedging it with a second call(...) if it's slower than the stage percentile.
+        discard(result) releases a losing attempt's result that holds resources (e.g. an open stream).
+        """
+        stats = self._stage(stage)
+        stats.calls += 1
+        delay = self.hedge_delay(stage)
+        start = time.monotonic()
+
+        primary = asyncio.ensure_future(call())
+        tasks = [primary]
+        winner = None
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait([primary], timeout=delay)
+                if not done:
+                    if self._within_budget(stats):
+                        stats.hedged += 1
+                        logger.info(f"Hedging {stage} call after {delay:.2f}s")
+                        tasks.append(asyncio.ensure_future(call()))
+                    else:
+                        stats.budget_denied += 1
+
+            # First successful result wins; an error only counts once every attempt failed
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        winner = task
+                        if task is not primary:
+                            stats.hedge_wins += 1
+                        stats.latency.record(time.monotonic() - start)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif discard and task is not winner and not task.cancelled() and task.exception() is None:
+                    await discard(task.result())
+
+    def stats(self) -> Dict:
+        stages = {}
+        for stage, stats in self._stages.items():
+            p50 = stats.latency.percentile(0.5)
+            trigger = stats.latency.percentile(self.percentile)
+            stages[stage] = {
+                "calls": stats.calls,
+                "hedged": stats.hedged,
+                "hedge_wins": stats.hedge_wins,
+                "budget_denied": stats.budget_denied,
+                "samples": len(stats.latency),
+                "p50_seconds": round(p50, 3) if p50 is not None else None,
+                "trigger_seconds": round(trigger, 3) if trigger is not None else None
+            }
+        return {
+            "enabled": self.enabled,
+            "percentile": self.percentile,
+            "budget": self.budget,
+            "stages": stages
+        }
+
+_hedge_policy: Optional[HedgePolicy] = None
+
+def get_hedge_policy() -> HedgePolicy:
+    global _hedge_policy
+    if _hedge_policy is None:
+        _hedge_policy = HedgePolicy(
+            enabled=os.getenv("OPENAI_HEDGING_ENABLED", "False").lower() == "true",
+            percentile=float(os.getenv("OPENAI_HEDGE_PERCENTILE", "0.9")),
+            min_samples=int(os.getenv("OPENAI_HEDGE_MIN_SAMPLES", "20")),
+            budget=float(os.getenv("OPENAI_HEDGE_BUDGET", "0.1")),
+            min_delay=float(os.getenv("OPENAI_HEDGE_MIN_DELAY", "1.0")),
+            window=int(os.getenv("OPENAI_HEDGE_WINDOW", "200"))
+        )
+    return _hedge_policy
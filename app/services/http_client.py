@@ -0,0 +1,115 @@
+import httpx
+import asyncio
+import logging
+import os
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Process-wide pooled client shared by SpotifyService and the auth router.
+# Created and closed by the FastAPI lifespan in main.py.
+_http_client: Optional[httpx.AsyncClient] = None
+_warmup_task: Optional[asyncio.Task] = None
+
+SPOTIFY_API_BASE_URL = "https://api.spotify.com"
+SPOTIFY_ACCOUNTS_BASE_URL = "https://accounts.spotify.com"
+
+def _http2_available() -> bool:
+    """Check whether the optional h2 package is installed"""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def _build_client() -> httpx.AsyncClient:
+    """Build the shared client from environment settings"""
+    max_connections = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    max_keepalive = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    keepalive_expiry = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+    timeout = float(os.getenv("HTTP_TIMEOUT", "10"))
+
+    http2 = os.getenv("HTTP2_ENABLED", "False").lower() == "true"
+    if http2 and not _http2_available():
+        logger.warning("HTTP2_ENABLED is set but the 'h2' package is not installed, falling back to HTTP/1.1")
+        http2 = False
+
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive,
+        keepalive_expiry=keepalive_expiry
+    )
+
+    logger.info(
+        f"Creating shared HTTP client (http2={http2}, max_connections={max_connections}, "
+        f"max_keepalive={max_keepalive}, keepalive_expiry={keepalive_expiry}s)"
+    )
+    return httpx.AsyncClient(limits=limits, timeout=timeout, http2=http2)
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the shared HTTP client, creating it lazily if the lifespan hasn't run
+    (e.g. when services are used from scripts)
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = _build_client()
+    return _http_client
+
+async def warmup_http_client(urls: Optional[list] = None, connections: Optional[int] = None) -> int:
+    """
+    Pre-open pooled connections so the first requests skip the TCP+TLS handshake.
+    Any HTTP response (including 401s for unauthenticated requests) counts as a warm connection.
+    Returns the number of successful warmup requests.
+    """
+    if urls is None:
+        urls = [
+            url.strip() for url in
+            os.getenv("HTTP_PREWARM_URLS", f"{SPOTIFY_API_BASE_URL}/v1,{SPOTIFY_ACCOUNTS_BASE_URL}").split(",")
+            if url.strip()
+        ]
+    if connections is None:
+        connections = int(os.getenv("HTTP_PREWARM_CONNECTIONS", "4"))
+
+    client = get_http_client()
+
+    async def _touch(url: str) -> bool:
+        try:
+            await client.head(url, timeout=5.0)
+            return True
+        except httpx.HTTPError as e:
+            logger.debug(f"Warmup request to {url} failed: {str(e)}")
+            return False
+
+    tasks = [_touch(url) for url in urls for _ in range(max(connections, 0))]
+    if not tasks:
+        return 0
+
+    results = await asyncio.gather(*tasks)
+    warmed = sum(1 for ok in results if ok)
+    logger.info(f"Pre-warmed {warmed}/{len(tasks)} pooled connections")
+    return warmed
+
+async def start_http_client() -> httpx.AsyncClient:
+    """Create the shared client and kick off connection pre-warming in the background"""
+    global _warmup_task
+    client = get_http_client()
+    if os.getenv("HTTP_PREWARM", "True").lower() == "true":
+        _warmup_task = asyncio.create_task(warmup_http_client())
+    return client
+
+async def close_http_client() -> None:
+    """Close the shared client and release pooled connections"""
+    global _http_client, _warmup_task
+    if _warmup_task is not None and not _warmup_task.done():
+        _warmup_task.cancel()
+        try:
+            await _warmup_task
+        except (asyncio.CancelledError, Exception):
+            pass
+    _warmup_task = None
+
+    if _http_client is not None:
+        await _http_client.aclose()
+        logger.info("Closed shared HTTP client")
+    _http_client = None
@@ -0,0 +1,102 @@
+import json
+import logging
+from typing import Any, List
+
+logger = logging.getLogger(__name__)
+
+class JSONArrayStreamParser:
+    """
+    Incrementally extract the elements of the first JSON array in a text stream.
+
+    Feed it chunks as they arrive (e.g. LLM completion deltas); every object in
+    the array is returned as soon as its closing brace is seen. Anything before
+    the opening bracket (markdown fences, prose, an enclosing `{"tracks": `) is
+    ignored, and an unterminated trailing object is simply never emitted, so a
+    truncated array still yields every complete element.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0            # next character of _buffer to scan
+        self._in_array = False
+        self._depth = 0          # nesting depth inside the array
+        self._in_string = False
+        self._escaped = False
+        self._item_start = -1
+        self.done = False        # closing bracket of the array was seen
+        self.items_parsed = 0
+        self.items_invalid = 0
+
+    def feed(self, chunk: str) -> List[Any]:
+        """Consume a chunk and return any array elements completed by it"""
+        if self.done or not chunk:
+            return []
+
+        self._buffer += chunk
+        items = []
+        buffer = self._buffer
+        i = self._pos
+
+        while i < len(buffer):
+            ch = buffer[i]
+
+            if not self._in_array:
+                if ch == "[":
+                    self._in_array = True
+                i += 1
+                continue
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                if self._depth == 0:
+                    self._item_start = i
+                self._depth += 1
+            elif ch in "}]":
+                if self._depth == 0:
+                    if ch == "]":
+                        self.done = True
+                        i += 1
+                        break
+                else:
+                    self._depth -= 1
+                    if self._depth == 0:
+                        item = self._decode(buffer[self._item_start:i + 1])
+                        if item is not None:
+                            items.append(item)
+                        self._item_start = -1
+            i += 1
+
+        # Drop consumed text so the buffer only holds the element in progress
+        if self._item_start >= 0:
+            self._buffer = buffer[self._item_start:]
+            self._pos = i - self._item_start
+            self._item_start = 0
+        else:
+            self._buffer = ""
+            self._pos = 0
+        return items
+
+    def _decode(self, text: str) -> Any:
+        try:
+            item = json.loads(text)
+        except json.JSONDecodeError:
+            self.items_invalid += 1
+            logger.warning(f"Skipping malformed array element: {text[:200]}")
+            return None
+        self.items_parsed += 1
+        return item
+
+def parse_json_array(text: str) -> List[Any]:
+    """
+    Tolerantly parse the first JSON array in text, returning every complete
+    element even if the array is truncated or wrapped in fences/prose
+    """
+    return JSONArrayStreamParser().feed(text)
@@ -0,0 +1,71 @@
+import logging
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class _ModelLatency:
+    __slots__ = ("ewma", "samples", "failures")
+
+    def __init__(self):
+        self.ewma: Optional[float] = None
+        self.samples = 0
+        self.failures = 0
+
+class LatencyRouter:
+    """
+    Picks the fastest of a set of candidate models by exponentially weighted
+    latency. Models without samples are tried first, and every `explore_every`
+    calls the least-sampled candidate gets a call so estimates stay current.
+    """
+
+    def __init__(self, alpha: float = 0.2, explore_every: int = 20):
+        self.alpha = alpha
+        self.explore_every = explore_every
+        self.calls = 0
+        self._models: Dict[str, _ModelLatency] = {}
+
+    def _model(self, model: str) -> _ModelLatency:
+        stats = self._models.get(model)
+        if stats is None:
+            stats = self._models[model] = _ModelLatency()
+        return stats
+
+    def choose(self, candidates: List[str]) -> str:
+        self.calls += 1
+        untried = [model for model in candidates if self._model(model).ewma is None]
+        if untried:
+            return untried[0]
+        if self.explore_every and self.calls % self.explore_every == 0:
+            return min(candidates, key=lambda model: self._models[model].samples)
+        return min(candidates, key=lambda model: self._models[model].ewma)
+
+    def record(self, model: str, seconds: float) -> None:
+        stats = self._model(model)
+        stats.samples += 1
+        stats.ewma = seconds if stats.ewma is None else self.alpha * seconds + (1 - self.alpha) * stats.ewma
+
+    def record_failure(self, model: str, penalty: float = 10.0) -> None:
+        """Count a failed call as a slow one so a broken model isn't preferred"""
+        self._model(model).failures += 1
+        self.record(model, penalty)
+
+    def stats(self) -> Dict:
+        return {
+            "calls": self.calls,
+            "models": {
+                model: {
+                    "ewma_seconds": round(stats.ewma, 3) if stats.ewma is not None else None,
+                    "samples": stats.samples,
+                    "failures": stats.failures
+                }
+                for model, stats in self._models.items()
+            }
+        }
+
+_title_router: Optional[LatencyRouter] = None
+
+def get_title_router() -> LatencyRouter:
+    global _title_router
+    if _title_router is None:
+        _title_router = LatencyRouter()
+    return _title_router
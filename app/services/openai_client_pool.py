@@ -0,0 +1,178 @@
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+
+import httpx
+import openai
+
+logger = logging.getLogger(__name__)
+
+def hash_api_key(api_key: str) -> str:
+    """Stable identifier for a key that's safe to log and expose in metrics"""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+def _build_async_client(api_key: str) -> openai.AsyncOpenAI:
+    """Build an async OpenAI client with a pooled, keep-alive HTTP transport"""
+    limits = httpx.Limits(
+        max_connections=int(os.getenv("OPENAI_MAX_CONNECTIONS", "50")),
+        max_keepalive_connections=int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20")),
+        keepalive_expiry=float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "60"))
+    )
+    # Set longer timeout for reasoning models
+    return openai.AsyncOpenAI(
+        api_key=api_key,
+        timeout=120.0,
+        http_client=openai.DefaultAsyncHttpxClient(limits=limits)
+    )
+
+class _PooledClient:
+    __slots__ = ("client", "semaphore", "concurrency", "created_at", "last_used", "in_flight", "requests", "waits")
+
+    def __init__(self, client: openai.AsyncOpenAI, concurrency: int):
+        self.client = client
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.concurrency = concurrency
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.in_flight = 0
+        self.requests = 0
+        self.waits = 0
+
+class OpenAIClientPool:
+    """
+    Bounded LRU pool of AsyncOpenAI clients keyed by a hash of the API key.
+
+    The server's own key and every user-supplied key get one long-lived client
+    (and therefore one warm connection pool) each. Clients idle for longer than
+    idle_timeout, or pushed out by the max_clients bound, are closed; clients with
+    requests in flight are never evicted. Each key has its own concurrency limit,
+    and a worker-wide limit caps total concurrent completions.
+    """
+
+    def __init__(self, max_clients: int = 32, idle_timeout: float = 600, per_key_concurrency: int = 4,
+                 default_key_concurrency: int = 16, max_concurrency: int = 16):
+        self.max_clients = max_clients
+        self.idle_timeout = idle_timeout
+        self.per_key_concurrency = per_key_concurrency
+        self.default_key_concurrency = default_key_concurrency
+        self._global_semaphore = asyncio.Semaphore(max_concurrency)
+        self._clients: "OrderedDict[str, _PooledClient]" = OrderedDict()
+        self._closing: set = set()  # close() tasks of evicted clients, awaited on shutdown
+
+        self.created = 0
+        self.reused = 0
+        self.evicted_lru = 0
+        self.evicted_idle = 0
+
+    def _get(self, api_key: str) -> _PooledClient:
+        key_hash = hash_api_key(api_key)
+        pooled = self._clients.get(key_hash)
+        if pooled is not None:
+            self._clients.move_to_end(key_hash)
+            self.reused += 1
+            return pooled
+
+        concurrency = self.default_key_concurrency if api_key == os.getenv("OPENAI_API_KEY") else self.per_key_concurrency
+        pooled = self._clients[key_hash] = _PooledClient(_build_async_client(api_key), concurrency)
+        self.created += 1
+        logger.info(f"Created OpenAI client for key {key_hash} ({len(self._clients)} pooled)")
+        self._evict()
+        return pooled
+
+    def _close_later(self, key_hash: str, pooled: _PooledClient) -> None:
+        del self._clients[key_hash]
+        task = asyncio.get_running_loop().create_task(pooled.client.close())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    def _evict(self) -> None:
+        now = time.monotonic()
+        for key_hash, pooled in list(self._clients.items()):
+            if pooled.in_flight == 0 and now - pooled.last_used > self.idle_timeout:
+                self._close_later(key_hash, pooled)
+                self.evicted_idle += 1
+
+        # Oldest first; skip clients that are busy
+        for key_hash, pooled in list(self._clients.items()):
+            if len(self._clients) <= self.max_clients:
+                break
+            if pooled.in_flight == 0:
+                self._close_later(key_hash, pooled)
+                self.evicted_lru += 1
+
+    @asynccontextmanager
+    async def lease(self, api_key: str) -> AsyncIterator[openai.AsyncOpenAI]:
+        """
+        Borrow the client for a key for one request, waiting for a per-key and a
+        worker-wide concurrency slot. The client can't be evicted while leased.
+        """
+        pooled = self._get(api_key)
+        pooled.in_flight += 1
+        try:
+            if pooled.semaphore.locked():
+                pooled.waits += 1
+            async with pooled.semaphore, self._global_semaphore:
+                pooled.requests += 1
+                yield pooled.client
+        finally:
+            pooled.in_flight -= 1
+            pooled.last_used = time.monotonic()
+
+    async def close(self) -> None:
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for pooled in clients:
+            await pooled.client.close()
+        if clients:
+            logger.info(f"Closed {len(clients)} pooled OpenAI clients")
+        # Evicted clients still closing in the background
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
+
+    def stats(self) -> Dict:
+        now = time.monotonic()
+        return {
+            "clients": len(self._clients),
+            "max_clients": self.max_clients,
+            "created": self.created,
+            "reused": self.reused,
+            "evicted_lru": self.evicted_lru,
+            "evicted_idle": self.evicted_idle,
+            "keys": {
+                key_hash: {
+                    "in_flight": pooled.in_flight,
+                    "concurrency": pooled.concurrency,
+                    "requests": pooled.requests,
+                    "waits": pooled.waits,
+                    "idle_seconds": round(now - pooled.last_used, 1)
+                }
+                for key_hash, pooled in self._clients.items()
+            }
+        }
+
+_client_pool: Optional[OpenAIClientPool] = None
+
+def get_openai_client_pool() -> OpenAIClientPool:
+    global _client_pool
+    if _client_pool is None:
+        max_concurrency = int(os.getenv("OPENAI_MAX_CONCURRENCY", "16"))
+        _client_pool = OpenAIClientPool(
+            max_clients=int(os.getenv("OPENAI_CLIENT_POOL_SIZE", "32")),
+            idle_timeout=float(os.getenv("OPENAI_CLIENT_IDLE_TIMEOUT", "600")),
+            per_key_concurrency=int(os.getenv("OPENAI_PER_KEY_CONCURRENCY", "4")),
+            default_key_concurrency=max_concurrency,
+            max_concurrency=max_concurrency
+        )
+    return _client_pool
+
+async def close_openai_clients() -> None:
+    """Close every pooled OpenAI client (called from the FastAPI lifespan)"""
+    global _client_pool
+    if _client_pool is not None:
+        await _client_pool.close()
+    _client_pool = None
@@ -1,212 +1,498 @@
-import openai
 import json
 import logging
 import os
-from typing import List, Dict
-from pathlib import Path
+import time
+from contextlib import AsyncExitStack
+from typing import AsyncIterator, List, Dict, Optional, Tuple
+
+from app.services.adaptive_sizing import get_suggestion_sizer
+from app.services.app_config import (
+    STAGE_ADDITIONAL_TRACKS, STAGE_PLAYLIST_TITLE, STAGE_TRACK_GENERATION, get_app_config
+)
+from app.services.hedging import get_hedge_policy
+from app.services.json_stream import JSONArrayStreamParser, parse_json_array
+from app.services.model_router import get_title_router
+from app.services.openai_client_pool import get_openai_client_pool
+from app.services.prompt_registry import get_prompt_registry
+from app.services.query_similarity import get_query_index
+from app.services.suggestion_cache import get_suggestion_cache
+from app.services.track_matching import track_key
 
 logger = logging.getLogger(__name__)
 
+# Schema-enforced output for track generation. Structured outputs need an object at
+# the top level, so the array is wrapped in {"tracks": [...]}; the array parser
+# skips the wrapper either way.
+TRACK_LIST_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "track_suggestions",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "tracks": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "track_name": {"type": "string"},
+                            "artist": {"type": "string"},
+                            "album": {"type": "string"},
+                            "release_year": {"type": "string"}
+                        },
+                        "required": ["track_name", "artist", "album", "release_year"],
+                        "additionalProperties": False
+                    }
+                }
+            },
+            "required": ["tracks"],
+            "additionalProperties": False
+        }
+    }
+}
+
+# Counters for how often bulk generation needs a second (fallback) LLM call
+_generation_stats = {
+    "bulk_generations": 0,
+    "truncated_responses": 0,
+    "salvaged_tracks": 0,
+    "invalid_items": 0,
+    "fallback_calls": 0,      # bulk/streamed output unusable, so a second call had to make it up
+    "additional_calls": 0,    # every additional-tracks call, including Spotify shortfall top-ups
+    "estimated_usage": 0,
+    "prompt_tokens": 0,
+    "cached_prompt_tokens": 0
+}
+
+# The avoid list sent with fallback calls is capped so its prompt cost doesn't grow
+# with every fallback; duplicates beyond it are still filtered after parsing
+ADDITIONAL_TRACKS_AVOID_LIMIT = 30
+
+# Streamed generation is hedged on time to first chunk, tracked apart from whole-call latencies
+STAGE_TRACK_GENERATION_FIRST_CHUNK = f"{STAGE_TRACK_GENERATION}_first_chunk"
+
+def get_generation_stats() -> Dict:
+    """Bulk generation counters, including the fallback rate"""
+    stats = dict(_generation_stats)
+    bulk = stats["bulk_generations"]
+    stats["fallback_rate"] = round(stats["fallback_calls"] / bulk, 4) if bulk else 0.0
+    prompt_tokens = stats["prompt_tokens"]
+    stats["prompt_cache_hit_rate"] = round(stats["cached_prompt_tokens"] / prompt_tokens, 4) if prompt_tokens else 0.0
+    return stats
+
+def _record_usage(stage: str, usage) -> None:
+    """Log prompt, cached-prefix and completion tokens for one call"""
+    if usage is None:
+        return
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = (getattr(details, "cached_tokens", None) or 0) if details else 0
+    _generation_stats["prompt_tokens"] += usage.prompt_tokens or 0
+    _generation_stats["cached_prompt_tokens"] += cached
+    logger.info(f"{stage} usage: {usage.prompt_tokens} prompt tokens ({cached} cached), "
+                f"{usage.completion_tokens} completion tokens")
+
+def _track_list_options() -> Dict:
+    """Extra completion options for track-list calls (structured output unless disabled)"""
+    if os.getenv("OPENAI_STRUCTURED_OUTPUT", "True").lower() == "true":
+        return {"response_format": TRACK_LIST_RESPONSE_FORMAT}
+    return {}
+
+class _OpenedStream:
+    """A completion stream whose first chunk has arrived, holding its client lease until closed"""
+
+    def __init__(self, exit_stack: AsyncExitStack, stream, first_chunk):
+        self._exit_stack = exit_stack
+        self._stream = stream
+        self._first_chunk = first_chunk
+
+    async def __aiter__(self):
+        if self._first_chunk is not None:
+            yield self._first_chunk
+        async for chunk in self._stream:
+            yield chunk
+
+    async def close(self) -> None:
+        await self._exit_stack.aclose()
+
 class OpenAIService:
     def __init__(self, api_key: str = None):
         # Use provided API key or fall back to environment variable
         final_api_key = api_key or os.getenv("OPENAI_API_KEY")
         if not final_api_key:
             raise ValueError("OpenAI API key not provided and not found in environment variables")
-        # Set longer timeout for reasoning models
-        self.client = openai.OpenAI(api_key=final_api_key, timeout=120.0)
+        # Clients are pooled per key, so user-supplied keys also reuse warm connections
+        self._api_key = final_api_key
+        self._client_pool = get_openai_client_pool()
+        self._hedge_policy = get_hedge_policy()
         
-        # Load prompts from config files
-        self.config_dir = Path(__file__).parent.parent.parent / ".config"
-        self.system_prompts = self._load_config("system_prompt.json")
-        self.user_prompts = self._load_config("user_prompt.json")
+        # Prompts and per-stage model settings are loaded once per process
+        self.prompts = get_prompt_registry()
+        self.config = get_app_config()
     
-    def _load_config(self, filename: str) -> dict:
-        """Load configuration from JSON file"""
-        try:
-            config_path = self.config_dir / filename
-            with open(config_path, 'r') as f:
-                return json.load(f)
-        except Exception as e:
-            logger.error(f"Failed to load config {filename}: {str(e)}")
-            raise ValueError(f"Failed to load configuration file: {filename}")
+    @property
+    def system_prompts(self) -> dict:
+        return self.prompts.system_prompts
+    
+    @property
+    def user_prompts(self) -> dict:
+        return self.prompts.user_prompts
 
-    async def generate_track_suggestions(self, query: str, count: int = 35) -> List[Dict[str, str]]:
+    async def _create_completion(self, stage: Optional[str] = None, **kwargs):
         """
-        Generate track suggestions in one bulk call for better performance
-        Reduced default from 50 to 35 for faster initial response
+        Run a chat completion without blocking the event loop, within the per-key and global concurrency limits.
+        Calls tagged with a stage have their latency tracked and may be hedged (see HedgePolicy).
         """
+        if stage is None:
+            return await self._create_completion_once(**kwargs)
+        response = await self._hedge_policy.run(stage, lambda: self._create_completion_once(**kwargs))
+        _record_usage(stage, getattr(response, "usage", None))
+        return response
+
+    async def _create_completion_once(self, **kwargs):
+        async with self._client_pool.lease(self._api_key) as client:
+            return await client.chat.completions.create(**kwargs)
+
+    async def _open_stream_once(self, **kwargs) -> _OpenedStream:
+        """Start a streamed completion and wait for its first chunk"""
+        exit_stack = AsyncExitStack()
         try:
-            # Build user prompt using system prompt format with dynamic count
-            user_prompt = self.system_prompts["track_generation"]["objective"].replace("exactly 50 songs", f"exactly {count} songs").format(prompt=query)
-            
-            # Combine role and rules into system message for better context
-            system_content = f"""{self.system_prompts["track_generation"]["role"]}
+            client = await exit_stack.enter_async_context(self._client_pool.lease(self._api_key))
+            stream = await client.chat.completions.create(stream=True, **kwargs)
+            exit_stack.push_async_callback(stream.close)
+            try:
+                first_chunk = await stream.__anext__()
+            except StopAsyncIteration:
+                first_chunk = None
+        except BaseException:
+            await exit_stack.aclose()
+            raise
+        return _OpenedStream(exit_stack, stream, first_chunk)
 
-{self.system_prompts["track_generation"]["rules"]["core_directive"]}
+    async def _open_stream(self, **kwargs) -> _OpenedStream:
+        """
+        Open a streamed completion, hedged like _create_completion but on time to first
+        chunk: once tokens flow, tracks reach the caller as they are generated.
+        """
+        return await self._hedge_policy.run(
+            STAGE_TRACK_GENERATION_FIRST_CHUNK,
+            lambda: self._open_stream_once(**kwargs),
+            discard=lambda opened: opened.close()
+        )
 
-Rules:
-- {' '.join(self.system_prompts["track_generation"]["rules"]["factuality"])}
-- {' '.join(self.system_prompts["track_generation"]["rules"]["recording_type"])}
-- {' '.join(self.system_prompts["track_generation"]["rules"]["playlist_diversity"])}
+    def _size_request(self, query: str, count: Optional[int]) -> Tuple[int, int]:
+        """
+        Suggestion count and output token budget for a bulk call. With adaptive sizing
+        enabled both come from observed parse/match rates and tokens per track (an
+        explicit count is kept as is); the configured stage budget is the ceiling.
+        """
+        stage = self.config.stage(STAGE_TRACK_GENERATION)
+        size = get_suggestion_sizer().choose(query, self.config.adaptive_sizing, count or self.config.suggestion_count,
+                                             self.config.target_tracks)
+        if count is None:
+            count = size.count
+        budget = stage.token_budget(count)
+        if size.max_completion_tokens:
+            budget = min(budget, size.max_completion_tokens)
+        return count, budget
 
-{self.system_prompts["track_generation"]["system_message"].replace("exactly 50 track objects", f"exactly {count} track objects")}"""
+    def _min_tracks(self, count: int) -> int:
+        """
+        Fewest valid tracks a generation can return without a top-up call. Based on the
+        configured suggestion_count, so sizing the count up doesn't make top-ups more frequent.
+        """
+        return max(15, min(count, self.config.suggestion_count) // 2)
 
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": system_content},
-                    {"role": "user", "content": user_prompt}
-                ],
-                max_completion_tokens=int(count * 80),  # Dynamic based on track count
-                temperature=0.7
+    def _build_track_generation_messages(self, query: str, count: int) -> List[Dict[str, str]]:
+        """Build the system/user messages for bulk track generation"""
+        prompt = self.prompts.track_generation(count)
+        return [
+            {"role": "system", "content": prompt.system_content},
+            {"role": "user", "content": prompt.user_template.format(prompt=query)}
+        ]
+
+    def _cached_suggestions(self, query: str, count: Optional[int]) -> Optional[List[Dict]]:
+        """
+        Suggestions from the exact-query cache, else from a near-duplicate query (if enabled).
+        Looked up before sizing, so an adaptively chosen count can't turn a repeat query into a miss.
+        """
+        cached_tracks = get_suggestion_cache().get(query, count)
+        if cached_tracks:
+            logger.info(f"Suggestion cache hit for '{query}' ({len(cached_tracks)} tracks)")
+            return cached_tracks
+        similar = get_query_index().lookup(query, count or self.config.suggestion_count)
+        return similar.tracks if similar else None
+
+    def _store_suggestions(self, query: str, tracks: List[Dict]) -> None:
+        get_suggestion_cache().set(query, tracks)
+        get_query_index().add(query, tracks)
+
+    def _validate_track(self, track, seen_tracks: set, position: int = 0) -> Optional[Dict]:
+        """
+        Normalize and validate one suggested track. Returns None for invalid tracks
+        and for duplicates of a key already in seen_tracks (which is updated in place).
+        """
+        if not isinstance(track, dict):
+            logger.warning(f"Track {position} is not a dict: {track}")
+            return None
+        
+        # Normalize field names
+        if "title" in track and "track_name" not in track:
+            track["track_name"] = track.pop("title")
+        
+        # Validate required fields
+        if not all(field in track for field in ["track_name", "artist"]):
+            logger.warning(f"Track {position} missing required fields: {track}")
+            return None
+        
+        # Set defaults for optional fields
+        track.setdefault("album", "Unknown Album")
+        track.setdefault("release_year", "Unknown")
+        
+        # Check for duplicates, including punctuation/featuring/remaster variants
+        key = track_key(track['track_name'], track['artist'])
+        if key in seen_tracks:
+            logger.info(f"Skipping duplicate: {track['track_name']} by {track['artist']}")
+            return None
+        
+        seen_tracks.add(key)
+        return track
+
+    async def generate_track_suggestions(self, query: str, count: Optional[int] = None, use_cache: bool = True) -> List[Dict[str, str]]:
+        """
+        Generate track suggestions in one bulk call for better performance
+        count defaults to suggestion_count from config.json (35), or is sized adaptively
+        Results are cached by normalized query unless use_cache is False
+        """
+        if use_cache:
+            cached_tracks = self._cached_suggestions(query, count)
+            if cached_tracks:
+                return cached_tracks
+        count, max_tokens = self._size_request(query, count)
+        
+        stage = self.config.stage(STAGE_TRACK_GENERATION)
+        try:
+            response = await self._create_completion(
+                stage=STAGE_TRACK_GENERATION,
+                model=stage.model,
+                messages=self._build_track_generation_messages(query, count),
+                max_completion_tokens=max_tokens,  # Dynamic based on track count
+                temperature=stage.temperature,
+                **_track_list_options()
             )
+            _generation_stats["bulk_generations"] += 1
 
-            content = response.choices[0].message.content.strip()
+            choice = response.choices[0]
+            content = (choice.message.content or "").strip()
             logger.info(f"Raw bulk response length: {len(content)}")
-            
-            # Clean up markdown formatting if present
-            if content.startswith('```json'):
-                content = content[7:]
-            elif content.startswith('```'):
-                content = content[3:]
-            
-            if content.endswith('```'):
-                content = content[:-3]
-            
-            content = content.strip()
-
-            # Extract JSON array if needed
-            if not content.startswith('['):
-                start_idx = content.find('[')
-                if start_idx != -1:
-                    end_idx = content.rfind(']')
-                    if end_idx != -1 and end_idx > start_idx:
-                        content = content[start_idx:end_idx + 1]
 
             if not content:
                 raise Exception("Empty response from OpenAI")
             
-            # Parse JSON response
-            try:
-                tracks_raw = json.loads(content)
-                
-                if not isinstance(tracks_raw, list):
-                    raise Exception("Response is not a JSON array")
+            # Tolerant parse: recovers every complete track object even if the array
+            # is truncated at max_completion_tokens or wrapped in fences/prose
+            parser = JSONArrayStreamParser()
+            tracks_raw = parser.feed(content)
+            _generation_stats["invalid_items"] += parser.items_invalid
+            
+            # Process and validate tracks
+            valid_tracks = []
+            seen_tracks = set()
+            
+            for i, track in enumerate(tracks_raw):
+                track = self._validate_track(track, seen_tracks, i + 1)
+                if track is None:
+                    continue
                 
-                # Process and validate tracks
-                valid_tracks = []
-                seen_tracks = set()
+                valid_tracks.append(track)
                 
-                for i, track in enumerate(tracks_raw):
-                    if not isinstance(track, dict):
-                        logger.warning(f"Track {i+1} is not a dict: {track}")
-                        continue
-                    
-                    # Normalize field names
-                    if "title" in track and "track_name" not in track:
-                        track["track_name"] = track.pop("title")
-                    
-                    # Validate required fields
-                    if not all(field in track for field in ["track_name", "artist"]):
-                        logger.warning(f"Track {i+1} missing required fields: {track}")
-                        continue
-                    
-                    # Set defaults for optional fields
-                    track.setdefault("album", "Unknown Album")
-                    track.setdefault("release_year", "Unknown")
-                    
-                    # Check for duplicates
-                    track_key = f"{track['track_name'].lower()}|{track['artist'].lower()}"
-                    if track_key in seen_tracks:
-                        logger.info(f"Skipping duplicate: {track['track_name']} by {track['artist']}")
-                        continue
-                    
-                    seen_tracks.add(track_key)
-                    valid_tracks.append(track)
-                    
-                    if len(valid_tracks) >= count:  # Cap at requested count
-                        break
+                if len(valid_tracks) >= count:  # Cap at requested count
+                    break
 
-                logger.info(f"Generated {len(valid_tracks)} valid tracks from bulk request")
-                
-                # If we didn't get enough tracks, make additional requests
-                min_threshold = max(15, count // 2)  # Dynamic minimum threshold
-                if len(valid_tracks) < min_threshold:
-                    logger.warning(f"Only got {len(valid_tracks)} tracks, attempting fallback generation")
-                    additional_tracks = await self._generate_additional_tracks(query, valid_tracks, count - len(valid_tracks))
-                    valid_tracks.extend(additional_tracks)
-                
-                if not valid_tracks:
-                    raise Exception("Failed to generate any valid tracks")
-                
-                return valid_tracks
+            if choice.finish_reason == "length" or not parser.done:
+                _generation_stats["truncated_responses"] += 1
+                _generation_stats["salvaged_tracks"] += len(valid_tracks)
+                logger.warning(f"Bulk response was truncated, salvaged {len(valid_tracks)} complete tracks")
 
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse bulk response: {content[:500]}...")
-                raise Exception(f"Invalid JSON response from OpenAI: {str(e)}")
+            logger.info(f"Generated {len(valid_tracks)} valid tracks from bulk request")
+            usage = getattr(response, "usage", None)
+            get_suggestion_sizer().record_generation(
+                query, count, len(valid_tracks), usage.completion_tokens if usage else None
+            )
+            
+            # If we didn't get enough tracks, make additional requests
+            if len(valid_tracks) < self._min_tracks(count):
+                logger.warning(f"Only got {len(valid_tracks)} tracks, attempting fallback generation")
+                if not valid_tracks:
+                    logger.error(f"No parseable tracks in bulk response: {content[:500]}...")
+                _generation_stats["fallback_calls"] += 1
+                additional_tracks = await self._generate_additional_tracks(query, valid_tracks, count - len(valid_tracks))
+                valid_tracks.extend(additional_tracks)
+            
+            if not valid_tracks:
+                raise Exception("Failed to generate any valid tracks")
+            
+            self._store_suggestions(query, valid_tracks)
+            return valid_tracks
 
         except Exception as e:
             logger.error(f"OpenAI bulk generation error: {str(e)}")
             raise Exception(f"Failed to generate track suggestions: {str(e)}")
 
+    async def stream_track_suggestions(self, query: str, count: Optional[int] = None, use_cache: bool = True) -> AsyncIterator[Dict[str, str]]:
+        """
+        Streaming variant of generate_track_suggestions: yields each validated track
+        as soon as its JSON object closes in the completion stream, so callers can
+        start searching Spotify while the model is still generating
+        """
+        if use_cache:
+            cached_tracks = self._cached_suggestions(query, count)
+            if cached_tracks:
+                for track in cached_tracks:
+                    yield track
+                return
+        count, max_tokens = self._size_request(query, count)
+
+        valid_tracks = []
+        seen_tracks = set()
+        parser = JSONArrayStreamParser()
+        stage = self.config.stage(STAGE_TRACK_GENERATION)
+        completion_tokens = None
+        content_chunks = 0
+        streamed = False  # the stream was read to the end (or failed), rather than abandoned by the caller
+
+        try:
+            try:
+                stream = await self._open_stream(
+                    model=stage.model,
+                    messages=self._build_track_generation_messages(query, count),
+                    max_completion_tokens=max_tokens,  # Dynamic based on track count
+                    temperature=stage.temperature,
+                    stream_options={"include_usage": True},
+                    **_track_list_options()
+                )
+                _generation_stats["bulk_generations"] += 1
+                try:
+                    async for chunk in stream:
+                        if getattr(chunk, "usage", None):
+                            completion_tokens = chunk.usage.completion_tokens
+                            _record_usage(STAGE_TRACK_GENERATION, chunk.usage)
+                        if not chunk.choices:
+                            continue
+                        delta = chunk.choices[0].delta.content
+                        if delta:
+                            content_chunks += 1
+                        over_cap = False
+                        for track in parser.feed(delta or ""):
+                            # Cap at requested count; stop reading once the model goes past it
+                            if len(valid_tracks) >= count:
+                                over_cap = True
+                                break
+                            track = self._validate_track(track, seen_tracks, parser.items_parsed)
+                            if track is None:
+                                continue
+                            valid_tracks.append(track)
+                            yield track
+                        # Otherwise keep reading past the closing bracket: only the wrapper and usage chunk remain
+                        if over_cap:
+                            break
+                finally:
+                    await stream.close()
+            except Exception as e:
+                logger.error(f"OpenAI streaming generation error: {str(e)}")
+                if not valid_tracks:
+                    raise Exception(f"Failed to generate track suggestions: {str(e)}")
+
+            streamed = True
+            self._record_stream(query, count, valid_tracks, parser, completion_tokens, content_chunks, complete=True)
+
+            # If we didn't get enough tracks, make additional requests
+            if len(valid_tracks) < self._min_tracks(count):
+                logger.warning(f"Only got {len(valid_tracks)} tracks, attempting fallback generation")
+                _generation_stats["fallback_calls"] += 1
+                additional_tracks = await self._generate_additional_tracks(query, valid_tracks, count - len(valid_tracks))
+                for track in additional_tracks:
+                    valid_tracks.append(track)
+                    yield track
+
+            if not valid_tracks:
+                raise Exception("Failed to generate track suggestions: no valid tracks")
+        finally:
+            # Also runs when the caller stops early (GeneratorExit or CancelledError once the
+            # playlist is full), so the cache, query index and sizer learn from what was generated
+            if valid_tracks:
+                if not streamed:
+                    self._record_stream(query, count, valid_tracks, parser, completion_tokens, content_chunks,
+                                        complete=False)
+                self._store_suggestions(query, valid_tracks)
+
+    def _record_stream(self, query: str, count: int, valid_tracks: List[Dict], parser: JSONArrayStreamParser,
+                       completion_tokens: Optional[int], content_chunks: int, complete: bool) -> None:
+        """
+        Record a streamed generation in the counters and the sizer. When the caller stopped
+        reading early only the suggestions read so far count as requested, so an abandoned
+        stream doesn't look like a poor parse rate.
+        """
+        _generation_stats["invalid_items"] += parser.items_invalid
+        if complete and valid_tracks and not parser.done and len(valid_tracks) < count:
+            _generation_stats["truncated_responses"] += 1
+            _generation_stats["salvaged_tracks"] += len(valid_tracks)
+        logger.info(f"Streamed {len(valid_tracks)} valid tracks" + ("" if complete else " before the caller stopped"))
+        # Usage only arrives in the final chunk, so it's missing if we stopped reading early;
+        # content chunks carry about one token each, which is close enough for tokens_per_track
+        if completion_tokens is None and content_chunks:
+            completion_tokens = content_chunks
+            _generation_stats["estimated_usage"] += 1
+        requested = count if complete else max(parser.items_parsed + parser.items_invalid, len(valid_tracks))
+        get_suggestion_sizer().record_generation(query, requested, len(valid_tracks), completion_tokens)
+
     async def _generate_additional_tracks(self, query: str, existing_tracks: List[Dict], count: int) -> List[Dict[str, str]]:
         """
         Generate additional tracks when bulk generation doesn't return enough
         """
         try:
-            # Build list of existing tracks to avoid
-            existing_list = ", ".join([f'"{t["track_name"]}" by {t["artist"]}' for t in existing_tracks])
-            avoid_text = f"\n\nDo not suggest any of these already selected tracks: {existing_list}"
+            # Compact, bounded list of the most recent existing tracks to avoid
+            # Accepts LLM suggestions (track_name) as well as Spotify results (title)
+            avoid_tracks = existing_tracks[-ADDITIONAL_TRACKS_AVOID_LIMIT:]
+            existing_list = "; ".join(f'{t.get("track_name", t.get("title", ""))} - {t.get("artist", "")}' for t in avoid_tracks)
             
-            user_prompt = f"Generate exactly {count} more songs that fit: \"{query}\".{avoid_text}"
+            # Static instructions first, request-specific text last
+            user_prompt = (
+                "Generate more songs that fit the request below. Do not suggest any of the already selected tracks.\n\n"
+                f"Number of songs: {count}\nRequest: \"{query}\""
+            )
+            if existing_list:
+                user_prompt += f"\nAlready selected: {existing_list}"
             
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
+            stage = self.config.stage(STAGE_ADDITIONAL_TRACKS)
+            response = await self._create_completion(
+                stage=STAGE_ADDITIONAL_TRACKS,
+                model=stage.model,
                 messages=[
-                    {"role": "system", "content": self.system_prompts["track_generation"]["system_message"]},
+                    # Same system message as bulk generation, so the two share a cacheable prefix
+                    {"role": "system", "content": self.prompts.track_system_content()},
                     {"role": "user", "content": user_prompt}
                 ],
-                max_completion_tokens=2000,
-                temperature=0.8
+                max_completion_tokens=stage.token_budget(),
+                temperature=stage.temperature,
+                **_track_list_options()
             )
+            _generation_stats["additional_calls"] += 1
 
-            content = response.choices[0].message.content.strip()
+            content = (response.choices[0].message.content or "").strip()
             
-            # Clean and parse (same logic as main method)
-            if content.startswith('```json'):
-                content = content[7:]
-            elif content.startswith('```'):
-                content = content[3:]
-            if content.endswith('```'):
-                content = content[:-3]
-            content = content.strip()
-
-            if not content.startswith('['):
-                start_idx = content.find('[')
-                if start_idx != -1:
-                    end_idx = content.rfind(']')
-                    if end_idx != -1:
-                        content = content[start_idx:end_idx + 1]
-
+            # Same tolerant parse as the bulk path
             additional_tracks = []
-            if content:
-                try:
-                    tracks_raw = json.loads(content)
-                    if isinstance(tracks_raw, list):
-                        existing_keys = {f"{t['track_name'].lower()}|{t['artist'].lower()}" for t in existing_tracks}
-                        
-                        for track in tracks_raw:
-                            if isinstance(track, dict) and "track_name" in track and "artist" in track:
-                                track.setdefault("album", "Unknown Album")
-                                track.setdefault("release_year", "Unknown")
-                                
-                                track_key = f"{track['track_name'].lower()}|{track['artist'].lower()}"
-                                if track_key not in existing_keys:
-                                    additional_tracks.append(track)
-                                    existing_keys.add(track_key)
-                except json.JSONDecodeError:
-                    logger.warning("Failed to parse additional tracks response")
+            existing_keys = {track_key(t.get('track_name', t.get('title', '')), t.get('artist', '')) for t in existing_tracks}
+            for track in parse_json_array(content):
+                if isinstance(track, dict) and "track_name" in track and "artist" in track:
+                    track.setdefault("album", "Unknown Album")
+                    track.setdefault("release_year", "Unknown")
+                    
+                    key = track_key(track['track_name'], track['artist'])
+                    if key not in existing_keys:
+                        additional_tracks.append(track)
+                        existing_keys.add(key)
             
             logger.info(f"Generated {len(additional_tracks)} additional tracks")
             return additional_tracks
@@ -222,17 +508,31 @@ Rules:
         """
         try:
             # Build user prompt from config
-            user_prompt = self.user_prompts["playlist_title"].format(query=query)
+            prompt = self.prompts.playlist_title()
+            user_prompt = prompt.user_template.format(query=query)
 
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": self.system_prompts["playlist_title"]["system_message"]},
-                    {"role": "user", "content": user_prompt}
-                ],
-                max_completion_tokens=100,
-                temperature=0.7
-            )
+            # Optionally send the title call to whichever configured model has been fastest
+            stage = self.config.stage(STAGE_PLAYLIST_TITLE)
+            routing = self.config.title_routing
+            model = get_title_router().choose(self.config.title_models) if routing else stage.model
+            start = time.monotonic()
+            try:
+                response = await self._create_completion(
+                    stage=STAGE_PLAYLIST_TITLE,
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": prompt.system_content},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    max_completion_tokens=stage.token_budget(),
+                    temperature=stage.temperature
+                )
+            except Exception:
+                if routing:
+                    get_title_router().record_failure(model)
+                raise
+            if routing:
+                get_title_router().record(model, time.monotonic() - start)
 
             content = response.choices[0].message.content.strip()
             logger.info(f"Raw playlist title response: '{content}'")
@@ -0,0 +1,114 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class JSONPersistence(ABC):
+    """
+    Base for in-memory stores that survive restarts via a local JSON file.
+
+    Subclasses set `path` and `label`, mark changes with `_dirty = True`, and
+    implement _snapshot() (the entries to write, taken on the event loop) and
+    _restore(entry) (re-add one loaded entry, returning whether it was kept).
+    Every entry carries an "expires_at" timestamp; expired ones are skipped on
+    load. Files are written atomically via a temp file.
+    """
+
+    label = "entries"
+    path: Optional[Path] = None
+    _dirty = False
+
+    @abstractmethod
+    def _snapshot(self) -> List[Dict]:
+        ...
+
+    @abstractmethod
+    def _restore(self, entry: Dict) -> bool:
+        ...
+
+    def _write(self, entries: List[Dict]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"version": 1, "entries": entries}, f)
+        os.replace(tmp_path, self.path)
+        logger.info(f"Persisted {len(entries)} {self.label} entries to {self.path}")
+
+    async def persist(self) -> int:
+        """
+        Write live entries to disk if anything changed. The snapshot is taken on the
+        event loop and only the file write runs in a thread. Returns the number written.
+        """
+        if not self.path or not self._dirty:
+            return 0
+        entries = self._snapshot()
+        self._dirty = False
+        try:
+            await asyncio.to_thread(self._write, entries)
+        except Exception:
+            self._dirty = True
+            raise
+        return len(entries)
+
+    def load(self) -> int:
+        """Load unexpired entries from disk, in file order. Returns the number loaded."""
+        if not self.path or not self.path.exists():
+            return 0
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.error(f"Failed to load {self.label} from {self.path}: {str(e)}")
+            return 0
+
+        now = time.time()
+        loaded = 0
+        for entry in data.get("entries", []):
+            if entry.get("expires_at", 0) > now and entry.get("tracks") and self._restore(entry):
+                loaded += 1
+        # What was just read is already on disk
+        self._dirty = False
+        logger.info(f"Loaded {loaded} {self.label} entries from {self.path}")
+        return loaded
+
+class PeriodicPersister:
+    """Background task persisting a store every `interval` seconds, with a final flush on stop"""
+
+    def __init__(self, store: JSONPersistence):
+        self.store = store
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.store.persist()
+            except Exception as e:
+                logger.error(f"Failed to persist {self.store.label}: {str(e)}")
+
+    def start(self, interval: float) -> None:
+        """Load persisted entries and start persisting (called from the lifespan, before serving)"""
+        # Runs before the app serves requests, so a blocking read is fine here
+        self.store.load()
+        if interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run(interval))
+
+    async def stop(self) -> None:
+        """Stop periodic persistence and flush the store to disk"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.store.persist()
+        except Exception as e:
+            logger.error(f"Failed to persist {self.store.label}: {str(e)}")
@@ -0,0 +1,672 @@
+import asyncio
+import logging
+import time
+from contextlib import aclosing
+from typing import AsyncGenerator, Callable, Dict, List, Optional, Tuple
+
+from app.services.adaptive_sizing import get_suggestion_sizer
+from app.services.app_config import PipelineConfig, get_app_config
+from app.services.fallback_pool import GENERIC_FALLBACK_SEARCHES, get_fallback_pool
+from app.services.rate_limiter import request_priority, PRIORITY_SPECULATIVE
+from app.services.spotify_service import SpotifyService
+from app.services.track_catalog import get_track_catalog
+from app.services.track_matching import TrackQuery, best_match, track_key
+
+logger = logging.getLogger(__name__)
+
+async def _search_tracks_windowed(spotify_service: SpotifyService, suggested_tracks: List[Dict],
+                                  target_tracks: int = 50, concurrency: int = 10,
+                                  exclude_ids: Optional[set] = None,
+                                  settings: Optional[PipelineConfig] = None, market: Optional[str] = None) -> List[Dict]:
+    """
+    Search suggested tracks on Spotify keeping up to `concurrency` searches in flight
+    at all times (a sliding window rather than batch barriers, so one slow search
+    doesn't hold up the rest). Stops once target_tracks unique tracks not in
+    exclude_ids are found and cancels the searches still in flight.
+    Suggestions sharing a canonical track key are searched once.
+    Results keep the order of suggested_tracks.
+    """
+    exclude_ids = exclude_ids or set()
+    suggested_tracks = _dedupe_suggestions(suggested_tracks)
+    results: Dict[int, Dict] = {}
+    found_ids = set()
+    pending = set()
+    task_index: Dict[asyncio.Task, int] = {}
+    next_index = 0
+    searched = 0
+
+    try:
+        while next_index < len(suggested_tracks) or pending:
+            # Top the window up
+            while next_index < len(suggested_tracks) and len(pending) < concurrency:
+                task = asyncio.create_task(_search_single_track(spotify_service, "", suggested_tracks[next_index], settings,
+                                                                market))
+                task_index[task] = next_index
+                pending.add(task)
+                next_index += 1
+
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                searched += 1
+                result = None if task.exception() else task.result()
+                spotify_id = result.get("spotify_id") if result else None
+                if spotify_id and spotify_id not in exclude_ids:
+                    results[task_index[task]] = result
+                    found_ids.add(spotify_id)
+
+            if len(found_ids) >= target_tracks:
+                logger.info(f"Early exit: found {len(found_ids)} unique tracks, cancelling {len(pending)} in-flight searches")
+                break
+    finally:
+        for task in pending:
+            task.cancel()
+
+    # Back into suggestion order, dropping duplicate Spotify IDs
+    found_tracks = []
+    seen_track_ids = set()
+    for index in sorted(results):
+        result = results[index]
+        if result["spotify_id"] not in seen_track_ids:
+            found_tracks.append(result)
+            seen_track_ids.add(result["spotify_id"])
+    
+    logger.info(f"Windowed search: {len(found_tracks)} unique tracks found from {searched} searched")
+    return found_tracks[:target_tracks]
+
+def _suggestion_key(track: Dict) -> str:
+    return track_key(track.get('track_name', track.get('title', '')), track.get('artist', ''))
+
+def _dedupe_suggestions(tracks: List[Dict]) -> List[Dict]:
+    """Drop suggestions whose canonical key appeared earlier in the list"""
+    seen_keys = set()
+    unique = []
+    for track in tracks:
+        key = _suggestion_key(track)
+        if key not in seen_keys:
+            seen_keys.add(key)
+            unique.append(track)
+    _pipeline_stats["duplicate_suggestions"] += len(tracks) - len(unique)
+    return unique
+
+# Fallback order for track searches; earlier strategies are preferred when several hit
+SEARCH_STRATEGIES = ("plain", "quoted_track_artist", "quoted_track")
+
+_strategy_stats = {name: {"attempts": 0, "hits": 0, "wins": 0, "cancelled": 0} for name in SEARCH_STRATEGIES}
+
+def get_search_strategy_stats() -> Dict:
+    """Per-strategy attempts, hits and wins (the strategy whose match was used)"""
+    return {
+        name: {
+            **stats,
+            "hit_rate": round(stats["hits"] / stats["attempts"], 4) if stats["attempts"] else 0.0
+        }
+        for name, stats in _strategy_stats.items()
+    }
+
+def _strategy_queries(track_name: str, artist: str) -> List[Tuple[str, str, int]]:
+    """(strategy, query, limit) in order of preference"""
+    # Strategy 1: Search with just track name + artist (more likely to succeed)
+    queries = [("plain", f"{track_name} {artist}".strip(), 10)]
+    # Strategy 2: Try with quotes around track name
+    if '"' not in track_name:
+        queries.append(("quoted_track_artist", f'"{track_name}" {artist}', 5))
+    # Strategy 3: Try just the track name (very broad)
+    if track_name:
+        queries.append(("quoted_track", f'"{track_name}"', 5))
+    return queries
+
+async def _try_strategy(spotify_service: SpotifyService, strategy: str, query: str, limit: int,
+                        track_query: TrackQuery, min_score: float, market: Optional[str] = None) -> Optional[Dict]:
+    """Run one strategy's search and keep its best-scoring result (None if nothing scores min_score)"""
+    _strategy_stats[strategy]["attempts"] += 1
+    search_results = await spotify_service.search_track(query, limit=limit, market=market)
+    match = best_match(track_query, search_results, min_score)
+    if match:
+        _strategy_stats[strategy]["hits"] += 1
+    return match
+
+async def _race_strategies(spotify_service: SpotifyService, strategies: List[Tuple[str, str, int]],
+                           track_query: TrackQuery, min_score: float, delay: float,
+                           market: Optional[str] = None) -> Optional[Dict]:
+    """
+    Give the plain query a head start of `delay`; if it misses or is still running
+    after that, start the remaining strategies concurrently. The highest-ranked
+    strategy with a match wins (lower-ranked hits wait for higher-ranked ones to
+    finish) and everything still running is cancelled.
+    """
+    tasks = [asyncio.create_task(_try_strategy(spotify_service, *strategies[0], track_query, min_score, market))]
+    try:
+        await asyncio.wait(tasks, timeout=delay)
+        if not (tasks[0].done() and not tasks[0].exception() and tasks[0].result()):
+            tasks += [asyncio.create_task(_try_strategy(spotify_service, *strategy, track_query, min_score, market))
+                      for strategy in strategies[1:]]
+        
+        for (strategy, _, _), task in zip(strategies, tasks):
+            try:
+                match = await task
+            except Exception as e:
+                logger.debug(f"Search strategy {strategy} failed: {str(e)}")
+                continue
+            if match:
+                _strategy_stats[strategy]["wins"] += 1
+                return match
+        return None
+    finally:
+        for (strategy, _, _), task in zip(strategies, tasks):
+            if not task.done():
+                task.cancel()
+                _strategy_stats[strategy]["cancelled"] += 1
+
+async def _search_single_track(spotify_service: SpotifyService, search_query: str, original_track: Dict,
+                               settings: Optional[PipelineConfig] = None, market: Optional[str] = None) -> Dict:
+    """
+    Search for a single track on Spotify with improved multi-step strategy,
+    after checking the local track catalog
+    Strategies run one after another, or race each other when
+    pipeline.race_search_strategies is enabled. Every strategy ranks all of its
+    results against the suggestion, so a cover or a same-titled song by another
+    artist is not taken just because Spotify listed it first.
+    """
+    track_name = original_track.get('track_name', original_track.get('title', ''))
+    artist = original_track.get('artist', '')
+    settings = settings or get_app_config().pipeline
+    strategies = _strategy_queries(track_name, artist)
+    track_query = TrackQuery.from_track(original_track)
+    
+    # Tracks Spotify has already returned to us resolve locally, without a search
+    match = get_track_catalog().lookup(track_query, settings.catalog_min_score, market)
+    if match:
+        return match
+    
+    try:
+        if settings.race_search_strategies:
+            match = await _race_strategies(spotify_service, strategies, track_query, settings.match_min_score,
+                                          settings.strategy_race_delay, market)
+            if match:
+                return match
+        else:
+            for strategy, query, limit in strategies:
+                match = await _try_strategy(spotify_service, strategy, query, limit, track_query,
+                                            settings.match_min_score, market)
+                if match:
+                    _strategy_stats[strategy]["wins"] += 1
+                    return match
+        
+        # If all strategies fail
+        logger.warning(f"No Spotify results for track: {track_name} by {artist}")
+        return None
+        
+    except Exception as e:
+        logger.warning(f"Spotify search failed for '{track_name}' by '{artist}': {str(e)}")
+        return None
+
+def _group_tracks_with_alternatives(spotify_tracks: List[Dict], group_count: int = 10, alternatives: int = 4) -> List[Dict]:
+    """
+    Group Spotify tracks into group_count main tracks with up to `alternatives` alternatives each
+    Ensures no duplicate Spotify IDs across main tracks and alternatives
+    """
+    tracks_with_alternatives = []
+    used_spotify_ids = set()  # Track used Spotify IDs globally
+    
+    # Create a deduplicated list first
+    unique_tracks = []
+    for track in spotify_tracks:
+        spotify_id = track.get("spotify_id")
+        if spotify_id and spotify_id not in used_spotify_ids:
+            unique_tracks.append(track)
+            used_spotify_ids.add(spotify_id)
+    
+    logger.info(f"Deduplicated {len(spotify_tracks)} tracks to {len(unique_tracks)} unique tracks")
+    
+    # Now group the unique tracks
+    tracks_per_group = 1 + alternatives  # 1 main + alternatives
+    
+    for i in range(0, min(group_count * tracks_per_group, len(unique_tracks)), tracks_per_group):
+        group = unique_tracks[i:i + tracks_per_group]
+        
+        if not group:
+            break
+            
+        # First track is the main track
+        main_track = group[0]
+        group_alternatives = group[1:tracks_per_group]
+        
+        tracks_with_alternatives.append({
+            "title": main_track["title"],
+            "artist": main_track["artist"], 
+            "spotify_id": main_track["spotify_id"],
+            "album_art": main_track.get("album_art"),
+            "preview_url": main_track.get("preview_url"),
+            "alternatives": group_alternatives
+        })
+        
+        # Stop once we have enough groups
+        if len(tracks_with_alternatives) >= group_count:
+            break
+    
+    return tracks_with_alternatives
+
+# Counters for speculative fallback generation
+_speculation_stats = {"started": 0, "cancelled": 0, "used": 0, "unused": 0}
+
+def get_speculation_stats() -> Dict:
+    return dict(_speculation_stats)
+
+class _SpeculativeFallback:
+    """
+    Starts the additional-suggestions LLM call while Spotify searches are still
+    running, as soon as the observed hit rate projects fewer than min_required
+    tracks, and cancels it again if later results close the gap.
+    """
+
+    def __init__(self, openai_service, query: str, suggested_tracks: List[Dict], min_required: int,
+                 min_searched: int = 5):
+        self.openai_service = openai_service
+        self.query = query
+        self.suggested_tracks = suggested_tracks  # avoid-list; may still be growing when streaming
+        self.min_required = min_required
+        self.min_searched = min_searched  # don't trust the hit rate before this many results
+        self.task: Optional[asyncio.Task] = None
+
+    def update(self, found: int, searched: int, total: int) -> None:
+        if searched < self.min_searched or searched == 0:
+            return
+        remaining = max(total - searched, 0)
+        projected = found + (found / searched) * remaining
+
+        if projected < self.min_required and self.task is None:
+            needed = int(self.min_required - projected) + 5
+            logger.info(f"Projected {projected:.1f} tracks (< {self.min_required}) after {searched}/{total} searches, "
+                        f"starting speculative fallback for {needed} tracks")
+            self.task = asyncio.create_task(
+                self.openai_service._generate_additional_tracks(self.query, list(self.suggested_tracks), needed)
+            )
+            _speculation_stats["started"] += 1
+        elif projected >= self.min_required and self.task is not None and not self.task.done():
+            logger.info(f"Projected {projected:.1f} tracks, cancelling speculative fallback")
+            self.cancel()
+
+    def take(self) -> Optional[asyncio.Task]:
+        """Hand over the running/finished task to the fallback stage (None if there isn't one)"""
+        task, self.task = self.task, None
+        if task is not None:
+            _speculation_stats["used"] += 1
+        return task
+
+    def cancel(self) -> None:
+        if self.task is not None:
+            if not self.task.done():
+                self.task.cancel()
+                _speculation_stats["cancelled"] += 1
+            else:
+                _speculation_stats["unused"] += 1
+            self.task = None
+
+async def _ensure_minimum_tracks(openai_service, spotify_service, query: str, current_tracks: List[Dict], min_required: int,
+                                 additional_tracks_task: Optional[asyncio.Task] = None,
+                                 settings: Optional[PipelineConfig] = None, market: Optional[str] = None) -> List[Dict]:
+    """
+    Ensure we have at least the minimum required tracks, generating more if needed
+    Optimized to be more efficient and have better fallback strategies
+    """
+    if len(current_tracks) >= min_required:
+        if additional_tracks_task is not None:
+            additional_tracks_task.cancel()
+        return current_tracks
+    
+    logger.info(f"Need {min_required - len(current_tracks)} more tracks, generating fallback...")
+    
+    # Fallback searches yield to interactive calls in the shared Spotify scheduler
+    with request_priority(PRIORITY_SPECULATIVE):
+        try:
+            # Generate fewer additional tracks initially for faster response
+            needed = min_required - len(current_tracks) + 5  # Reduced extra generation
+        
+            # Use the speculative fallback if one was already started, otherwise ask now
+            if additional_tracks_task is not None:
+                additional_tracks = await additional_tracks_task
+            else:
+                additional_tracks = await openai_service._generate_additional_tracks(query, current_tracks, needed)
+        
+            if additional_tracks:
+                # Search only until the shortfall is covered by tracks we don't already have
+                existing_ids = {track.get("spotify_id") for track in current_tracks if track.get("spotify_id")}
+                new_spotify_tracks = await _search_tracks_windowed(
+                    spotify_service, additional_tracks, target_tracks=min_required - len(current_tracks),
+                    concurrency=settings.search_concurrency if settings else 10, exclude_ids=existing_ids, settings=settings,
+                    market=market
+                )
+                current_tracks.extend(new_spotify_tracks)
+    
+        except Exception as e:
+            logger.error(f"Fallback generation failed: {str(e)}")
+    
+        # If we still don't have enough, try popular tracks as last resort
+        if len(current_tracks) < min_required:
+            logger.warning("Using popular tracks as final fallback")
+            needed_popular = min(min_required - len(current_tracks), 10)  # Limit popular fallback
+            existing_ids = {track.get("spotify_id") for track in current_tracks if track.get("spotify_id")}
+            popular_tracks = await _get_popular_fallback_tracks(spotify_service, query, needed_popular, market=market,
+                                                                exclude_ids=existing_ids)
+            current_tracks.extend(popular_tracks)
+    
+    return current_tracks
+
+async def _get_popular_fallback_tracks(spotify_service, query: str, count: int, market: Optional[str] = None,
+                                       exclude_ids: Optional[set] = None) -> List[Dict]:
+    """
+    Get popular tracks as a fallback when all else fails.
+    Query-specific searches run concurrently; the generic ones come from the
+    precomputed fallback pool and are only searched here when the pool is empty.
+    All searches are limited to the pool's market, so what is stored there is playable there.
+    """
+    try:
+        pool = get_fallback_pool()
+        market = pool.market_for(market)
+        pooled = pool.get(market)
+        fallback_searches = [f"{query} popular", f"{query} hits"]
+        if not pooled:
+            fallback_searches += GENERIC_FALLBACK_SEARCHES
+        
+        results = await asyncio.gather(
+            *(spotify_service.search_track(search_term, limit=5, market=market) for search_term in fallback_searches),
+            return_exceptions=True
+        )
+        
+        fallback_tracks = []
+        generic_tracks = []
+        for search_term, result in zip(fallback_searches, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Fallback search failed for '{search_term}': {str(result)}")
+            elif search_term in GENERIC_FALLBACK_SEARCHES:
+                generic_tracks.extend(result)
+            else:
+                fallback_tracks.extend(result)
+        if not pooled:
+            pool.store(market, generic_tracks)
+        fallback_tracks.extend(pooled or generic_tracks)
+        
+        # Query-specific tracks first, without repeats or tracks we already have
+        exclude_ids = set(exclude_ids or ())
+        unique_tracks = []
+        for track in fallback_tracks:
+            if track.get("spotify_id") and track["spotify_id"] not in exclude_ids:
+                exclude_ids.add(track["spotify_id"])
+                unique_tracks.append(track)
+        return unique_tracks[:count]
+    
+    except Exception as e:
+        logger.error(f"Popular fallback failed: {str(e)}")
+        return []
+
+def _pad_track_groups(current_groups: List[Dict], all_tracks: List[Dict], group_count: int = 10, alternatives: int = 4) -> List[Dict]:
+    """
+    Pad track groups to ensure we have exactly group_count groups
+    """
+    padded_groups = current_groups.copy()
+    used_track_ids = set()
+    
+    # Collect all already used track IDs
+    for group in current_groups:
+        used_track_ids.add(group["spotify_id"])
+        for alt in group.get("alternatives", []):
+            used_track_ids.add(alt.get("spotify_id"))
+    
+    # Find unused tracks
+    unused_tracks = [track for track in all_tracks if track.get("spotify_id") not in used_track_ids]
+    
+    # Create additional groups from unused tracks
+    while len(padded_groups) < group_count and unused_tracks:
+        main_track = unused_tracks.pop(0)
+        group_alternatives = unused_tracks[:alternatives]
+        unused_tracks = unused_tracks[alternatives:]
+        
+        padded_groups.append({
+            "title": main_track["title"],
+            "artist": main_track["artist"],
+            "spotify_id": main_track["spotify_id"],
+            "album_art": main_track.get("album_art"),
+            "preview_url": main_track.get("preview_url"),
+            "alternatives": group_alternatives
+        })
+    
+    # If we still don't have enough groups, we'll just return what we have
+    # Rather than create duplicates which break React key uniqueness
+    logger.warning(f"Could only create {len(padded_groups)} unique groups instead of {group_count}")
+    
+    # Don't create duplicates - this was causing React key conflicts
+    
+    return padded_groups  # Return unique groups only
+
+# Per-stage timings across pipeline runs
+_pipeline_stats = {"runs": 0, "completed": 0, "failed": 0, "duplicate_suggestions": 0, "stage_seconds": {}}
+
+def get_pipeline_stats() -> Dict:
+    """Run counts plus average seconds spent in each stage"""
+    completed = _pipeline_stats["completed"]
+    return {
+        "runs": _pipeline_stats["runs"],
+        "completed": completed,
+        "failed": _pipeline_stats["failed"],
+        "duplicate_suggestions_skipped": _pipeline_stats["duplicate_suggestions"],
+        "avg_stage_seconds": {
+            stage: round(total / completed, 3) if completed else 0.0
+            for stage, total in _pipeline_stats["stage_seconds"].items()
+        },
+        "speculative_fallback": get_speculation_stats(),
+        "search_strategies": get_search_strategy_stats()
+    }
+
+class PlaylistPipeline:
+    """
+    The playlist generation flow shared by both generate endpoints:
+
+        suggest -> search -> ensure minimum -> group/pad, with the title generated alongside
+
+    The suggest stage streams LLM suggestions into a bounded queue; a pool of
+    search workers (search_concurrency) resolves them on Spotify and pushes
+    results into a second bounded queue that the pipeline consumes, deduping by
+    Spotify ID and stopping at the target track count. Bounded queues give
+    backpressure: a slow consumer slows the workers rather than buffering
+    without limit.
+
+    events() yields progress events as dicts with a "type" ("status",
+    "suggestions_complete", "track_found", "search_complete", "complete");
+    run() drains them and returns the final playlist. Every event is also passed
+    to progress_hook, if given.
+    """
+
+    def __init__(self, openai_service, spotify_service: SpotifyService, query: str, use_cache: bool = True,
+                 settings: Optional[PipelineConfig] = None,
+                 progress_hook: Optional[Callable[[Dict], None]] = None, market: Optional[str] = None):
+        self.openai_service = openai_service
+        self.spotify_service = spotify_service
+        self.query = query
+        self.use_cache = use_cache
+        self.market = market  # Spotify market for searches and the fallback pool (None = unrestricted / the pool's default)
+        self.config = get_app_config()
+        self.settings = settings or self.config.pipeline
+        self.progress_hook = progress_hook
+        self.suggested_tracks: List[Dict] = []
+        self.spotify_tracks: List[Dict] = []
+        self.stage_seconds: Dict[str, float] = {}
+
+    def _emit(self, event: Dict) -> Dict:
+        if self.progress_hook:
+            self.progress_hook(event)
+        return event
+
+    def _timed(self, stage: str, start: float) -> None:
+        self.stage_seconds[stage] = time.monotonic() - start
+
+    async def run(self) -> Dict:
+        """Drain the pipeline and return {"playlist_name", "tracks"}"""
+        playlist = None
+        async for event in self.events():
+            if event["type"] == "complete":
+                playlist = event["playlist"]
+        return playlist
+
+    async def events(self) -> AsyncGenerator[Dict, None]:
+        group_count = self.config.songs_to_return
+        alternatives = self.config.alternatives_per_track
+        _pipeline_stats["runs"] += 1
+        started = time.monotonic()
+
+        # The title only depends on the query, so generate it alongside the tracks
+        title_task = asyncio.create_task(self.openai_service.generate_playlist_title(self.query))
+        speculative = _SpeculativeFallback(self.openai_service, self.query, self.suggested_tracks, min_required=group_count)
+        completed = False
+        try:
+            yield self._emit({"type": "status", "message": "Generating track suggestions..."})
+
+            # Suggest + search run concurrently
+            stage_start = time.monotonic()
+            async for event in self._suggest_and_search(speculative):
+                yield self._emit(event)
+            self._timed("suggest_and_search", stage_start)
+            yield self._emit({"type": "search_complete", "count": len(self.spotify_tracks)})
+
+            # Ensure we have enough tracks, with fallback generation if needed
+            stage_start = time.monotonic()
+            if len(self.spotify_tracks) >= group_count:
+                speculative.cancel()
+            self.spotify_tracks = await _ensure_minimum_tracks(
+                self.openai_service, self.spotify_service, self.query, self.spotify_tracks, min_required=group_count,
+                additional_tracks_task=speculative.take(), settings=self.settings, market=self.market
+            )
+            self._timed("ensure_minimum", stage_start)
+            logger.info(f"Final track count after fallbacks: {len(self.spotify_tracks)}")
+
+            # Group tracks into main tracks + alternatives, padding if we came up short
+            stage_start = time.monotonic()
+            tracks_with_alternatives = _group_tracks_with_alternatives(self.spotify_tracks, group_count, alternatives)
+            if len(tracks_with_alternatives) < group_count:
+                logger.warning(f"Only created {len(tracks_with_alternatives)} groups, padding to {group_count}")
+                tracks_with_alternatives = _pad_track_groups(tracks_with_alternatives, self.spotify_tracks, group_count, alternatives)
+            self._timed("group", stage_start)
+
+            # Collect the title generated in parallel
+            stage_start = time.monotonic()
+            if not title_task.done():
+                yield self._emit({"type": "status", "message": "Creating playlist title..."})
+            playlist_name = await title_task
+            self._timed("title_wait", stage_start)
+            self._timed("total", started)
+
+            completed = True
+            _pipeline_stats["completed"] += 1
+            for stage, seconds in self.stage_seconds.items():
+                _pipeline_stats["stage_seconds"][stage] = _pipeline_stats["stage_seconds"].get(stage, 0.0) + seconds
+
+            yield self._emit({
+                "type": "complete",
+                "playlist": {"playlist_name": playlist_name, "tracks": tracks_with_alternatives}
+            })
+        finally:
+            if not completed:
+                _pipeline_stats["failed"] += 1
+            # Don't leave the title call running if generation failed or the client went away
+            if not title_task.done():
+                title_task.cancel()
+            speculative.cancel()
+
+    async def _suggest_and_search(self, speculative: _SpeculativeFallback) -> AsyncGenerator[Dict, None]:
+        """
+        Suggest and search stages. Yields "suggestions_complete" once the LLM is done
+        and "track_found" for each new unique Spotify match. At the target track
+        count the stage ends immediately: in-flight searches and the rest of the
+        LLM stream are cancelled.
+        """
+        settings = self.settings
+        worker_count = settings.search_concurrency
+        target_tracks = self.config.target_tracks
+        suggestions: asyncio.Queue = asyncio.Queue(maxsize=settings.suggestion_queue_size)
+        results: asyncio.Queue = asyncio.Queue(maxsize=settings.event_queue_size)
+        seen_track_ids = set()
+        seen_keys = set()
+
+        async def enqueue(track: Dict) -> None:
+            # Variants of a suggestion already queued would only resolve to the same Spotify ID
+            key = _suggestion_key(track)
+            if key in seen_keys:
+                _pipeline_stats["duplicate_suggestions"] += 1
+                return
+            seen_keys.add(key)
+            self.suggested_tracks.append(track)
+            await suggestions.put(track)
+
+        async def suggest():
+            try:
+                if settings.stream_suggestions:
+                    # Closed as soon as this task is cancelled (not whenever it's garbage collected),
+                    # so the stream stores what it generated before the target was reached
+                    stream = self.openai_service.stream_track_suggestions(self.query, use_cache=self.use_cache)
+                    async with aclosing(stream):
+                        async for track in stream:
+                            await enqueue(track)
+                else:
+                    for track in await self.openai_service.generate_track_suggestions(self.query, use_cache=self.use_cache):
+                        await enqueue(track)
+                await results.put(("suggestions_complete", len(self.suggested_tracks)))
+                for _ in range(worker_count):
+                    await suggestions.put(None)
+            except Exception as e:
+                await results.put(("error", e))
+
+        async def search_worker():
+            try:
+                while True:
+                    track = await suggestions.get()
+                    if track is None:
+                        break
+                    result = await _search_single_track(self.spotify_service, "", track, settings, self.market)
+                    await results.put(("result", result))
+            except Exception as e:
+                await results.put(("error", e))
+            # Posted after a failure too, so the consumer never waits on a dead worker
+            # (not after cancellation: by then nothing reads the queue)
+            await results.put(("worker_done", None))
+
+        producer = asyncio.create_task(suggest())
+        workers = [asyncio.create_task(search_worker()) for _ in range(worker_count)]
+        workers_done = 0
+        searched = 0
+        suggestion_total = 0
+        suggestions_done = False
+
+        try:
+            while workers_done < worker_count:
+                kind, payload = await results.get()
+
+                if kind == "error":
+                    raise payload
+                elif kind == "suggestions_complete":
+                    suggestions_done = True
+                    suggestion_total = payload
+                    logger.info(f"Got {payload} suggestions from OpenAI")
+                    yield {"type": "suggestions_complete", "count": payload}
+                elif kind == "worker_done":
+                    workers_done += 1
+                elif kind == "result":
+                    searched += 1
+                    spotify_id = payload.get("spotify_id") if payload else None
+                    if spotify_id and spotify_id not in seen_track_ids:
+                        seen_track_ids.add(spotify_id)
+                        self.spotify_tracks.append(payload)
+                        yield {"type": "track_found", "track": payload, "count": len(self.spotify_tracks)}
+                    # Enough unique tracks: stop here, the finally block cancels in-flight searches
+                    if len(seen_track_ids) >= target_tracks:
+                        logger.info(f"Reached {target_tracks} unique tracks, cancelling remaining searches")
+                        speculative.cancel()
+                        break
+                    # The hit rate only means something once the total is known
+                    if suggestions_done:
+                        speculative.update(len(seen_track_ids), searched, suggestion_total)
+
+            logger.info(f"Search: {len(self.spotify_tracks)} unique tracks found from {searched} searched")
+            get_suggestion_sizer().record_matches(self.query, searched, len(self.spotify_tracks))
+        finally:
+            producer.cancel()
+            for worker in workers:
+                worker.cancel()
@@ -0,0 +1,189 @@
+import asyncio
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from app.services.app_config import get_app_config
+
+logger = logging.getLogger(__name__)
+
+CONFIG_DIR = Path(__file__).parent.parent.parent / ".config"
+PROMPT_FILES = ("system_prompt.json", "user_prompt.json")
+
+class TrackGenerationPrompt(NamedTuple):
+    system_content: str  # identical for every count and query, so providers can cache it as a prefix
+    user_template: str   # still needs .format(prompt=query)
+
+class TitlePrompt(NamedTuple):
+    system_content: str
+    user_template: str  # still needs .format(query=query)
+
+class PromptRegistry:
+    """
+    Process-wide store of the prompt templates in .config/.
+
+    Templates are loaded and validated once; derived prompts (e.g. the track
+    generation system message for a given track count) are assembled on first use
+    and memoized, so the request path does no file I/O or string assembly.
+    reload_if_changed() picks up edited files by mtime; an invalid edit is
+    logged and the previous prompts stay active.
+    """
+
+    def __init__(self, config_dir: Path = CONFIG_DIR):
+        self.config_dir = Path(config_dir)
+        self.system_prompts: dict = {}
+        self.user_prompts: dict = {}
+        self._mtimes: Dict[str, int] = {}
+        self._track_prompts: Dict[int, TrackGenerationPrompt] = {}
+        self._track_system_content: Optional[str] = None
+        self._title_prompt: Optional[TitlePrompt] = None
+        self.version = 0
+        self.load()
+
+    def _read(self, filename: str) -> Tuple[dict, int]:
+        """Load configuration from JSON file"""
+        config_path = self.config_dir / filename
+        try:
+            mtime = config_path.stat().st_mtime_ns
+            with open(config_path, 'r') as f:
+                return json.load(f), mtime
+        except Exception as e:
+            logger.error(f"Failed to load config {filename}: {str(e)}")
+            raise ValueError(f"Failed to load configuration file: {filename}")
+
+    @staticmethod
+    def validate(system_prompts: dict, user_prompts: dict) -> None:
+        """Raise ValueError if a template is missing or can't be rendered"""
+        try:
+            track = system_prompts["track_generation"]
+            for field in ("role", "objective", "system_message"):
+                if not isinstance(track[field], str):
+                    raise ValueError(f"track_generation.{field} must be a string")
+            for field in ("core_directive", "factuality", "recording_type", "playlist_diversity"):
+                track["rules"][field]
+            track["objective"].format(prompt="validation", count=35)
+
+            if not isinstance(system_prompts["playlist_title"]["system_message"], str):
+                raise ValueError("playlist_title.system_message must be a string")
+            user_prompts["playlist_title"].format(query="validation")
+        except KeyError as e:
+            raise ValueError(f"Prompt config is missing required key {e}")
+        except (IndexError, AttributeError) as e:
+            raise ValueError(f"Prompt template is malformed: {str(e)}")
+
+    def load(self) -> None:
+        """(Re)load and validate both prompt files, then drop memoized prompts"""
+        system_prompts, system_mtime = self._read(PROMPT_FILES[0])
+        user_prompts, user_mtime = self._read(PROMPT_FILES[1])
+        self.validate(system_prompts, user_prompts)
+
+        self.system_prompts = system_prompts
+        self.user_prompts = user_prompts
+        self._mtimes = {PROMPT_FILES[0]: system_mtime, PROMPT_FILES[1]: user_mtime}
+        self._track_prompts = {}
+        self._track_system_content = None
+        self._title_prompt = None
+        self.version += 1
+        logger.info(f"Loaded prompt templates (version {self.version})")
+
+    def reload_if_changed(self) -> bool:
+        """Reload if either file's mtime changed. Returns True if new prompts were loaded."""
+        try:
+            changed = any(
+                (self.config_dir / filename).stat().st_mtime_ns != self._mtimes.get(filename)
+                for filename in PROMPT_FILES
+            )
+        except OSError as e:
+            logger.error(f"Failed to check prompt files: {str(e)}")
+            return False
+        if not changed:
+            return False
+
+        try:
+            self.load()
+            return True
+        except ValueError as e:
+            logger.error(f"Keeping previous prompts, reload failed: {str(e)}")
+            return False
+
+    def track_system_content(self) -> str:
+        """
+        Static system message shared by bulk and additional track generation.
+        Nothing request-specific goes in here, so it stays a byte-identical prefix.
+        """
+        if self._track_system_content is not None:
+            return self._track_system_content
+
+        track = self.system_prompts["track_generation"]
+        rules = track["rules"]
+        # Combine role and rules into system message for better context
+        self._track_system_content = f"""{track["role"]}
+
+{rules["core_directive"]}
+
+Rules:
+- {' '.join(rules["factuality"])}
+- {' '.join(rules["recording_type"])}
+- {' '.join(rules["playlist_diversity"])}
+
+{track["system_message"]}"""
+        return self._track_system_content
+
+    def track_generation(self, count: int) -> TrackGenerationPrompt:
+        """Track generation prompt for a given track count (memoized per count)"""
+        prompt = self._track_prompts.get(count)
+        if prompt is not None:
+            return prompt
+
+        # Count and query only appear at the end of the user message
+        user_template = self.system_prompts["track_generation"]["objective"].replace("{count}", str(count))
+
+        prompt = self._track_prompts[count] = TrackGenerationPrompt(self.track_system_content(), user_template)
+        return prompt
+
+    def playlist_title(self) -> TitlePrompt:
+        if self._title_prompt is None:
+            self._title_prompt = TitlePrompt(
+                self.system_prompts["playlist_title"]["system_message"],
+                self.user_prompts["playlist_title"]
+            )
+        return self._title_prompt
+
+_registry: Optional[PromptRegistry] = None
+_watch_task: Optional[asyncio.Task] = None
+
+def get_prompt_registry() -> PromptRegistry:
+    global _registry
+    if _registry is None:
+        _registry = PromptRegistry()
+    return _registry
+
+async def _watch(interval: float) -> None:
+    registry = get_prompt_registry()
+    config = get_app_config()
+    while True:
+        await asyncio.sleep(interval)
+        registry.reload_if_changed()
+        config.reload_if_changed()
+
+def start_prompt_watcher() -> PromptRegistry:
+    """Load and validate prompts and config.json now (failing startup if invalid), then poll for edits"""
+    global _watch_task
+    registry = get_prompt_registry()
+    get_app_config()
+    interval = float(os.getenv("PROMPT_RELOAD_INTERVAL", "5"))
+    if interval > 0 and (_watch_task is None or _watch_task.done()):
+        _watch_task = asyncio.create_task(_watch(interval))
+    return registry
+
+async def stop_prompt_watcher() -> None:
+    global _watch_task
+    if _watch_task is not None:
+        _watch_task.cancel()
+        try:
+            await _watch_task
+        except asyncio.CancelledError:
+            pass
+    _watch_task = None
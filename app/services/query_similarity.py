@@ -0,0 +1,240 @@
+import logging
+import math
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+from app.services.persistence import JSONPersistence, PeriodicPersister
+from app.services.suggestion_cache import normalize_query
+from app.services.track_matching import track_key
+
+logger = logging.getLogger(__name__)
+
+# Words that appear in most queries without saying anything about the music wanted
+QUERY_STOPWORDS = frozenset({
+    "a", "an", "the", "and", "or", "of", "for", "to", "in", "on", "at", "with", "by", "from", "my", "me", "i",
+    "some", "songs", "song", "music", "tracks", "track", "playlist", "mix", "tunes", "vibes", "like", "that", "is"
+})
+
+def query_terms(query: str) -> List[str]:
+    """Content words of a query with a light plural strip ("afternoons" -> "afternoon")"""
+    terms = []
+    for word in normalize_query(query).split():
+        if word in QUERY_STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+class SimilarQuery(NamedTuple):
+    query: str
+    similarity: float
+    tracks: List[Dict]
+
+class _Entry:
+    __slots__ = ("query", "terms", "tracks", "expires_at")
+
+    def __init__(self, query: str, terms: Dict[str, int], tracks: List[Dict], expires_at: float):
+        self.query = query
+        self.terms = terms  # term -> count
+        self.tracks = tracks
+        self.expires_at = expires_at
+
+class QueryIndex(JSONPersistence):
+    """
+    Bounded TF-IDF index of past queries and the suggestion lists generated for
+    them, so a rewording ("jazz for a dinner party" after "dinner party jazz",
+    "hip hop workout" after "upbeat workout hip hop") can reuse those
+    suggestions instead of another LLM call. Similarity is lexical: word order,
+    filler words and plurals don't matter, synonyms do.
+
+    Vectors are sparse dicts behind an inverted index, so a lookup only scores
+    entries sharing a term with the query; IDF is kept up to date as entries
+    come and go. Entries at or above `threshold` cosine similarity are reused:
+    the best one alone, or several interleaved (deduped by track key) when more
+    than one qualifies. Oldest entries are evicted past `max_entries`.
+    """
+
+    label = "query index"
+
+    def __init__(self, threshold: float = 0.8, max_entries: int = 5000, ttl: float = 86400,
+                 max_blend: int = 3, path: Optional[str] = None, enabled: bool = False):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_blend = max_blend
+        self.path = Path(path) if path else None
+        self.enabled = enabled
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._postings: Dict[str, set] = {}
+        self._dirty = False
+        self.hits = 0
+        self.blended_hits = 0
+        self.misses = 0
+        self.hit_similarity = 0.0
+        self.lookup_seconds = 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _idf(self, term: str) -> float:
+        # Smoothed so a term shared by every entry still counts a little
+        return math.log((1 + len(self._entries)) / (1 + len(self._postings.get(term, ())))) + 1.0
+
+    def _vector(self, terms: Dict[str, int]) -> Dict[str, float]:
+        vector = {term: count * self._idf(term) for term, count in terms.items()}
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        return {term: weight / norm for term, weight in vector.items()} if norm else {}
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        for term in entry.terms:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.discard(key)
+                if not postings:
+                    del self._postings[term]
+
+    def add(self, query: str, tracks: List[Dict], expires_at: Optional[float] = None) -> None:
+        if not self.enabled or not tracks:
+            return
+        terms: Dict[str, int] = {}
+        for term in query_terms(query):
+            terms[term] = terms.get(term, 0) + 1
+        if not terms:
+            return
+        key = normalize_query(query)
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = _Entry(query, terms, [dict(track) for track in tracks],
+                                    expires_at if expires_at is not None else time.time() + self.ttl)
+        for term in terms:
+            self._postings.setdefault(term, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+        self._dirty = True
+
+    def _neighbours(self, query: str) -> List[SimilarQuery]:
+        terms: Dict[str, int] = {}
+        for term in query_terms(query):
+            terms[term] = terms.get(term, 0) + 1
+        candidates = set()
+        for term in terms:
+            candidates |= self._postings.get(term, set())
+        if not candidates:
+            return []
+
+        now = time.time()
+        query_vector = self._vector(terms)
+        neighbours = []
+        for key in candidates:
+            entry = self._entries[key]
+            if entry.expires_at <= now:
+                self._remove(key)
+                continue
+            entry_vector = self._vector(entry.terms)
+            similarity = sum(weight * entry_vector.get(term, 0.0) for term, weight in query_vector.items())
+            if similarity >= self.threshold:
+                neighbours.append(SimilarQuery(entry.query, similarity, entry.tracks))
+        neighbours.sort(key=lambda neighbour: -neighbour.similarity)
+        return neighbours[:self.max_blend]
+
+    def lookup(self, query: str, count: int) -> Optional[SimilarQuery]:
+        """
+        Suggestions for a near-duplicate of `query`, or None. Several qualifying
+        neighbours are interleaved; the result is None unless it reaches `count`.
+        """
+        if not self.enabled or not self._entries:
+            return None
+        started = time.perf_counter()
+        neighbours = self._neighbours(query)
+
+        tracks: List[Dict] = []
+        seen_keys = set()
+        for position in range(max((len(neighbour.tracks) for neighbour in neighbours), default=0)):
+            for neighbour in neighbours:
+                if position < len(neighbour.tracks):
+                    track = neighbour.tracks[position]
+                    key = track_key(track.get("track_name", track.get("title", "")), track.get("artist", ""))
+                    if key not in seen_keys:
+                        seen_keys.add(key)
+                        tracks.append(dict(track))
+            if len(tracks) >= count:
+                break
+        self.lookup_seconds += time.perf_counter() - started
+
+        if len(tracks) < count:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.hit_similarity += neighbours[0].similarity
+        if len(neighbours) > 1:
+            self.blended_hits += 1
+        # Refresh recency so reused entries survive eviction
+        self._entries.move_to_end(normalize_query(neighbours[0].query))
+        logger.info(f"Reusing suggestions for '{query}' from '{neighbours[0].query}' "
+                    f"(similarity {neighbours[0].similarity:.2f}, {len(neighbours)} source(s))")
+        return SimilarQuery(neighbours[0].query, neighbours[0].similarity, tracks[:count])
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "persistent": self.path is not None,
+            "entries": len(self._entries),
+            "terms": len(self._postings),
+            "threshold": self.threshold,
+            "lookups": lookups,
+            "hits": self.hits,
+            "blended_hits": self.blended_hits,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "avg_hit_similarity": round(self.hit_similarity / self.hits, 3) if self.hits else 0.0,
+            "avg_lookup_ms": round(self.lookup_seconds / lookups * 1000, 3) if lookups else 0.0
+        }
+
+    def _snapshot(self) -> List[Dict]:
+        now = time.time()
+        return [
+            {"query": entry.query, "tracks": entry.tracks, "expires_at": entry.expires_at}
+            for entry in self._entries.values() if entry.expires_at > now
+        ]
+
+    def _restore(self, entry: Dict) -> bool:
+        # Entries are written oldest first, so re-adding them in order restores recency
+        self.add(entry["query"], entry["tracks"], expires_at=entry["expires_at"])
+        return normalize_query(entry["query"]) in self._entries
+
+_query_index: Optional[QueryIndex] = None
+_persister: Optional[PeriodicPersister] = None
+
+def get_query_index() -> QueryIndex:
+    global _query_index
+    if _query_index is None:
+        _query_index = QueryIndex(
+            threshold=float(os.getenv("QUERY_REUSE_THRESHOLD", "0.8")),
+            max_entries=int(os.getenv("QUERY_REUSE_MAX_ENTRIES", "5000")),
+            ttl=float(os.getenv("QUERY_REUSE_TTL", str(24 * 3600))),
+            max_blend=int(os.getenv("QUERY_REUSE_MAX_BLEND", "3")),
+            path=os.getenv("QUERY_REUSE_PATH") or None,
+            enabled=os.getenv("QUERY_REUSE_ENABLED", "False").lower() == "true"
+        )
+    return _query_index
+
+async def start_query_index() -> None:
+    """Load persisted entries and start periodic persistence (called from the lifespan)"""
+    global _persister
+    index = get_query_index()
+    if not index.enabled or not index.path:
+        return
+    _persister = PeriodicPersister(index)
+    _persister.start(float(os.getenv("QUERY_REUSE_PERSIST_INTERVAL", "300")))
+
+async def stop_query_index() -> None:
+    """Stop periodic persistence and flush the index to disk"""
+    global _persister
+    if _persister is not None:
+        await _persister.stop()
+        _persister = None
@@ -0,0 +1,210 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Lower value = served first
+PRIORITY_INTERACTIVE = 0  # user is waiting on this exact call (create playlist, profile)
+PRIORITY_NORMAL = 1       # main search fan-out for a generation
+PRIORITY_SPECULATIVE = 2  # fallback / alternative searches we may not need
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_NORMAL: "normal",
+    PRIORITY_SPECULATIVE: "speculative"
+}
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+_current_priority: ContextVar[int] = ContextVar("spotify_request_priority", default=PRIORITY_NORMAL)
+
+@contextmanager
+def request_priority(priority: int):
+    """
+    Run the enclosed calls (and any tasks spawned from them) at the given priority,
+    e.g. `with request_priority(PRIORITY_SPECULATIVE): await fallback_search()`
+    """
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+def current_priority() -> int:
+    return _current_priority.get()
+
+class RateLimitScheduler:
+    """
+    Process-wide token bucket in front of an upstream API.
+
+    Callers queue for a token by priority (FIFO within a priority). A 429 pauses
+    the whole bucket for the Retry-After interval, so every in-flight request backs
+    off together instead of each one burning its own retries. 429s, 5xx responses
+    and transport errors are retried with jittered exponential backoff.
+
+    Non-idempotent requests (POSTs that create or append) are only retried on a
+    429 with Retry-After, which Spotify sends for requests it did not process;
+    after a 5xx or transport error the request may have gone through upstream.
+    """
+
+    def __init__(self, rate: float, burst: int, max_retries: int = 3,
+                 base_backoff: float = 0.5, max_backoff: float = 8.0, max_retry_after: float = 30.0):
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.max_retry_after = max_retry_after
+
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        self._queue: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._dispatcher: Optional[asyncio.Task] = None
+
+        self.dispatched = 0
+        self.retries = 0
+        self.throttled = 0
+        self.failures = 0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    async def _dispatch(self) -> None:
+        while self._queue:
+            now = time.monotonic()
+            if now < self._paused_until:
+                await asyncio.sleep(self._paused_until - now)
+                continue
+
+            self._refill(now)
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                continue
+
+            _, _, future = heapq.heappop(self._queue)
+            if future.done():  # caller was cancelled while queued
+                continue
+            self._tokens -= 1
+            self.dispatched += 1
+            future.set_result(None)
+
+    async def acquire(self, priority: Optional[int] = None) -> None:
+        """Wait for a token. Higher-priority waiters are served first."""
+        if priority is None:
+            priority = current_priority()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._seq), future))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        await future
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: uniform in [0, min(max, base * 2^attempt)]
+        return random.uniform(0, min(self.max_backoff, self.base_backoff * (2 ** attempt)))
+
+    def _retry_after(self, response: httpx.Response) -> Optional[float]:
+        value = response.headers.get("Retry-After")
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return None
+
+    async def request(self, send: Callable[[], Awaitable[httpx.Response]],
+                      priority: Optional[int] = None, idempotent: bool = True) -> httpx.Response:
+        """
+        Send a request through the bucket, retrying throttled and transient failures.
+        Returns the last response; callers still call raise_for_status() on it.
+        """
+        if priority is None:
+            priority = current_priority()
+
+        attempt = 0
+        while True:
+            await self.acquire(priority)
+            try:
+                response = await send()
+            except httpx.TransportError as e:
+                if not idempotent or attempt >= self.max_retries:
+                    self.failures += 1
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(f"Transport error ({str(e)}), retrying in {delay:.2f}s")
+            else:
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    return response
+                retry_after = self._retry_after(response) if response.status_code == 429 else None
+                if attempt >= self.max_retries or (not idempotent and retry_after is None):
+                    self.failures += 1
+                    return response
+
+                delay = self._backoff(attempt)
+                if response.status_code == 429:
+                    self.throttled += 1
+                    if retry_after is not None:
+                        if retry_after > self.max_retry_after:
+                            logger.error(f"Rate limited with Retry-After={retry_after}s, not retrying")
+                            self.failures += 1
+                            return response
+                        # Pause the whole bucket; everyone waits out the same window
+                        self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+                        delay = 0.0
+                    logger.warning(f"Rate limited by upstream (Retry-After={retry_after}), attempt {attempt + 1}")
+                else:
+                    logger.warning(f"Upstream returned {response.status_code}, retrying in {delay:.2f}s")
+
+            attempt += 1
+            self.retries += 1
+            if delay:
+                await asyncio.sleep(delay)
+
+    def queue_depth(self) -> Dict[str, int]:
+        depth = {name: 0 for name in PRIORITY_NAMES.values()}
+        for priority, _, future in self._queue:
+            if not future.done():
+                name = PRIORITY_NAMES.get(priority, str(priority))
+                depth[name] = depth.get(name, 0) + 1
+        depth["total"] = sum(depth.values())
+        return depth
+
+    def stats(self) -> Dict:
+        self._refill(time.monotonic())
+        return {
+            "rate_per_second": self.rate,
+            "burst": self.burst,
+            "tokens_available": round(self._tokens, 2),
+            "paused_for": round(max(0.0, self._paused_until - time.monotonic()), 2),
+            "queue_depth": self.queue_depth(),
+            "dispatched": self.dispatched,
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "failures": self.failures
+        }
+
+_spotify_scheduler: Optional[RateLimitScheduler] = None
+
+def get_spotify_scheduler() -> RateLimitScheduler:
+    """Return the process-wide scheduler shared by every SpotifyService instance"""
+    global _spotify_scheduler
+    if _spotify_scheduler is None:
+        _spotify_scheduler = RateLimitScheduler(
+            rate=float(os.getenv("SPOTIFY_RATE_LIMIT_PER_SECOND", "25")),
+            burst=int(os.getenv("SPOTIFY_RATE_LIMIT_BURST", "30")),
+            max_retries=int(os.getenv("SPOTIFY_MAX_RETRIES", "3")),
+            max_retry_after=float(os.getenv("SPOTIFY_MAX_RETRY_AFTER", "30"))
+        )
+    return _spotify_scheduler
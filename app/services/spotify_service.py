@@ -1,58 +1,128 @@
 
+import asyncio
 import httpx
 from typing import List, Dict, Optional
 import logging
 import hashlib
-import time
+import os
 from functools import wraps
 
+from app.services.http_client import get_http_client, SPOTIFY_API_BASE_URL
+from app.services.cache import TTLCache, MISSING
+from app.services.singleflight import SingleFlight
+from app.services.track_catalog import get_track_catalog
+from app.services.rate_limiter import get_spotify_scheduler, PRIORITY_INTERACTIVE
+
 logger = logging.getLogger(__name__)
 
-# Simple in-memory cache for Spotify API responses
-_spotify_cache = {}
+# Bounded LRU+TTL cache for Spotify API responses, namespaced per function
+_spotify_cache = TTLCache(
+    max_entries=int(os.getenv("SPOTIFY_CACHE_MAX_ENTRIES", "5000")),
+    max_bytes=int(os.getenv("SPOTIFY_CACHE_MAX_BYTES", str(50 * 1024 * 1024))),
+    sweep_interval=float(os.getenv("SPOTIFY_CACHE_SWEEP_INTERVAL", "60"))
+)
 CACHE_TTL = 300  # 5 minutes
 
-def cache_response(ttl=CACHE_TTL):
-    """Decorator to cache Spotify API responses"""
+# Track metadata is cached per ID rather than per request
+TRACK_DETAILS_NAMESPACE = "track_details"
+TRACK_DETAILS_TTL = 3600  # 1 hour
+
+# Deduplicates identical lookups that are in flight at the same time
+_spotify_inflight = SingleFlight()
+
+def _token_fingerprint(access_token: str) -> str:
+    return hashlib.sha256(access_token.encode()).hexdigest()[:16]
+
+def _is_auth_failure(error: BaseException) -> bool:
+    """True if Spotify rejected the token behind this error (a 401/403, possibly wrapped)"""
+    while error is not None:
+        if isinstance(error, httpx.HTTPStatusError) and error.response.status_code in (401, 403):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+def cache_response(ttl=CACHE_TTL, per_user: bool = False):
+    """
+    Decorator to cache Spotify API responses.
+    Only successful results are cached, and they are shared between users unless
+    per_user is set (for anything user-scoped). Concurrent identical calls are
+    coalesced across users too; if the call fails because the leader's token was
+    rejected (401/403), the other callers retry with their own token, so one
+    user's expired token is never handed to another user.
+    """
     def decorator(func):
         @wraps(func)
         async def wrapper(*args, **kwargs):
-            # Create cache key from function name and arguments
+            token = _token_fingerprint(args[0].access_token)
+            # Create cache key from arguments; the function name is the namespace
             cache_key = hashlib.md5(
-                f"{func.__name__}:{str(args[1:])}:{str(kwargs)}".encode()
+                f"{str(args[1:])}:{str(kwargs)}{':' + token if per_user else ''}".encode()
             ).hexdigest()
             
             # Check if cached response exists and is still valid
-            if cache_key in _spotify_cache:
-                cached_data, timestamp = _spotify_cache[cache_key]
-                if time.time() - timestamp < ttl:
-                    logger.debug(f"Cache hit for {func.__name__}")
-                    return cached_data
+            cached_data = _spotify_cache.get(func.__name__, cache_key, MISSING)
+            if cached_data is not MISSING:
+                logger.debug(f"Cache hit for {func.__name__}")
+                return cached_data
             
-            # Call the actual function
-            result = await func(*args, **kwargs)
-            
-            # Cache the result
-            _spotify_cache[cache_key] = (result, time.time())
-            logger.debug(f"Cached result for {func.__name__}")
+            ran = False
+
+            async def fetch():
+                nonlocal ran
+                ran = True
+                # Call the actual function
+                result = await func(*args, **kwargs)
+                
+                # Cache the result
+                _spotify_cache.set(func.__name__, cache_key, result, ttl=ttl)
+                logger.debug(f"Cached result for {func.__name__}")
+                return result
             
-            return result
+            # Concurrent identical calls share one request (per_user keys already differ per token)
+            try:
+                return await _spotify_inflight.do((func.__name__, cache_key), fetch)
+            except Exception as e:
+                if ran or not _is_auth_failure(e):
+                    raise
+            # Another caller's token was rejected; this caller's own token gets its own try
+            logger.debug(f"Retrying {func.__name__} with the caller's token after a shared call was rejected")
+            return await _spotify_inflight.do((func.__name__, cache_key, token), fetch)
         return wrapper
     return decorator
 
+def get_cache_stats() -> Dict:
+    """Hit/miss/eviction counters for the Spotify response cache"""
+    stats = _spotify_cache.stats()
+    stats["inflight"] = _spotify_inflight.stats()
+    return stats
+
 class SpotifyService:
     def __init__(self, access_token: str):
         self.access_token = access_token
-        self.base_url = "https://api.spotify.com/v1"
+        self.base_url = f"{SPOTIFY_API_BASE_URL}/v1"
         self.headers = {
             "Authorization": f"Bearer {access_token}",
             "Content-Type": "application/json"
         }
     
+    async def _request(self, method: str, path: str, priority: Optional[int] = None, **kwargs) -> httpx.Response:
+        """
+        Send a request through the shared rate-limit scheduler, which handles
+        429/Retry-After and transient failures. Priority defaults to the caller's
+        context (see rate_limiter.request_priority).
+        """
+        client = get_http_client()
+        return await get_spotify_scheduler().request(
+            lambda: client.request(method, f"{self.base_url}{path}", headers=self.headers, **kwargs),
+            priority=priority,
+            # Creating playlists and adding tracks must not be repeated after a 5xx or timeout
+            idempotent=method == "GET"
+        )
+    
     @cache_response(ttl=600)  # Cache search results for 10 minutes
-    async def search_track(self, query: str, limit: int = 5) -> List[Dict]:
+    async def search_track(self, query: str, limit: int = 5, market: Optional[str] = None) -> List[Dict]:
         """
-        Search for tracks on Spotify using async HTTP
+        Search for tracks on Spotify using async HTTP, optionally limited to a market
         """
         try:
             params = {
@@ -60,16 +130,17 @@ class SpotifyService:
                 "type": "track",
                 "limit": limit
             }
+            if market:
+                params["market"] = market
             
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/search",
-                    headers=self.headers,
-                    params=params,
-                    timeout=10.0
-                )
-                response.raise_for_status()
-                data = response.json()
+            response = await self._request(
+                "GET",
+                "/search",
+                params=params,
+                timeout=10.0
+            )
+            response.raise_for_status()
+            data = response.json()
             
             tracks = []
             
@@ -84,6 +155,8 @@ class SpotifyService:
                 }
                 tracks.append(track_data)
             
+            # Every result feeds the local catalog, so later suggestions can skip the search
+            get_track_catalog().queue_tracks(tracks, market)
             return tracks
             
         except httpx.HTTPError as e:
@@ -98,14 +171,14 @@ class SpotifyService:
         Get current user's profile
         """
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/me",
-                    headers=self.headers,
-                    timeout=10.0
-                )
-                response.raise_for_status()
-                return response.json()
+            response = await self._request(
+                "GET",
+                "/me",
+                priority=PRIORITY_INTERACTIVE,
+                timeout=10.0
+            )
+            response.raise_for_status()
+            return response.json()
             
         except httpx.HTTPError as e:
             logger.error(f"Failed to get user profile: {str(e)}")
@@ -122,15 +195,15 @@ class SpotifyService:
                 "public": False
             }
             
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/me/playlists",
-                    headers=self.headers,
-                    json=data,
-                    timeout=15.0
-                )
-                response.raise_for_status()
-                return response.json()
+            response = await self._request(
+                "POST",
+                "/me/playlists",
+                priority=PRIORITY_INTERACTIVE,
+                json=data,
+                timeout=15.0
+            )
+            response.raise_for_status()
+            return response.json()
             
         except httpx.HTTPError as e:
             logger.error(f"Failed to create playlist: {str(e)}")
@@ -146,56 +219,82 @@ class SpotifyService:
             
             data = {"uris": uris}
             
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/playlists/{playlist_id}/tracks",
-                    headers=self.headers,
-                    json=data,
-                    timeout=15.0
-                )
-                response.raise_for_status()
-                return response.json()
+            response = await self._request(
+                "POST",
+                f"/playlists/{playlist_id}/tracks",
+                priority=PRIORITY_INTERACTIVE,
+                json=data,
+                timeout=15.0
+            )
+            response.raise_for_status()
+            return response.json()
             
         except httpx.HTTPError as e:
             logger.error(f"Failed to add tracks to playlist: {str(e)}")
             raise Exception(f"Failed to add tracks to playlist: {str(e)}")
     
-    @cache_response(ttl=3600)  # Cache track details for 1 hour
+    async def _fetch_tracks_page(self, batch_ids: List[str]) -> List[Optional[Dict]]:
+        """
+        Fetch one page (up to 50 IDs) of track details, in the same order as batch_ids.
+        Unknown IDs come back as None.
+        """
+        params = {"ids": ",".join(batch_ids)}
+        
+        response = await self._request(
+            "GET",
+            "/tracks",
+            params=params,
+            timeout=10.0
+        )
+        response.raise_for_status()
+        
+        data = response.json()
+        
+        page = []
+        for track in data["tracks"]:
+            if track:  # Track might be None if not found
+                page.append({
+                    "spotify_id": track["id"],
+                    "name": track["name"],
+                    "artist": ", ".join([artist["name"] for artist in track["artists"]]),
+                    "album": track["album"]["name"],
+                    "album_art": track["album"]["images"][0]["url"] if track["album"]["images"] else None
+                })
+            else:
+                page.append(None)
+        return page
+    
     async def get_tracks_details(self, track_ids: List[str]) -> List[Dict]:
         """
-        Get detailed information for multiple tracks by their IDs
+        Get detailed information for multiple tracks by their IDs.
+        Details are cached per track ID, so only IDs missing from the cache are
+        fetched; their 50-ID pages are requested concurrently and the results are
+        returned in the requested order.
         """
         try:
-            # Spotify API allows up to 50 tracks per request
-            track_data = []
-            
-            async with httpx.AsyncClient() as client:
-                for i in range(0, len(track_ids), 50):
-                    batch_ids = track_ids[i:i+50]
-                    params = {"ids": ",".join(batch_ids)}
-                    
-                    response = await client.get(
-                        f"{self.base_url}/tracks",
-                        headers=self.headers,
-                        params=params,
-                        timeout=10.0
-                    )
-                    response.raise_for_status()
-                    
-                    data = response.json()
-                    
-                    for track in data["tracks"]:
-                        if track:  # Track might be None if not found
-                            track_info = {
-                                "spotify_id": track["id"],
-                                "name": track["name"],
-                                "artist": ", ".join([artist["name"] for artist in track["artists"]]),
-                                "album": track["album"]["name"],
-                                "album_art": track["album"]["images"][0]["url"] if track["album"]["images"] else None
-                            }
-                            track_data.append(track_info)
-            
-            return track_data
+            details = {}
+            missing_ids = []
+            for track_id in dict.fromkeys(track_ids):  # dedupe, keep order
+                cached = _spotify_cache.get(TRACK_DETAILS_NAMESPACE, track_id, MISSING)
+                if cached is MISSING:
+                    missing_ids.append(track_id)
+                else:
+                    details[track_id] = cached
+            
+            if missing_ids:
+                # Spotify API allows up to 50 tracks per request
+                batches = [missing_ids[i:i+50] for i in range(0, len(missing_ids), 50)]
+                pages = await asyncio.gather(*(self._fetch_tracks_page(batch) for batch in batches))
+                
+                for batch_ids, page in zip(batches, pages):
+                    for track_id, track_info in zip(batch_ids, page):
+                        details[track_id] = track_info
+                        _spotify_cache.set(TRACK_DETAILS_NAMESPACE, track_id, track_info, ttl=TRACK_DETAILS_TTL)
+                    get_track_catalog().queue_tracks(page)
+                
+                logger.debug(f"Track details: {len(track_ids) - len(missing_ids)} cached, {len(missing_ids)} fetched")
+            
+            return [details[track_id] for track_id in track_ids if details.get(track_id)]
             
         except httpx.HTTPError as e:
             logger.error(f"Failed to get track details: {str(e)}")
@@ -0,0 +1,112 @@
+import logging
+import os
+import re
+import time
+import unicodedata
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.services.cache import TTLCache, MISSING
+from app.services.persistence import JSONPersistence, PeriodicPersister
+
+logger = logging.getLogger(__name__)
+
+NAMESPACE = "suggestions"
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+def normalize_query(query: str) -> str:
+    """
+    Collapse trivially different phrasings of a query to one key:
+    "Chill  study music!" and "chill study music" both become "chill study music"
+    """
+    query = unicodedata.normalize("NFKC", query).casefold()
+    query = _PUNCTUATION_RE.sub(" ", query)
+    return _WHITESPACE_RE.sub(" ", query).strip()
+
+class SuggestionCache(JSONPersistence):
+    """
+    Cache of validated LLM suggestion lists keyed by normalized query.
+
+    The count is deliberately not part of the key: with adaptive sizing the
+    requested count moves with the observed rates, and a repeat query should
+    still hit. An explicit count is served from any entry at least that long.
+
+    Backed by a bounded TTLCache; optionally persisted to a local JSON file so
+    entries survive restarts (entries keep their original expiry).
+    """
+
+    label = "suggestion cache"
+
+    def __init__(self, ttl: float, max_entries: int, path: Optional[str] = None, enabled: bool = True):
+        self.ttl = ttl
+        self.enabled = enabled
+        self.path = Path(path) if path else None
+        self._cache = TTLCache(max_entries=max_entries, max_bytes=max_entries * 64 * 1024, default_ttl=ttl)
+        self._dirty = False
+
+    @staticmethod
+    def _key(query: str) -> str:
+        return normalize_query(query)
+
+    def get(self, query: str, count: Optional[int] = None) -> Optional[List[Dict]]:
+        """Cached suggestions for the query, the first `count` of them if given (None if fewer are cached)"""
+        if not self.enabled:
+            return None
+        tracks = self._cache.get(NAMESPACE, self._key(query), MISSING)
+        if tracks is MISSING or (count is not None and len(tracks) < count):
+            return None
+        # Hand out copies so callers can't mutate the cached list
+        return [dict(track) for track in tracks[:count]]
+
+    def set(self, query: str, tracks: List[Dict]) -> None:
+        if not self.enabled or not tracks:
+            return
+        self._cache.set(NAMESPACE, self._key(query), [dict(track) for track in tracks])
+        self._dirty = True
+
+    def stats(self) -> Dict:
+        stats = self._cache.stats()["namespaces"].get(NAMESPACE, {})
+        return {"enabled": self.enabled, "persistent": self.path is not None, **stats}
+
+    def _snapshot(self) -> List[Dict]:
+        now = time.time()
+        return [
+            {"key": key, "tracks": tracks, "expires_at": now + remaining}
+            for key, tracks, remaining in self._cache.items(NAMESPACE)
+        ]
+
+    def _restore(self, entry: Dict) -> bool:
+        self._cache.set(NAMESPACE, entry["key"], entry["tracks"], ttl=entry["expires_at"] - time.time())
+        return True
+
+_suggestion_cache: Optional[SuggestionCache] = None
+_persister: Optional[PeriodicPersister] = None
+
+def get_suggestion_cache() -> SuggestionCache:
+    global _suggestion_cache
+    if _suggestion_cache is None:
+        _suggestion_cache = SuggestionCache(
+            ttl=float(os.getenv("SUGGESTION_CACHE_TTL", str(24 * 3600))),
+            max_entries=int(os.getenv("SUGGESTION_CACHE_MAX_ENTRIES", "1000")),
+            path=os.getenv("SUGGESTION_CACHE_PATH") or None,
+            enabled=os.getenv("SUGGESTION_CACHE_ENABLED", "True").lower() == "true"
+        )
+    return _suggestion_cache
+
+async def start_suggestion_cache() -> None:
+    """Load persisted entries and start periodic persistence (called from the lifespan)"""
+    global _persister
+    cache = get_suggestion_cache()
+    if not cache.path:
+        return
+    _persister = PeriodicPersister(cache)
+    _persister.start(float(os.getenv("SUGGESTION_CACHE_PERSIST_INTERVAL", "300")))
+
+async def stop_suggestion_cache() -> None:
+    """Stop periodic persistence and flush the cache to disk"""
+    global _persister
+    if _persister is not None:
+        await _persister.stop()
+        _persister = None
@@ -0,0 +1,340 @@
+import asyncio
+import itertools
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.services.track_matching import TrackQuery, fold, normalize_title, rank_candidates, unrequested_variants
+
+logger = logging.getLogger(__name__)
+
+# Bumped when the tables change; the catalog is a cache, so older files are rebuilt
+SCHEMA_VERSION = 2
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracks (
+    id INTEGER PRIMARY KEY,
+    spotify_id TEXT NOT NULL,
+    market TEXT NOT NULL DEFAULT '',  -- market the search was limited to ('' = none)
+    title TEXT NOT NULL,
+    artist TEXT NOT NULL,
+    album TEXT,
+    album_art TEXT,
+    preview_url TEXT,
+    fetched_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (spotify_id, market)
+);
+CREATE INDEX IF NOT EXISTS tracks_fetched_at ON tracks(fetched_at);
+-- Normalized text, rowid = tracks.id
+CREATE VIRTUAL TABLE IF NOT EXISTS tracks_fts USING fts5(
+    title, artist, album, tokenize='unicode61 remove_diacritics 2'
+);
+"""
+
+# Names the in-memory databases, so a catalog's read connection opens the same one
+_memory_ids = itertools.count()
+
+# Fields a resolved track carries, same shape as SpotifyService.search_track results
+RESULT_FIELDS = ("title", "artist", "album", "spotify_id", "album_art", "preview_url")
+
+def _match_expression(query: TrackQuery) -> Optional[str]:
+    """FTS5 query requiring every title token and every artist token"""
+    if not query.title_tokens or not query.artist_tokens:
+        return None
+    title = " AND ".join(f'"{token}"' for token in sorted(query.title_tokens))
+    artist = " AND ".join(f'"{token}"' for token in sorted(query.artist_tokens))
+    return f"title: ({title}) AND artist: ({artist})"
+
+class TrackCatalog:
+    """
+    Local catalog of every track Spotify has returned to us, used to resolve
+    suggestions without a search call.
+
+    Rows come from search_track and get_tracks_details responses and are indexed
+    with SQLite FTS5 over the normalized title, artist and album. A lookup pulls
+    the rows containing every title and artist word of the suggestion and ranks
+    them with the same scorer as live search results. Rows remember the market
+    their search was limited to, and a lookup for a market only uses those.
+
+    Every row of every response is stored, not just the chosen matches, so a
+    lookup only skips the search on a confident match with no karaoke/live/remix
+    variant the suggestion didn't ask for; anything less goes to Spotify, whose
+    results rank the studio recording first.
+
+    Writes never block the event loop: responses are queued with queue_tracks()
+    and written in batches from a worker thread every `flush_delay` seconds.
+    Lookups use their own connection, so they don't wait behind a batch either.
+
+    Staleness: each row expires `ttl` seconds after Spotify last returned it and
+    is not served after that; it is refreshed whenever a response includes it
+    again. Past `max_entries` the least recently fetched rows are dropped.
+    """
+
+    def __init__(self, path: str = "", ttl: float = 30 * 86400, max_entries: int = 200000,
+                 candidate_limit: int = 10, flush_delay: float = 0.5, enabled: bool = True):
+        self.path = path or ":memory:"
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.candidate_limit = candidate_limit
+        self.flush_delay = flush_delay
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.writes = 0
+        self.lookup_seconds = 0.0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None       # writer, used from worker threads under _lock
+        self._read_conn: Optional[sqlite3.Connection] = None  # lookups on the event loop
+        self._memory_name = f"file:track_catalog_{next(_memory_ids)}?mode=memory&cache=shared"
+        self._writes_since_prune = 0
+        self._pending: List[Tuple[Dict, str]] = []  # (track, market) awaiting the next flush
+        self._pending_hits: List[int] = []          # row ids served by lookups since the last flush
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def _open(self) -> sqlite3.Connection:
+        if self.path == ":memory:":
+            # A named shared-cache database, so the read connection sees the writer's tables
+            return sqlite3.connect(self._memory_name, uri=True, check_same_thread=False, isolation_level=None)
+        return sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = self._open()
+            if self.path != ":memory:":
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+            (version,) = conn.execute("PRAGMA user_version").fetchone()
+            if version != SCHEMA_VERSION:
+                conn.executescript("DROP TABLE IF EXISTS tracks_fts; DROP TABLE IF EXISTS tracks;")
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+            # Opened once the tables exist. On disk, WAL lets it read alongside the writer's transaction;
+            # shared-cache readers would otherwise hit table locks while a batch is being written.
+            self._read_conn = self._open()
+            if self.path == ":memory:":
+                self._read_conn.execute("PRAGMA read_uncommitted = 1")
+            logger.info(f"Opened track catalog at {self.path}")
+        return self._conn
+
+    def _reader(self) -> sqlite3.Connection:
+        if self._read_conn is None:
+            with self._lock:
+                self._connection()
+        return self._read_conn
+
+    def queue_tracks(self, tracks: Iterable[Dict], market: Optional[str] = None) -> None:
+        """Queue tracks from a Spotify response for the next batched write (cheap enough for the event loop)"""
+        if not self.enabled:
+            return
+        market = (market or "").upper()
+        self._pending.extend((track, market) for track in tracks if track)
+        self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        if self._flush_task is None or self._flush_task.done():
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return  # Called outside the app (scripts): left for the next flush
+            self._flush_task = loop.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_delay)
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Track catalog flush failed: {str(e)}")
+
+    async def flush(self) -> int:
+        """Write everything queued so far in one transaction, off the event loop. Returns tracks written."""
+        pending, self._pending = self._pending, []
+        hits, self._pending_hits = self._pending_hits, []
+        if not pending and not hits:
+            return 0
+        return await asyncio.to_thread(self._write, pending, hits)
+
+    def add_tracks(self, tracks: Iterable[Dict], market: Optional[str] = None) -> int:
+        """Insert or refresh tracks right away, blocking (for scripts). Returns the number written."""
+        if not self.enabled:
+            return 0
+        market = (market or "").upper()
+        return self._write([(track, market) for track in tracks if track], [])
+
+    def _write(self, pending: List[Tuple[Dict, str]], hits: List[int]) -> int:
+        now = time.time()
+        by_key = {}
+        for track, market in pending:
+            title = track.get("title", track.get("name"))
+            if not track.get("spotify_id") or not title or not track.get("artist"):
+                continue
+            by_key[(track["spotify_id"], market)] = (
+                track["spotify_id"], market, title, track["artist"], track.get("album") or "",
+                track.get("album_art"), track.get("preview_url"), now, now + self.ttl
+            )
+        rows = list(by_key.values())
+        if not rows and not hits:
+            return 0
+
+        try:
+            with self._lock:
+                conn = self._connection()
+                conn.execute("BEGIN")
+                try:
+                    conn.executemany("UPDATE tracks SET hits = hits + 1 WHERE id = ?", [(row_id,) for row_id in hits])
+                    if rows:
+                        self._upsert(conn, rows)
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+                self.writes += len(rows)
+                self._writes_since_prune += len(rows)
+                if self._writes_since_prune >= 1000:
+                    self._prune(conn)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to write {len(rows)} tracks to catalog: {str(e)}")
+            return 0
+        return len(rows)
+
+    @staticmethod
+    def _upsert(conn: sqlite3.Connection, rows: List[Tuple]) -> None:
+        conn.executemany(
+            "INSERT INTO tracks (spotify_id, market, title, artist, album, album_art, preview_url, fetched_at, expires_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(spotify_id, market) DO UPDATE SET title = excluded.title, artist = excluded.artist, "
+            "album = excluded.album, album_art = COALESCE(excluded.album_art, tracks.album_art), "
+            # Track-detail responses have no preview_url; keep the one from search
+            "preview_url = COALESCE(excluded.preview_url, tracks.preview_url), "
+            "fetched_at = excluded.fetched_at, expires_at = excluded.expires_at",
+            rows
+        )
+        row_ids = {}
+        for market in {row[1] for row in rows}:
+            spotify_ids = [row[0] for row in rows if row[1] == market]
+            for spotify_id, row_id in conn.execute(
+                f"SELECT spotify_id, id FROM tracks WHERE market = ? AND spotify_id IN ({','.join('?' * len(spotify_ids))})",
+                [market, *spotify_ids]
+            ).fetchall():
+                row_ids[(spotify_id, market)] = row_id
+        ids = [row_ids[(row[0], row[1])] for row in rows]
+        conn.executemany("DELETE FROM tracks_fts WHERE rowid = ?", [(row_id,) for row_id in ids])
+        conn.executemany(
+            "INSERT INTO tracks_fts (rowid, title, artist, album) VALUES (?, ?, ?, ?)",
+            [(row_id, normalize_title(row[2]), fold(row[3]), normalize_title(row[4])) for row_id, row in zip(ids, rows)]
+        )
+
+    def _prune(self, conn: sqlite3.Connection) -> None:
+        self._writes_since_prune = 0
+        (count,) = conn.execute("SELECT COUNT(*) FROM tracks").fetchone()
+        excess = count - self.max_entries
+        if excess <= 0:
+            return
+        oldest = "SELECT id FROM tracks ORDER BY fetched_at, id LIMIT ?"
+        conn.execute("BEGIN")
+        conn.execute(f"DELETE FROM tracks_fts WHERE rowid IN ({oldest})", (excess,))
+        conn.execute(f"DELETE FROM tracks WHERE id IN ({oldest})", (excess,))
+        conn.execute("COMMIT")
+        logger.info(f"Pruned {excess} least recently fetched tracks from catalog")
+
+    def lookup(self, query: TrackQuery, min_score: float, market: Optional[str] = None) -> Optional[Dict]:
+        """
+        Best fresh catalog match for a suggestion, or None (then search Spotify).
+        The best row must reach min_score and carry no variant the suggestion didn't ask for.
+        With a market, only rows from searches limited to that market are used.
+        """
+        if not self.enabled:
+            return None
+        expression = _match_expression(query)
+        if expression is None:
+            return None
+
+        started = time.perf_counter()
+        try:
+            market = market.upper() if market else None
+            rows = self._reader().execute(
+                "SELECT t.title, t.artist, t.album, t.spotify_id, t.album_art, t.preview_url, t.expires_at, t.id "
+                "FROM tracks_fts JOIN tracks t ON t.id = tracks_fts.rowid "
+                "WHERE tracks_fts MATCH ? AND (? IS NULL OR t.market = ?) ORDER BY bm25(tracks_fts) LIMIT ?",
+                (expression, market, market, self.candidate_limit)
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Track catalog lookup failed: {str(e)}")
+            return None
+
+        now = time.time()
+        fresh = [row for row in rows if row[6] > now]
+        candidates = [dict(zip(RESULT_FIELDS, row[:6])) for row in fresh]
+        match = None
+        if candidates:
+            score, index = rank_candidates(query, candidates)[0]
+            if score >= min_score and not unrequested_variants(query, candidates[index]):
+                match = candidates[index]
+        self.lookup_seconds += time.perf_counter() - started
+        if match:
+            self.hits += 1
+            # Counted with the next batched write rather than written here
+            self._pending_hits.append(fresh[index][7])
+            self._schedule_flush()
+        else:
+            self.misses += 1
+            if len(candidates) < len(rows):
+                self.stale += 1
+        return match
+
+    async def close(self) -> None:
+        """Write what's still queued, then close the database"""
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Track catalog flush failed: {str(e)}")
+        if self._read_conn is not None:
+            self._read_conn.close()
+            self._read_conn = None
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        entries = None
+        if self.enabled and self._conn is not None:
+            (entries,) = self._reader().execute("SELECT COUNT(*) FROM tracks").fetchone()
+        return {
+            "enabled": self.enabled,
+            "path": self.path,
+            "entries": entries,
+            "writes": self.writes,
+            "queued": len(self._pending),
+            "lookups": lookups,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_misses": self.stale,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "avg_lookup_ms": round(self.lookup_seconds / lookups * 1000, 3) if lookups else 0.0
+        }
+
+_track_catalog: Optional[TrackCatalog] = None
+
+def get_track_catalog() -> TrackCatalog:
+    global _track_catalog
+    if _track_catalog is None:
+        _track_catalog = TrackCatalog(
+            path=os.getenv("TRACK_CATALOG_PATH", "./track_catalog.db"),
+            ttl=float(os.getenv("TRACK_CATALOG_TTL", str(30 * 86400))),
+            max_entries=int(os.getenv("TRACK_CATALOG_MAX_ENTRIES", "200000")),
+            enabled=os.getenv("TRACK_CATALOG_ENABLED", "True").lower() == "true"
+        )
+    return _track_catalog
+
+async def close_track_catalog() -> None:
+    if _track_catalog is not None:
+        await _track_catalog.close()
@@ -0,0 +1,151 @@
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Sequence, Tuple
+
+# Words that say nothing about which recording a title/album refers to
+STOPWORDS = frozenset({
+    "the", "a", "an", "and", "or", "of", "in", "on", "at", "to", "for", "by", "with",
+    "soundtrack", "greatest", "hits", "best", "collection", "edition", "deluxe", "expanded", "version"
+})
+
+# Markers of a different recording than the one asked for (unless the suggestion says so too)
+VARIANT_TOKENS = frozenset({"karaoke", "instrumental", "tribute", "cover", "live", "remix", "acoustic", "demo", "sped", "slowed"})
+
+# "(feat. X)", "[ft. X]", "(with X)" anywhere, or a trailing " feat. X"
+_FEATURING_RE = re.compile(
+    r"[\(\[]\s*(?:feat\.?|ft\.?|featuring|with)\s[^\)\]]*[\)\]]|\s(?:feat\.?|ft\.?|featuring)\s.*$",
+    re.IGNORECASE
+)
+_VERSION_WORDS = r"(?:re-?master(?:ed)?|remix|mix|edit|version|mono|stereo|live|acoustic|deluxe|anniversary|bonus track|single)"
+# " - Remastered 2011", " - Radio Edit", "(2011 Remaster)", "[Deluxe Edition]"
+_VERSION_RE = re.compile(
+    rf"\s[-–—]\s[^-–—]*\b{_VERSION_WORDS}\b.*$|[\(\[][^\)\]]*\b{_VERSION_WORDS}\b[^\)\]]*[\)\]]",
+    re.IGNORECASE
+)
+_APOSTROPHE_RE = re.compile(r"['’`]")
+_NON_WORD_RE = re.compile(r"[^\w\s]|_")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+@lru_cache(maxsize=16384)
+def fold(text: str) -> str:
+    """Unicode-fold for comparison: strip diacritics, casefold, '&' -> 'and', drop punctuation"""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    text = _APOSTROPHE_RE.sub("", text.replace("&", " and "))
+    text = _NON_WORD_RE.sub(" ", text)
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+@lru_cache(maxsize=16384)
+def normalize_title(text: str) -> str:
+    """Fold a track or album title after removing featuring credits and version suffixes"""
+    text = _FEATURING_RE.sub(" ", text or "")
+    text = _VERSION_RE.sub(" ", text)
+    return fold(text)
+
+@lru_cache(maxsize=16384)
+def _tokens(text: str) -> FrozenSet[str]:
+    words = text.split()
+    meaningful = frozenset(word for word in words if word not in STOPWORDS)
+    # A title made only of stopwords ("The The") still has to match on something
+    return meaningful or frozenset(words)
+
+@lru_cache(maxsize=16384)
+def _variants(raw: str) -> FrozenSet[str]:
+    return frozenset(fold(raw).split()) & VARIANT_TOKENS
+
+@lru_cache(maxsize=16384)
+def track_key(title: str, artist: str) -> str:
+    """
+    Canonical identity of a suggested track, for deduplication before any search:
+    "Dont Stop Me Now - Remastered 2011" / "Queen" and "Don't Stop Me Now" / "queen"
+    share a key. The artist's words are sorted so "A & B" and "B, A" agree.
+    """
+    artist_tokens = _tokens(fold(_FEATURING_RE.sub(" ", artist or "")))
+    return f"{normalize_title(title or '')}|{' '.join(sorted(artist_tokens))}"
+
+class TrackQuery(NamedTuple):
+    """A suggested track with its normalized fields precomputed for scoring"""
+    title: str
+    title_tokens: FrozenSet[str]
+    artist_tokens: FrozenSet[str]
+    album_tokens: FrozenSet[str]
+    variants: FrozenSet[str]
+
+    @classmethod
+    def from_track(cls, track: Dict) -> "TrackQuery":
+        title_raw = track.get("track_name", track.get("title", "")) or ""
+        album_raw = track.get("album", "") or ""
+        if album_raw == "Unknown Album":
+            album_raw = ""
+        title = normalize_title(title_raw)
+        return cls(
+            title=title,
+            title_tokens=_tokens(title),
+            artist_tokens=_tokens(fold(_FEATURING_RE.sub(" ", track.get("artist", "") or ""))),
+            album_tokens=_tokens(normalize_title(album_raw)) if album_raw else frozenset(),
+            variants=_variants(title_raw) | _variants(album_raw)
+        )
+
+def _dice(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+def _containment(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """Share of a's tokens found in b"""
+    if not a:
+        return 0.0
+    return len(a & b) / len(a)
+
+def unrequested_variants(query: TrackQuery, candidate: Dict) -> FrozenSet[str]:
+    """Karaoke/live/remix-style variant words on the candidate that the suggestion didn't ask for"""
+    return (_variants(candidate.get("title", "") or "") | _variants(candidate.get("album", "") or "")) - query.variants
+
+TITLE_WEIGHT = 0.55
+ARTIST_WEIGHT = 0.35
+ALBUM_WEIGHT = 0.10
+VARIANT_PENALTY = 0.2
+CONTAINED_TITLE_SCORE = 0.8  # title score when every suggested title word appears in a longer title
+
+def rank_candidates(query: TrackQuery, candidates: Sequence[Dict]) -> List[Tuple[float, int]]:
+    """
+    Score every candidate in one pass and return (score, index) pairs, best first.
+    Ties keep Spotify's order. Scores are at most 1: title similarity, share of the
+    suggested artist's tokens credited, album overlap, minus a penalty for
+    karaoke/live/remix-style variants the suggestion didn't ask for.
+    """
+    has_album = bool(query.album_tokens)
+    title_weight = TITLE_WEIGHT if has_album else TITLE_WEIGHT + ALBUM_WEIGHT * 0.6
+    artist_weight = ARTIST_WEIGHT if has_album else ARTIST_WEIGHT + ALBUM_WEIGHT * 0.4
+
+    scored = []
+    for index, candidate in enumerate(candidates):
+        title_raw = candidate.get("title", "") or ""
+        album_raw = candidate.get("album", "") or ""
+        title = normalize_title(title_raw)
+
+        if title == query.title:
+            title_score = 1.0
+        else:
+            # Containment covers long catalogue titles ("Suite bergamasque, L. 75: III. Clair de lune")
+            candidate_tokens = _tokens(title)
+            title_score = max(_dice(query.title_tokens, candidate_tokens),
+                              CONTAINED_TITLE_SCORE * _containment(query.title_tokens, candidate_tokens))
+        score = title_weight * title_score
+        score += artist_weight * _containment(query.artist_tokens, _tokens(fold(candidate.get("artist", "") or "")))
+        if has_album:
+            score += ALBUM_WEIGHT * _dice(query.album_tokens, _tokens(normalize_title(album_raw)))
+        if unrequested_variants(query, candidate):
+            score -= VARIANT_PENALTY
+        scored.append((score, index))
+
+    scored.sort(key=lambda item: (-item[0], item[1]))
+    return scored
+
+def best_match(query: TrackQuery, candidates: Sequence[Dict], min_score: float = 0.65) -> Optional[Dict]:
+    """Highest-scoring candidate, or None if nothing reaches min_score"""
+    if not candidates:
+        return None
+    score, index = rank_candidates(query, candidates)[0]
+    return candidates[index] if score >= min_score else None
@@ -1,4 +1,5 @@
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -9,13 +10,47 @@ from dotenv import load_dotenv
 from app.routers import playlist, auth
 from app.models.responses import ErrorResponse
 from app.database import engine, Base
+from app.services.fallback_pool import get_fallback_pool, start_fallback_pool, stop_fallback_pool
+from app.services.hedging import get_hedge_policy
+from app.services.adaptive_sizing import get_suggestion_sizer
+from app.services.model_router import get_title_router
+from app.services.http_client import start_http_client, close_http_client
+from app.services import spotify_service
+from app.services.openai_client_pool import close_openai_clients, get_openai_client_pool
+from app.services.openai_service import get_generation_stats
+from app.services.playlist_pipeline import get_pipeline_stats
+from app.services.prompt_registry import start_prompt_watcher, stop_prompt_watcher
+from app.services.query_similarity import get_query_index, start_query_index, stop_query_index
+from app.services.rate_limiter import get_spotify_scheduler
+from app.services.suggestion_cache import get_suggestion_cache, start_suggestion_cache, stop_suggestion_cache
+from app.services.track_catalog import close_track_catalog, get_track_catalog
 
 load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Shared, pre-warmed connection pool for outbound Spotify calls
+    await start_http_client()
+    # Validate prompt templates up front and hot-reload them when edited
+    start_prompt_watcher()
+    await start_suggestion_cache()
+    await start_query_index()
+    # Generic fallback tracks are searched in the background, not on the request path
+    start_fallback_pool()
+    yield
+    await stop_fallback_pool()
+    await stop_query_index()
+    await stop_suggestion_cache()
+    await stop_prompt_watcher()
+    await close_http_client()
+    await close_openai_clients()
+    await close_track_catalog()
+
 app = FastAPI(
     title="Aelyra API",
     description="AI-Powered Spotify Playlist Generator",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Create database tables
@@ -48,6 +83,23 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics")
+async def metrics():
+    return {
+        "spotify_cache": spotify_service.get_cache_stats(),
+        "spotify_rate_limit": get_spotify_scheduler().stats(),
+        "suggestion_cache": get_suggestion_cache().stats(),
+        "query_reuse": get_query_index().stats(),
+        "openai_clients": get_openai_client_pool().stats(),
+        "openai_generation": get_generation_stats(),
+        "suggestion_sizing": get_suggestion_sizer().stats(),
+        "openai_hedging": get_hedge_policy().stats(),
+        "title_router": get_title_router().stats(),
+        "pipeline": get_pipeline_stats(),
+        "track_catalog": get_track_catalog().stats(),
+        "fallback_pool": get_fallback_pool().stats()
+    }
+
 if __name__ == "__main__":
     host = os.getenv("HOST", "127.0.0.1")
     port = int(os.getenv("PORT", "5988"))
@@ -0,0 +1,4 @@
+import os
+
+# Keep test runs out of the on-disk track catalog
+os.environ["TRACK_CATALOG_PATH"] = ""
@@ -0,0 +1,93 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import adaptive_sizing, openai_service, suggestion_cache
+from app.services.adaptive_sizing import SuggestionSizer
+from app.services.app_config import AdaptiveSizingConfig
+from app.services.openai_service import OpenAIService
+
+SIZING = AdaptiveSizingConfig(enabled=True, min_count=20, max_count=80)
+
+def _completion(count: int):
+    tracks = [{"track_name": f"Song {i}", "artist": f"Artist {i}", "album": "Album", "release_year": "2000"}
+              for i in range(count)]
+    message = SimpleNamespace(content=json.dumps({"tracks": tracks}))
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=message, finish_reason="stop")],
+        usage=SimpleNamespace(completion_tokens=count * 30, prompt_tokens=100, prompt_tokens_details=None)
+    )
+
+@pytest.fixture
+def service(monkeypatch):
+    """OpenAIService with adaptive sizing on, a fresh sizer and cache, and a fake completion call"""
+    monkeypatch.setattr(adaptive_sizing, "_sizer", SuggestionSizer())
+    monkeypatch.setattr(suggestion_cache, "_suggestion_cache", suggestion_cache.SuggestionCache(ttl=60, max_entries=10))
+    service = OpenAIService(api_key="sk-test")
+    monkeypatch.setattr(service.config, "adaptive_sizing", SIZING)
+    calls = []
+
+    async def create_completion(stage=None, **kwargs):
+        calls.append(kwargs)
+        return _completion(40)
+
+    monkeypatch.setattr(service, "_create_completion", create_completion)
+    service.calls = calls
+    return service
+
+def test_repeat_query_hits_cache_after_sizing_changes(service):
+    async def run():
+        first = await service.generate_track_suggestions("chill study music")
+        # Poor matches since the first call would size the next request differently
+        openai_service.get_suggestion_sizer().record_matches("chill study music", 40, 10)
+        second = await service.generate_track_suggestions("Chill study music!")
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert len(service.calls) == 1
+    assert second == first
+
+def test_explicit_count_is_served_from_a_longer_cached_list(service):
+    async def run():
+        await service.generate_track_suggestions("road trip")
+        return await service.generate_track_suggestions("road trip", count=25)
+
+    assert len(asyncio.run(run())) == 25
+    assert len(service.calls) == 1
+
+def test_count_targets_the_tracks_the_playlist_needs():
+    sizer = SuggestionSizer()
+    # Perfect parse and match rates: the count still covers every group of the playlist
+    for _ in range(20):
+        sizer.record_generation("jazz", 50, 50, None)
+        sizer.record_matches("jazz", 50, 50)
+    assert sizer.choose("jazz", SIZING, 35, target_matches=50).count == 50
+    # Half the suggestions resolving doubles it, up to max_count
+    for _ in range(20):
+        sizer.record_matches("jazz", 50, 25)
+    assert sizer.choose("jazz", SIZING, 35, target_matches=50).count == 80
+
+def test_cold_start_keeps_the_default_count():
+    sizer = SuggestionSizer()
+    assert sizer.choose("jazz", SIZING, 35, target_matches=50) == (35, None)
+    # Parse rate alone isn't enough to size on
+    sizer.record_generation("jazz", 35, 35, 35 * 30)
+    assert sizer.choose("jazz", SIZING, 35, target_matches=50).count == 35
+    sizer.record_matches("jazz", 35, 30)
+    assert sizer.choose("jazz", SIZING, 35, target_matches=50).count > 35
+
+def test_sized_up_count_does_not_raise_the_top_up_threshold(service, monkeypatch):
+    async def create_completion(stage=None, **kwargs):
+        service.calls.append(kwargs)
+        return _completion(20)
+
+    monkeypatch.setattr(service, "_create_completion", create_completion)
+    # 20 of 65 is below half the count but above half of suggestion_count (35)
+    tracks = asyncio.run(service.generate_track_suggestions("late night drive", count=65))
+    assert len(tracks) == 20
+    assert len(service.calls) == 1
+
+def test_disabled_sizing_keeps_the_default_count():
+    assert SuggestionSizer().choose("jazz", AdaptiveSizingConfig(), 35, target_matches=50).count == 35
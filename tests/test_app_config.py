@@ -0,0 +1,89 @@
+import json
+import os
+
+import pytest
+
+from app.services.app_config import (
+    STAGE_ADDITIONAL_TRACKS, STAGE_PLAYLIST_TITLE, STAGE_TRACK_GENERATION, AppConfig, PipelineConfig
+)
+from app.services.model_router import LatencyRouter
+
+def _write(path, data) -> None:
+    path.write_text(json.dumps(data))
+    # Make sure the mtime moves even on filesystems with coarse timestamps
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+def test_stage_overrides_fall_back_to_the_default_model_and_budgets(tmp_path):
+    path = tmp_path / "config.json"
+    _write(path, {
+        "model_to_use": "model-a",
+        "stages": {STAGE_TRACK_GENERATION: {"model": "model-b", "tokens_per_track": 50}}
+    })
+    config = AppConfig(path)
+    track = config.stage(STAGE_TRACK_GENERATION)
+    assert (track.model, track.temperature, track.token_budget(40)) == ("model-b", 0.7, 2000)
+    assert config.stage(STAGE_ADDITIONAL_TRACKS).model == "model-a"
+    assert config.stage(STAGE_PLAYLIST_TITLE).token_budget() == 100
+    # Sections left out keep their defaults
+    assert config.pipeline == PipelineConfig()
+    assert config.target_tracks == 50
+
+def test_title_routing_needs_more_than_one_model(tmp_path):
+    path = tmp_path / "config.json"
+    _write(path, {"title_router": {"enabled": True, "models": ["model-a"]}})
+    assert AppConfig(path).title_routing is False
+    _write(path, {"title_router": {"enabled": True, "models": ["model-a", "model-b"]}})
+    assert AppConfig(path).title_routing is True
+
+@pytest.mark.parametrize("data", [
+    {"songs_to_return": 0},
+    {"adaptive_sizing": {"min_count": 50, "max_count": 20}},
+    {"pipeline": {"search_concurrency": 0}},
+    {"stages": {STAGE_TRACK_GENERATION: {"temperature": "warm"}}},
+])
+def test_invalid_config_is_rejected(tmp_path, data):
+    path = tmp_path / "config.json"
+    _write(path, data)
+    with pytest.raises(ValueError):
+        AppConfig(path)
+
+def test_invalid_edit_keeps_the_previous_config(tmp_path):
+    path = tmp_path / "config.json"
+    _write(path, {"suggestion_count": 30})
+    config = AppConfig(path)
+    assert config.reload_if_changed() is False
+
+    _write(path, {"suggestion_count": 40})
+    assert config.reload_if_changed() is True
+    assert config.suggestion_count == 40
+
+    path.write_text("{not json")
+    os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 2_000_000_000))
+    assert config.reload_if_changed() is False
+    assert config.suggestion_count == 40
+
+def test_router_tries_every_model_then_prefers_the_fastest():
+    router = LatencyRouter(explore_every=0)
+    models = ["slow", "fast"]
+    assert router.choose(models) == "slow"
+    router.record("slow", 2.0)
+    assert router.choose(models) == "fast"
+    router.record("fast", 0.5)
+    assert router.choose(models) == "fast"
+
+def test_router_moves_off_a_failing_model():
+    router = LatencyRouter(explore_every=0)
+    router.record("a", 0.5)
+    router.record("b", 1.0)
+    router.record_failure("a")
+    assert router.choose(["a", "b"]) == "b"
+    assert router.stats()["models"]["a"]["failures"] == 1
+
+def test_router_explores_the_least_sampled_model():
+    router = LatencyRouter(explore_every=3)
+    for _ in range(5):
+        router.record("fast", 0.5)
+    router.record("slow", 2.0)
+    choices = [router.choose(["fast", "slow"]) for _ in range(3)]
+    assert choices == ["fast", "fast", "slow"]
@@ -0,0 +1,42 @@
+from app.services.cache import MISSING, TTLCache, estimate_size
+
+VALUE = {"title": "Song", "artist": "Artist", "tags": ["a", "b"]}
+SIZE = estimate_size(VALUE)
+
+def test_byte_budget_evicts_least_recently_used_first():
+    cache = TTLCache(max_entries=100, max_bytes=SIZE * 3)
+    for key in ("a", "b", "c"):
+        cache.set("search", key, dict(VALUE))
+    # Touching "a" makes "b" the least recently used
+    assert cache.get("search", "a") is not None
+    cache.set("search", "d", dict(VALUE))
+
+    assert cache.get("search", "b", MISSING) is MISSING
+    assert all(cache.get("search", key) is not None for key in ("a", "c", "d"))
+    stats = cache.stats()
+    assert stats["bytes"] <= SIZE * 3
+    assert stats["namespaces"]["search"]["evictions"] == 1
+
+def test_namespaces_share_one_byte_budget():
+    cache = TTLCache(max_entries=100, max_bytes=SIZE * 2)
+    cache.set("search", "a", dict(VALUE))
+    cache.set("details", "b", dict(VALUE))
+    cache.set("details", "c", dict(VALUE))
+
+    assert cache.get("search", "a", MISSING) is MISSING
+    assert cache.stats()["namespaces"]["details"]["bytes"] == SIZE * 2
+
+def test_value_larger_than_the_budget_is_not_cached():
+    cache = TTLCache(max_entries=100, max_bytes=SIZE * 2)
+    cache.set("search", "small", dict(VALUE))
+    cache.set("search", "huge", {"tracks": [dict(VALUE) for _ in range(10)]})
+
+    assert cache.get("search", "huge", MISSING) is MISSING
+    # Nothing was evicted to make room for it
+    assert cache.get("search", "small") is not None
+
+def test_replacing_an_entry_releases_its_old_size():
+    cache = TTLCache(max_entries=100, max_bytes=SIZE * 10)
+    cache.set("search", "a", {"tracks": [dict(VALUE) for _ in range(5)]})
+    cache.set("search", "a", dict(VALUE))
+    assert cache.stats()["bytes"] == SIZE
@@ -0,0 +1,41 @@
+import asyncio
+
+import pytest
+
+from app.services import fallback_pool
+from app.services.fallback_pool import GENERIC_FALLBACK_SEARCHES, FallbackPool
+from app.services.playlist_pipeline import _get_popular_fallback_tracks
+
+class FakeSpotify:
+    def __init__(self):
+        self.searches = []
+
+    async def search_track(self, query, limit=5, market=None):
+        self.searches.append((query, market))
+        return [{"spotify_id": f"{market}-{query}", "title": query, "artist": "Artist"}]
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = FallbackPool(markets=["US", "GB"])
+    monkeypatch.setattr(fallback_pool, "_fallback_pool", pool)
+    return pool
+
+def test_request_path_searches_are_limited_to_the_market_they_are_pooled_under(pool):
+    spotify = FakeSpotify()
+    asyncio.run(_get_popular_fallback_tracks(spotify, "jazz", 10, market="gb"))
+    assert {market for _, market in spotify.searches} == {"GB"}
+    assert {track["spotify_id"] for track in pool.get("GB")} == {f"GB-{term}" for term in GENERIC_FALLBACK_SEARCHES}
+    assert pool.get("US") == []
+
+def test_no_market_uses_the_pool_default(pool):
+    spotify = FakeSpotify()
+    asyncio.run(_get_popular_fallback_tracks(spotify, "jazz", 10))
+    assert {market for _, market in spotify.searches} == {"US"}
+    assert pool.get("US")
+
+def test_pooled_tracks_skip_the_generic_searches(pool):
+    pool.store("US", [{"spotify_id": "pooled", "title": "Pooled", "artist": "Artist"}])
+    spotify = FakeSpotify()
+    tracks = asyncio.run(_get_popular_fallback_tracks(spotify, "jazz", 10, market="US"))
+    assert [query for query, _ in spotify.searches] == ["jazz popular", "jazz hits"]
+    assert tracks[-1]["spotify_id"] == "pooled"
@@ -0,0 +1,52 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import adaptive_sizing, openai_service
+from app.services.adaptive_sizing import SuggestionSizer
+from app.services.openai_service import OpenAIService, get_generation_stats
+
+def _completion(count: int, call: int):
+    tracks = [{"track_name": f"Song {call}-{i}", "artist": f"Artist {i}", "album": "Album", "release_year": "2000"}
+              for i in range(count)]
+    message = SimpleNamespace(content=json.dumps({"tracks": tracks}))
+    return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="stop")], usage=None)
+
+@pytest.fixture
+def service(monkeypatch):
+    """OpenAIService whose completions return the next count in `service.counts`, with fresh counters"""
+    monkeypatch.setattr(adaptive_sizing, "_sizer", SuggestionSizer())
+    monkeypatch.setattr(openai_service, "_generation_stats", dict.fromkeys(openai_service._generation_stats, 0))
+    service = OpenAIService(api_key="sk-test")
+    service.counts = []
+
+    async def create_completion(stage=None, **kwargs):
+        return _completion(service.counts.pop(0), len(service.counts))
+
+    monkeypatch.setattr(service, "_create_completion", create_completion)
+    return service
+
+def test_short_bulk_output_counts_as_a_fallback(service):
+    service.counts = [3, 30]
+    tracks = asyncio.run(service.generate_track_suggestions("rainy day", use_cache=False))
+    stats = get_generation_stats()
+    assert len(tracks) == 33
+    assert stats["fallback_calls"] == 1
+    assert stats["additional_calls"] == 1
+    assert stats["fallback_rate"] == 1.0
+
+def test_spotify_shortfall_top_up_is_not_a_fallback(service):
+    service.counts = [35, 10]
+
+    async def run():
+        suggestions = await service.generate_track_suggestions("rainy day", use_cache=False)
+        # The pipeline asks for more when too few suggestions matched on Spotify
+        await service._generate_additional_tracks("rainy day", suggestions[:5], 10)
+
+    asyncio.run(run())
+    stats = get_generation_stats()
+    assert stats["fallback_calls"] == 0
+    assert stats["additional_calls"] == 1
+    assert stats["fallback_rate"] == 0.0
@@ -0,0 +1,54 @@
+import asyncio
+
+from app.services.hedging import HedgePolicy
+
+def _warm_policy(stage: str) -> HedgePolicy:
+    policy = HedgePolicy(enabled=True, min_samples=1, budget=1.0, min_delay=0.01)
+    policy._stage(stage).latency.record(0.01)
+    policy._stage(stage).calls = 10
+    return policy
+
+def test_slow_call_is_hedged_and_losing_result_discarded():
+    policy = _warm_policy("stream")
+    delays = [0.1, 0.0]
+    discarded = []
+
+    async def call():
+        delay = delays.pop(0)
+        await asyncio.sleep(delay)
+        return delay
+
+    async def discard(result):
+        discarded.append(result)
+
+    async def run():
+        return await policy.run("stream", call, discard=discard)
+
+    assert asyncio.run(run()) == 0.0
+    assert policy.stats()["stages"]["stream"]["hedge_wins"] == 1
+    # The primary was still pending, so it was cancelled rather than discarded
+    assert discarded == []
+
+def test_results_completing_together_discard_the_loser():
+    policy = _warm_policy("stream")
+    discarded = []
+
+    async def run():
+        gate = asyncio.Event()
+        started = []
+
+        async def call():
+            started.append(True)
+            # Both attempts finish in the same loop iteration once the hedge has started
+            if len(started) == 2:
+                gate.set()
+            await gate.wait()
+            return len(started)
+
+        async def discard(result):
+            discarded.append(result)
+
+        return await policy.run("stream", call, discard=discard)
+
+    asyncio.run(run())
+    assert len(discarded) == 1
@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from app.services.json_stream import JSONArrayStreamParser, parse_json_array
+
+TRACKS = [
+    {"track_name": "Don't Stop Me Now", "artist": "Queen"},
+    {"track_name": 'The "Heroes" Single', "artist": "David Bowie"},
+    {"track_name": "Back\\slash {braces} [brackets]", "artist": "Ünïcode ☃"},
+]
+TEXT = json.dumps({"tracks": TRACKS})
+
+def _feed_in_chunks(text: str, size: int):
+    parser = JSONArrayStreamParser()
+    items = []
+    for start in range(0, len(text), size):
+        items.extend(parser.feed(text[start:start + size]))
+    return parser, items
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 16, len(TEXT)])
+def test_any_chunking_yields_the_same_items(size):
+    parser, items = _feed_in_chunks(TEXT, size)
+    assert items == TRACKS
+    assert parser.done
+    assert parser.items_parsed == 3
+
+def test_every_split_point_of_an_escaped_quote():
+    text = json.dumps([{"track_name": 'say \\"hi\\" "now"', "artist": "A"}])
+    for split in range(1, len(text)):
+        parser = JSONArrayStreamParser()
+        items = parser.feed(text[:split]) + parser.feed(text[split:])
+        assert items == json.loads(text), split
+
+def test_items_are_returned_as_soon_as_they_close():
+    parser = JSONArrayStreamParser()
+    first = json.dumps(TRACKS[0])
+    assert parser.feed('[' + first[:-1]) == []
+    assert parser.feed('}, {"track_name"') == [TRACKS[0]]
+
+def test_truncated_array_keeps_complete_items():
+    text = json.dumps(TRACKS)
+    truncated = text[:text.index(json.dumps(TRACKS[2])) + 20]
+    parser = JSONArrayStreamParser()
+    assert parser.feed(truncated) == TRACKS[:2]
+    assert not parser.done
+
+def test_truncated_inside_a_string_with_brackets():
+    assert parse_json_array('[{"a": 1}, {"b": "unfinished ] } [') == [{"a": 1}]
+
+def test_fences_and_prose_around_the_array_are_ignored():
+    text = "Here you go:\n```json\n" + json.dumps(TRACKS) + "\n```\nEnjoy!"
+    assert parse_json_array(text) == TRACKS
+
+def test_malformed_element_is_skipped_and_counted():
+    parser = JSONArrayStreamParser()
+    items = parser.feed('[{"a": 1}, {"b": nope}, {"c": 3}]')
+    assert items == [{"a": 1}, {"c": 3}]
+    assert parser.items_invalid == 1
+
+def test_nothing_is_read_after_the_closing_bracket():
+    parser = JSONArrayStreamParser()
+    assert parser.feed('[{"a": 1}] [{"b": 2}]') == [{"a": 1}]
+    assert parser.done
+    assert parser.feed('{"c": 3}') == []
+
+def test_empty_and_missing_arrays():
+    assert parse_json_array("[]") == []
+    assert parse_json_array("no json here") == []
+    assert parse_json_array("") == []
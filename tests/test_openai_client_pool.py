@@ -0,0 +1,31 @@
+import asyncio
+
+from app.services import openai_client_pool
+from app.services.openai_client_pool import OpenAIClientPool
+
+class FakeClient:
+    def __init__(self, api_key: str):
+        self.api_key = api_key
+        self.closed = False
+
+    async def close(self):
+        # The evicted client takes longer to close than the one closed at shutdown
+        await asyncio.sleep(0.1 if self.api_key == "sk-first" else 0)
+        self.closed = True
+
+def test_shutdown_waits_for_evicted_clients_to_close(monkeypatch):
+    monkeypatch.setattr(openai_client_pool, "_build_async_client", FakeClient)
+    pool = OpenAIClientPool(max_clients=1)
+
+    async def run():
+        async with pool.lease("sk-first") as first:
+            pass
+        # The second key pushes the first client out; it closes in the background
+        async with pool.lease("sk-second") as second:
+            pass
+        assert pool.evicted_lru == 1 and not first.closed
+        await pool.close()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first.closed and second.closed
@@ -0,0 +1,141 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import adaptive_sizing, playlist_pipeline, query_similarity, suggestion_cache
+from app.services.adaptive_sizing import SuggestionSizer
+from app.services.openai_service import OpenAIService
+from app.services.app_config import PipelineConfig
+from app.services.playlist_pipeline import PlaylistPipeline, _SpeculativeFallback
+
+SETTINGS = PipelineConfig(search_concurrency=3, suggestion_queue_size=2, event_queue_size=4)
+
+class FakeOpenAI:
+    def __init__(self, count: int):
+        self.count = count
+
+    async def stream_track_suggestions(self, query, use_cache=True):
+        for i in range(self.count):
+            await asyncio.sleep(0)
+            yield {"track_name": f"Song {i}", "artist": f"Artist {i}"}
+
+def _collect(pipeline: PlaylistPipeline):
+    speculative = _SpeculativeFallback(pipeline.openai_service, pipeline.query, pipeline.suggested_tracks, 0)
+
+    async def run():
+        return [event async for event in pipeline._suggest_and_search(speculative)]
+
+    # A hang fails the test instead of blocking the run
+    return asyncio.run(asyncio.wait_for(run(), timeout=5))
+
+def _pipeline(count: int) -> PlaylistPipeline:
+    return PlaylistPipeline(FakeOpenAI(count), None, "test query", use_cache=False, settings=SETTINGS)
+
+def test_ends_once_every_suggestion_is_searched(monkeypatch):
+    async def search(spotify_service, search_query, track, settings=None, market=None):
+        return {"spotify_id": track["track_name"], "title": track["track_name"]}
+
+    monkeypatch.setattr(playlist_pipeline, "_search_single_track", search)
+    pipeline = _pipeline(7)
+    events = _collect(pipeline)
+    assert [event["type"] for event in events].count("track_found") == 7
+    assert any(event["type"] == "suggestions_complete" for event in events)
+
+def test_stops_at_the_target_track_count(monkeypatch):
+    async def search(spotify_service, search_query, track, settings=None, market=None):
+        return {"spotify_id": track["track_name"], "title": track["track_name"]}
+
+    monkeypatch.setattr(playlist_pipeline, "_search_single_track", search)
+    pipeline = _pipeline(500)
+    _collect(pipeline)
+    assert len(pipeline.spotify_tracks) == pipeline.config.target_tracks
+
+def test_failing_search_worker_does_not_hang_the_consumer(monkeypatch):
+    async def search(spotify_service, search_query, track, settings=None, market=None):
+        raise RuntimeError("search exploded")
+
+    monkeypatch.setattr(playlist_pipeline, "_search_single_track", search)
+    with pytest.raises(RuntimeError, match="search exploded"):
+        _collect(_pipeline(7))
+
+def _chunk(content):
+    delta = SimpleNamespace(content=content)
+    return SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=delta)])
+
+class FakeStream:
+    def __init__(self, count: int):
+        tracks = [{"track_name": f"Song {i}", "artist": f"Artist {i}", "album": "Album", "release_year": "2000"}
+                  for i in range(count)]
+        self.text = json.dumps({"tracks": tracks})
+
+    async def __aiter__(self):
+        for start in range(0, len(self.text), 40):
+            await asyncio.sleep(0)
+            yield _chunk(self.text[start:start + 40])
+
+    async def close(self):
+        pass
+
+def test_stream_stopped_at_the_target_still_fills_the_cache_and_sizer(monkeypatch):
+    sizer = SuggestionSizer()
+    # Warm rates size the request past the target, as in steady state
+    sizer.record_generation("earlier query", 50, 50, None)
+    sizer.record_matches("earlier query", 50, 40)
+    monkeypatch.setattr(adaptive_sizing, "_sizer", sizer)
+    monkeypatch.setattr(suggestion_cache, "_suggestion_cache", suggestion_cache.SuggestionCache(ttl=60, max_entries=10))
+    monkeypatch.setattr(query_similarity, "_query_index", query_similarity.QueryIndex(threshold=0.8, enabled=True))
+    service = OpenAIService(api_key="sk-test")
+
+    async def open_stream(**kwargs):
+        return FakeStream(65)
+
+    async def search(spotify_service, search_query, track, settings=None, market=None):
+        return {"spotify_id": track["track_name"], "title": track["track_name"]}
+
+    monkeypatch.setattr(service, "_open_stream", open_stream)
+    monkeypatch.setattr(playlist_pipeline, "_search_single_track", search)
+    pipeline = PlaylistPipeline(service, None, "rainy day jazz", use_cache=False, settings=SETTINGS)
+    _collect(pipeline)
+
+    assert len(pipeline.spotify_tracks) == pipeline.config.target_tracks
+    cached = suggestion_cache.get_suggestion_cache().get("rainy day jazz")
+    assert cached and len(cached) >= pipeline.config.target_tracks
+    assert len(query_similarity.get_query_index()) == 1
+    stats = adaptive_sizing.get_suggestion_sizer().stats()
+    assert stats["requests"] == 2
+    # Only what was read counts as requested, not all 65, so stopping early isn't a poor parse rate
+    assert stats["suggestions_requested"] - 50 < 65
+    assert stats["parse_rate"] == 1.0
+    assert stats["tokens_per_track"]
+
+def test_windowed_search_stops_at_the_target_and_cancels_the_rest(monkeypatch):
+    started, cancelled = [], []
+
+    async def search(spotify_service, search_query, track, settings=None, market=None):
+        index = int(track["track_name"].split()[1])
+        started.append(index)
+        try:
+            # Later suggestions are slower, so the first ones fill the target
+            await asyncio.sleep(0.01 * (index + 1))
+        except asyncio.CancelledError:
+            cancelled.append(index)
+            raise
+        return {"spotify_id": f"id-{index}", "title": track["track_name"]}
+
+    monkeypatch.setattr(playlist_pipeline, "_search_single_track", search)
+    tracks = [{"track_name": f"Song {i}", "artist": f"Artist {i}"} for i in range(30)]
+
+    async def run():
+        found = await playlist_pipeline._search_tracks_windowed(None, tracks, target_tracks=5, concurrency=3,
+                                                               exclude_ids={"id-1"})
+        # Let the cancellations land
+        await asyncio.sleep(0)
+        return found
+
+    found = asyncio.run(run())
+    # Excluded IDs don't count toward the target, and results keep suggestion order
+    assert [track["spotify_id"] for track in found] == ["id-0", "id-2", "id-3", "id-4", "id-5"]
+    assert len(started) < len(tracks)
+    assert len(cancelled) == len(started) - 6
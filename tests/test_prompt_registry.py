@@ -0,0 +1,64 @@
+import json
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+from app.services.prompt_registry import CONFIG_DIR, PROMPT_FILES, PromptRegistry
+
+@pytest.fixture
+def config_dir(tmp_path):
+    for filename in PROMPT_FILES:
+        shutil.copy(CONFIG_DIR / filename, tmp_path / filename)
+    return tmp_path
+
+def _edit(path: Path, change) -> None:
+    data = json.loads(path.read_text())
+    change(data)
+    path.write_text(json.dumps(data))
+    # Make sure the mtime moves even on filesystems with coarse timestamps
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+def test_unchanged_files_are_not_reloaded(config_dir):
+    registry = PromptRegistry(config_dir)
+    assert registry.reload_if_changed() is False
+    assert registry.version == 1
+
+def test_edited_prompt_is_reloaded_and_memoized_prompts_rebuilt(config_dir):
+    registry = PromptRegistry(config_dir)
+    before = registry.track_generation(35)
+    assert registry.track_generation(35) is before
+
+    _edit(config_dir / "system_prompt.json",
+          lambda data: data["track_generation"].update(role="You are a jazz-only curator"))
+    assert registry.reload_if_changed() is True
+    assert registry.version == 2
+    assert registry.track_generation(35).system_content.startswith("You are a jazz-only curator")
+
+def test_invalid_edit_keeps_the_previous_prompts(config_dir):
+    registry = PromptRegistry(config_dir)
+    before = registry.track_generation(35)
+
+    _edit(config_dir / "system_prompt.json", lambda data: data["track_generation"].pop("rules"))
+    assert registry.reload_if_changed() is False
+    assert registry.version == 1
+    assert registry.track_generation(35) == before
+
+@pytest.mark.parametrize("change", [
+    lambda system, user: system["track_generation"].pop("objective"),
+    lambda system, user: system["track_generation"].update(objective="{unknown_field}"),
+    lambda system, user: system["playlist_title"].update(system_message=["not", "a", "string"]),
+    lambda system, user: user.update(playlist_title="{query"),
+])
+def test_validation_rejects_broken_templates(change):
+    system = json.loads((CONFIG_DIR / PROMPT_FILES[0]).read_text())
+    user = json.loads((CONFIG_DIR / PROMPT_FILES[1]).read_text())
+    change(system, user)
+    with pytest.raises(ValueError):
+        PromptRegistry.validate(system, user)
+
+def test_unreadable_files_fail_at_startup(tmp_path):
+    with pytest.raises(ValueError):
+        PromptRegistry(tmp_path)
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from app.services.persistence import JSONPersistence
+from app.services.query_similarity import QueryIndex, query_terms
+from app.services.suggestion_cache import SuggestionCache
+
+def _tracks(prefix: str, count: int = 10):
+    return [{"track_name": f"{prefix} {i}", "artist": f"{prefix} Artist {i}"} for i in range(count)]
+
+@pytest.fixture
+def index():
+    index = QueryIndex(threshold=0.8, enabled=True)
+    index.add("dinner party jazz", _tracks("jazz"))
+    index.add("upbeat workout hip hop", _tracks("hiphop"))
+    index.add("sad indie songs for a rainy day", _tracks("indie"))
+    return index
+
+def test_query_terms_drop_filler_and_plurals():
+    assert query_terms("Some chill songs for rainy afternoons!") == ["chill", "rainy", "afternoon"]
+
+@pytest.mark.parametrize("query,source", [
+    ("jazz for a dinner party", "dinner party jazz"),        # word order
+    ("Dinner-party jazz music", "dinner party jazz"),        # punctuation and filler words
+    ("dinner party jazz songs", "dinner party jazz"),        # filler word
+    ("sad indie for rainy days", "sad indie songs for a rainy day"),   # plural
+    ("hip hop workout upbeat tracks", "upbeat workout hip hop"),
+])
+def test_rewordings_reuse_the_earlier_suggestions(index, query, source):
+    similar = index.lookup(query, 10)
+    assert similar is not None and similar.query == source
+
+@pytest.mark.parametrize("query", [
+    "jazz",                         # too little in common with a three-word query
+    "dinner party rock",            # different genre
+    "workout",                      # no genre at all
+    "happy indie songs for summer",
+    "sad music",
+    "dinner parties jazz",          # only a trailing "s" is stripped, "parties" stays apart from "party"
+])
+def test_queries_that_do_not_match(index, query):
+    assert index.lookup(query, 10) is None
+
+def test_lookup_needs_enough_tracks(index):
+    assert index.lookup("jazz for a dinner party", 11) is None
+
+def test_close_neighbours_are_blended_without_repeats():
+    index = QueryIndex(threshold=0.8, enabled=True)
+    shared = _tracks("shared", 2)
+    index.add("late night jazz", shared + _tracks("first", 3))
+    index.add("jazz late night", shared + _tracks("second", 3))
+    similar = index.lookup("late night jazz", 8)
+    names = [track["track_name"] for track in similar.tracks]
+    assert len(names) == len(set(names)) == 8
+
+def test_index_round_trips_through_disk(tmp_path):
+    path = tmp_path / "index.json"
+    index = QueryIndex(enabled=True, path=str(path))
+    index.add("dinner party jazz", _tracks("jazz"))
+    assert asyncio.run(index.persist()) == 1
+    # Nothing changed since, so nothing is written
+    assert asyncio.run(index.persist()) == 0
+
+    restored = QueryIndex(enabled=True, path=str(path))
+    assert restored.load() == 1
+    assert restored.lookup("jazz for a dinner party", 10).tracks == _tracks("jazz")
+
+def test_suggestion_cache_round_trips(tmp_path):
+    path = tmp_path / "cache.json"
+    cache = SuggestionCache(ttl=60, max_entries=10, path=str(path))
+    cache.set("Chill study music", _tracks("chill"))
+    assert asyncio.run(cache.persist()) == 1
+
+    restored = SuggestionCache(ttl=60, max_entries=10, path=str(path))
+    assert restored.load() == 1
+    assert restored.get("chill study music!") == _tracks("chill")
+
+def test_store_missing_a_persistence_hook_fails_when_created():
+    class Incomplete(JSONPersistence):
+        def _snapshot(self):
+            return []
+
+    with pytest.raises(TypeError):
+        Incomplete()
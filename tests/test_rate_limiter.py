@@ -0,0 +1,88 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.services.rate_limiter import (
+    PRIORITY_INTERACTIVE, PRIORITY_NORMAL, PRIORITY_SPECULATIVE, RateLimitScheduler
+)
+
+def _scheduler(**kwargs) -> RateLimitScheduler:
+    settings = {"rate": 1000, "burst": 1000, "max_retries": 3, "base_backoff": 0.0, "max_backoff": 0.0}
+    settings.update(kwargs)
+    return RateLimitScheduler(**settings)
+
+def _client(statuses, calls):
+    """Client whose responses come from `statuses` in order; an exception instance is raised instead"""
+    responses = iter(statuses)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.method)
+        status = next(responses)
+        if isinstance(status, Exception):
+            raise status
+        headers = {"Retry-After": "0"} if status == 429 else {}
+        return httpx.Response(status, headers=headers)
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+def _send(scheduler, statuses, method="GET", idempotent=True):
+    calls = []
+
+    async def run():
+        async with _client(statuses, calls) as client:
+            return await scheduler.request(lambda: client.request(method, "https://api.test/x"), idempotent=idempotent)
+
+    return asyncio.run(run()), calls
+
+def test_get_retries_5xx_until_success():
+    response, calls = _send(_scheduler(), [502, 503, 200])
+    assert response.status_code == 200
+    assert len(calls) == 3
+
+def test_get_gives_up_after_max_retries():
+    scheduler = _scheduler(max_retries=2)
+    response, calls = _send(scheduler, [502, 502, 502, 200])
+    assert response.status_code == 502
+    assert len(calls) == 3
+    assert scheduler.failures == 1
+
+def test_non_idempotent_post_is_not_retried_on_5xx():
+    response, calls = _send(_scheduler(), [502, 200], method="POST", idempotent=False)
+    assert response.status_code == 502
+    assert calls == ["POST"]
+
+def test_non_idempotent_post_is_not_retried_on_transport_error():
+    with pytest.raises(httpx.ReadTimeout):
+        _send(_scheduler(), [httpx.ReadTimeout("timed out"), 200], method="POST", idempotent=False)
+
+def test_non_idempotent_post_retries_429_with_retry_after():
+    response, calls = _send(_scheduler(), [429, 201], method="POST", idempotent=False)
+    assert response.status_code == 201
+    assert calls == ["POST", "POST"]
+
+def test_get_retries_transport_error():
+    response, calls = _send(_scheduler(), [httpx.ConnectError("refused"), 200])
+    assert response.status_code == 200
+    assert len(calls) == 2
+
+def test_queued_waiters_are_served_by_priority():
+    async def run():
+        scheduler = _scheduler(rate=1000, burst=1)
+        scheduler._tokens = 0.0  # everyone queues until the bucket refills
+        order = []
+
+        async def waiter(name, priority):
+            await scheduler.acquire(priority)
+            order.append(name)
+
+        tasks = [
+            asyncio.create_task(waiter("speculative", PRIORITY_SPECULATIVE)),
+            asyncio.create_task(waiter("normal", PRIORITY_NORMAL)),
+            asyncio.create_task(waiter("interactive", PRIORITY_INTERACTIVE)),
+            asyncio.create_task(waiter("normal-2", PRIORITY_NORMAL))
+        ]
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(run()) == ["interactive", "normal", "normal-2", "speculative"]
@@ -0,0 +1,65 @@
+import asyncio
+
+from app.services.playlist_pipeline import _race_strategies, _strategy_queries
+from app.services.track_matching import TrackQuery
+
+TRACK = {"track_name": "Heroes", "artist": "David Bowie"}
+STRATEGIES = _strategy_queries(TRACK["track_name"], TRACK["artist"])
+QUERY = TrackQuery.from_track(TRACK)
+
+class FakeSpotify:
+    """Answers each strategy's query after its delay, with a match, nothing, or an error"""
+
+    def __init__(self, **outcomes):
+        # strategy -> (delay, "hit" | "miss" | "error")
+        self.outcomes = outcomes
+        self.started, self.cancelled = [], []
+
+    async def search_track(self, query, limit=5, market=None):
+        strategy = next(name for name, strategy_query, _ in STRATEGIES if strategy_query == query)
+        delay, outcome = self.outcomes[strategy]
+        self.started.append(strategy)
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(strategy)
+            raise
+        if outcome == "error":
+            raise RuntimeError("search failed")
+        if outcome == "miss":
+            return []
+        return [{"title": "Heroes", "artist": "David Bowie", "album": strategy, "spotify_id": strategy}]
+
+def _race(spotify: FakeSpotify, delay: float = 0.02):
+    async def run():
+        match = await _race_strategies(spotify, STRATEGIES, QUERY, 0.65, delay)
+        # Let the cancellations land
+        await asyncio.sleep(0)
+        return match
+
+    return asyncio.run(run())
+
+def test_fast_plain_hit_never_starts_the_fallbacks():
+    spotify = FakeSpotify(plain=(0, "hit"))
+    assert _race(spotify)["spotify_id"] == "plain"
+    assert spotify.started == ["plain"]
+
+def test_slow_plain_hit_still_beats_a_faster_fallback():
+    spotify = FakeSpotify(plain=(0.05, "hit"), quoted_track_artist=(0, "hit"), quoted_track=(0.2, "hit"))
+    assert _race(spotify)["spotify_id"] == "plain"
+    # The lowest-ranked strategy was still running when the winner was known
+    assert spotify.cancelled == ["quoted_track"]
+
+def test_plain_miss_falls_to_the_next_strategy_and_cancels_the_last():
+    spotify = FakeSpotify(plain=(0, "miss"), quoted_track_artist=(0.01, "hit"), quoted_track=(0.2, "hit"))
+    assert _race(spotify)["spotify_id"] == "quoted_track_artist"
+    assert spotify.cancelled == ["quoted_track"]
+
+def test_failing_strategy_is_skipped():
+    spotify = FakeSpotify(plain=(0, "error"), quoted_track_artist=(0, "miss"), quoted_track=(0, "hit"))
+    assert _race(spotify)["spotify_id"] == "quoted_track"
+
+def test_no_strategy_matching_returns_none():
+    spotify = FakeSpotify(plain=(0, "miss"), quoted_track_artist=(0, "miss"), quoted_track=(0, "error"))
+    assert _race(spotify) is None
+    assert spotify.cancelled == []
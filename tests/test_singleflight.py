@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+
+from app.services.singleflight import SingleFlight
+
+def test_concurrent_callers_share_one_execution():
+    async def run():
+        flight = SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "result"
+
+        results = await asyncio.gather(*(flight.do("key", work) for _ in range(5)))
+        return results, calls, flight.stats()
+
+    results, calls, stats = asyncio.run(run())
+    assert results == ["result"] * 5
+    assert len(calls) == 1
+    assert stats == {"in_flight": 0, "leaders": 1, "coalesced": 4}
+
+def test_exception_is_delivered_to_every_waiter_of_the_same_key():
+    async def run():
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("upstream failed")
+
+        return await asyncio.gather(*(flight.do("key", fail) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, ValueError) for result in results)
+
+def test_different_keys_do_not_share_failures():
+    async def run():
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("bad token")
+
+        async def succeed():
+            await asyncio.sleep(0.01)
+            return "ok"
+
+        return await asyncio.gather(flight.do("a", fail), flight.do("b", succeed), return_exceptions=True)
+
+    bad, good = asyncio.run(run())
+    assert isinstance(bad, ValueError)
+    assert good == "ok"
+
+def test_finished_call_is_forgotten_so_next_call_runs_again():
+    async def run():
+        flight = SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            return len(calls)
+
+        first = await flight.do("key", work)
+        second = await flight.do("key", work)
+        return first, second
+
+    assert asyncio.run(run()) == (1, 2)
+
+def test_cancelling_one_waiter_keeps_the_shared_call_for_others():
+    async def run():
+        flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        first = asyncio.create_task(flight.do("key", work))
+        second = asyncio.create_task(flight.do("key", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(run()) == "done"
+
+def test_work_is_cancelled_when_every_waiter_leaves():
+    async def run():
+        flight = SingleFlight()
+        cancelled = []
+
+        async def work():
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        waiter = asyncio.create_task(flight.do("key", work))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.sleep(0.01)
+        return cancelled, flight.in_flight()
+
+    cancelled, in_flight = asyncio.run(run())
+    assert cancelled == [True]
+    assert in_flight == 0
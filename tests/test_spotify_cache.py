@@ -0,0 +1,94 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.services import spotify_service
+from app.services.spotify_service import SpotifyService
+
+def _search_payload(query: str) -> dict:
+    return {"tracks": {"items": [{
+        "id": f"id-{query}",
+        "name": query,
+        "artists": [{"name": "Artist"}],
+        "album": {"name": "Album", "images": []},
+        "preview_url": None
+    }]}}
+
+@pytest.fixture
+def spotify_api(monkeypatch):
+    """Mock Spotify: "bad-token" gets a 401, any other token gets results. Records requests."""
+    calls = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.headers["Authorization"])
+        await asyncio.sleep(0.02)  # long enough for concurrent callers to overlap
+        if request.headers["Authorization"] == "Bearer bad-token":
+            return httpx.Response(401, json={"error": "invalid token"})
+        return httpx.Response(200, json=_search_payload(request.url.params["q"]))
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(spotify_service, "get_http_client", lambda: client)
+    spotify_service._spotify_cache.clear()
+    yield calls
+    spotify_service._spotify_cache.clear()
+
+def test_failure_is_not_shared_with_callers_using_another_token(spotify_api):
+    async def run():
+        return await asyncio.gather(
+            SpotifyService("bad-token").search_track("shared query"),
+            SpotifyService("good-token").search_track("shared query"),
+            return_exceptions=True
+        )
+
+    bad, good = asyncio.run(run())
+    assert isinstance(bad, Exception)
+    assert good[0]["spotify_id"] == "id-shared query"
+    assert sorted(spotify_api) == ["Bearer bad-token", "Bearer good-token"]
+
+def test_same_token_concurrent_searches_are_coalesced(spotify_api):
+    async def run():
+        service = SpotifyService("good-token")
+        return await asyncio.gather(*(service.search_track("coalesced") for _ in range(3)))
+
+    results = asyncio.run(run())
+    assert all(result == results[0] for result in results)
+    assert len(spotify_api) == 1
+
+def test_successful_search_is_cached_for_other_users(spotify_api):
+    async def run():
+        first = await SpotifyService("token-a").search_track("cached")
+        second = await SpotifyService("token-b").search_track("cached")
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == second
+    assert len(spotify_api) == 1
+
+def test_same_search_from_different_users_is_coalesced(spotify_api):
+    async def run():
+        return await asyncio.gather(
+            SpotifyService("token-a").search_track("burst"),
+            SpotifyService("token-b").search_track("burst")
+        )
+
+    first, second = asyncio.run(run())
+    assert first == second
+    assert len(spotify_api) == 1
+
+def test_followers_retry_with_their_own_token_when_the_leaders_is_rejected(spotify_api):
+    async def run():
+        # The bad token leads, the other two join its call and get its 401
+        return await asyncio.gather(
+            SpotifyService("bad-token").search_track("rejected"),
+            SpotifyService("token-a").search_track("rejected"),
+            SpotifyService("token-b").search_track("rejected"),
+            return_exceptions=True
+        )
+
+    bad, first, second = asyncio.run(run())
+    assert isinstance(bad, Exception)
+    assert first == second and first[0]["spotify_id"] == "id-rejected"
+    # The rejected call, then one retry per follower's own token
+    assert spotify_api[0] == "Bearer bad-token"
+    assert sorted(spotify_api[1:]) == ["Bearer token-a", "Bearer token-b"]
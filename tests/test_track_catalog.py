@@ -0,0 +1,74 @@
+import asyncio
+import sqlite3
+import threading
+import time
+
+from app.services.track_catalog import TrackCatalog
+from app.services.track_matching import TrackQuery
+
+TRACK = {"title": "Don't Stop Me Now - Remastered 2011", "artist": "Queen", "album": "Jazz", "spotify_id": "queen-1"}
+QUERY = TrackQuery.from_track({"track_name": "Dont Stop Me Now", "artist": "Queen"})
+
+def test_queued_tracks_are_written_in_one_background_flush():
+    catalog = TrackCatalog(flush_delay=0.01)
+
+    async def run():
+        catalog.queue_tracks([TRACK])
+        catalog.queue_tracks([dict(TRACK, spotify_id="queen-2")])
+        # Nothing is written on the event loop
+        assert catalog.writes == 0
+        await asyncio.sleep(0.1)
+
+    asyncio.run(run())
+    assert catalog.writes == 2
+    assert catalog.lookup(QUERY, 0.65)["spotify_id"] in ("queen-1", "queen-2")
+
+def test_market_lookups_only_use_that_markets_searches():
+    catalog = TrackCatalog()
+    catalog.add_tracks([TRACK], market="gb")
+    assert catalog.lookup(QUERY, 0.65, market="GB")["spotify_id"] == "queen-1"
+    assert catalog.lookup(QUERY, 0.65, market="US") is None
+    # Without a market any row will do
+    assert catalog.lookup(QUERY, 0.65)["spotify_id"] == "queen-1"
+
+def test_hits_are_counted_with_the_next_flush():
+    catalog = TrackCatalog()
+    catalog.add_tracks([TRACK])
+
+    async def run():
+        assert catalog.lookup(QUERY, 0.65)
+        await catalog.close()
+
+    asyncio.run(run())
+    assert catalog.hits == 1
+    assert catalog._pending_hits == []
+
+def test_catalog_from_an_older_schema_is_rebuilt(tmp_path):
+    path = str(tmp_path / "catalog.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE tracks (id INTEGER PRIMARY KEY, spotify_id TEXT NOT NULL UNIQUE)")
+    conn.commit()
+    conn.close()
+
+    catalog = TrackCatalog(path=path)
+    assert catalog.add_tracks([TRACK], market="US") == 1
+    assert catalog.lookup(QUERY, 0.65, market="US")["spotify_id"] == "queen-1"
+
+def test_unrequested_variants_are_left_to_spotify_search():
+    catalog = TrackCatalog()
+    catalog.add_tracks([{"title": "Wonderwall (Karaoke Version)", "artist": "Oasis", "spotify_id": "karaoke"}])
+    query = TrackQuery.from_track({"track_name": "Wonderwall", "artist": "Oasis"})
+    assert catalog.lookup(query, 0.65) is None
+    # Asked for by name, the variant is a confident match
+    karaoke = TrackQuery.from_track({"track_name": "Wonderwall - Karaoke Version", "artist": "Oasis"})
+    assert catalog.lookup(karaoke, 0.9)["spotify_id"] == "karaoke"
+
+def test_lookups_do_not_wait_for_a_write_in_progress(tmp_path):
+    catalog = TrackCatalog(path=str(tmp_path / "catalog.db"))
+    catalog.add_tracks([TRACK])
+    # A batch being written in a worker thread holds the writer's lock for a while
+    catalog._lock.acquire()
+    threading.Timer(2, catalog._lock.release).start()
+    started = time.perf_counter()
+    assert catalog.lookup(QUERY, 0.9)["spotify_id"] == "queen-1"
+    assert time.perf_counter() - started < 1
@@ -0,0 +1,62 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.services import spotify_service
+from app.services.spotify_service import SpotifyService
+
+UNKNOWN = "unknown"
+
+def _track(track_id: str) -> dict:
+    return {"id": track_id, "name": f"Song {track_id}", "artists": [{"name": "Artist"}],
+            "album": {"name": "Album", "images": []}}
+
+@pytest.fixture
+def spotify_api(monkeypatch):
+    """Mock /tracks endpoint: every ID exists except "unknown". Records requested pages and peak concurrency."""
+    pages = []
+    in_flight = {"now": 0, "peak": 0}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        ids = request.url.params["ids"].split(",")
+        pages.append(ids)
+        in_flight["now"] += 1
+        in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        await asyncio.sleep(0.02)
+        in_flight["now"] -= 1
+        return httpx.Response(200, json={"tracks": [None if i == UNKNOWN else _track(i) for i in ids]})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(spotify_service, "get_http_client", lambda: client)
+    spotify_service._spotify_cache.clear()
+    yield pages, in_flight
+    spotify_service._spotify_cache.clear()
+
+def _details(track_ids):
+    return asyncio.run(SpotifyService("token").get_tracks_details(track_ids))
+
+def test_results_keep_the_requested_order(spotify_api):
+    ids = ["c", "a", "b"]
+    assert [track["spotify_id"] for track in _details(ids)] == ids
+
+def test_only_ids_missing_from_the_cache_are_fetched(spotify_api):
+    pages, _ = spotify_api
+    _details(["a", "b"])
+    details = _details(["b", "c", "a"])
+    assert [track["spotify_id"] for track in details] == ["b", "c", "a"]
+    assert pages == [["a", "b"], ["c"]]
+
+def test_unknown_ids_are_dropped_and_not_fetched_again(spotify_api):
+    pages, _ = spotify_api
+    assert [track["spotify_id"] for track in _details(["a", UNKNOWN])] == ["a"]
+    assert _details([UNKNOWN]) == []
+    assert len(pages) == 1
+
+def test_pages_of_fifty_are_fetched_concurrently(spotify_api):
+    pages, in_flight = spotify_api
+    ids = [f"id{i}" for i in range(120)]
+    details = _details(ids)
+    assert [track["spotify_id"] for track in details] == ids
+    assert [len(page) for page in pages] == [50, 50, 20]
+    assert in_flight["peak"] == 3
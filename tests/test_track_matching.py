@@ -0,0 +1,79 @@
+import pytest
+
+from app.services.track_matching import TrackQuery, best_match, fold, normalize_title, rank_candidates, track_key
+
+@pytest.mark.parametrize("a,b", [
+    (("Dont Stop Me Now - Remastered 2011", "Queen"), ("Don't Stop Me Now", "queen")),
+    (("Lose Yourself (feat. Nobody)", "Eminem"), ("Lose Yourself", "Eminem")),
+    (("Song", "Simon & Garfunkel"), ("Song", "Garfunkel, Simon")),
+    (("Song", "The Beatles"), ("Song", "Beatles")),
+    (("Café del Mar", "Energy 52"), ("Cafe Del Mar", "energy 52")),
+])
+def test_variants_of_a_track_share_a_key(a, b):
+    assert track_key(*a) == track_key(*b)
+
+@pytest.mark.parametrize("a,b", [
+    (("This Is the Day", "The The"), ("This Is the Day", "")),
+    (("This Is the Day", "The The"), ("This Is the Day", "A")),
+    (("Song", "The Who"), ("Song", "The The")),
+    (("Song", "Queen"), ("Another Song", "Queen")),
+])
+def test_different_tracks_get_different_keys(a, b):
+    assert track_key(*a) != track_key(*b)
+
+def test_stopword_only_artist_keeps_its_words():
+    assert track_key("This Is the Day", "The The") == "this is the day|the"
+
+def _candidate(title: str, artist: str, album: str = "") -> dict:
+    return {"title": title, "artist": artist, "album": album, "spotify_id": f"{title}|{artist}"}
+
+@pytest.mark.parametrize("text,expected", [
+    ("Beyoncé", "beyonce"),
+    ("AC/DC", "ac dc"),
+    ("Guns N' Roses", "guns n roses"),
+    ("Simon & Garfunkel", "simon and garfunkel"),
+    ("  Mixed   CASE  ", "mixed case"),
+])
+def test_fold(text, expected):
+    assert fold(text) == expected
+
+@pytest.mark.parametrize("title,expected", [
+    ("Bohemian Rhapsody - Remastered 2011", "bohemian rhapsody"),
+    ("Blinding Lights (feat. Someone)", "blinding lights"),
+    ("Blinding Lights feat. Someone", "blinding lights"),
+    ("Wonderwall [Deluxe Edition]", "wonderwall"),
+    ("Hey Jude - Radio Edit", "hey jude"),
+    ("Mr. Brightside", "mr brightside"),
+])
+def test_normalize_title(title, expected):
+    assert normalize_title(title) == expected
+
+def test_scorer_prefers_the_original_over_covers_and_karaoke():
+    query = TrackQuery.from_track({"track_name": "Hallelujah", "artist": "Leonard Cohen"})
+    candidates = [
+        _candidate("Hallelujah", "Jeff Buckley"),
+        _candidate("Hallelujah (Karaoke Version)", "Leonard Cohen"),
+        _candidate("Hallelujah", "Leonard Cohen", "Various Positions"),
+    ]
+    assert best_match(query, candidates)["artist"] == "Leonard Cohen"
+    assert best_match(query, candidates)["album"] == "Various Positions"
+
+def test_scorer_rejects_a_same_titled_song_by_another_artist():
+    query = TrackQuery.from_track({"track_name": "Hurt", "artist": "Nine Inch Nails"})
+    assert best_match(query, [_candidate("Hurt", "Christina Aguilera")]) is None
+
+def test_scorer_accepts_long_catalogue_titles_and_featured_artists():
+    query = TrackQuery.from_track({"track_name": "Clair de Lune", "artist": "Claude Debussy"})
+    candidate = _candidate("Suite bergamasque, L. 75: III. Clair de lune", "Claude Debussy, Some Pianist")
+    assert best_match(query, [candidate]) == candidate
+
+def test_requested_variant_is_not_penalised():
+    query = TrackQuery.from_track({"track_name": "Layla (Acoustic)", "artist": "Eric Clapton"})
+    candidates = [_candidate("Layla", "Eric Clapton"), _candidate("Layla - Acoustic", "Eric Clapton")]
+    scores = {candidates[index]["title"]: score for score, index in rank_candidates(query, candidates)}
+    assert scores["Layla - Acoustic"] >= scores["Layla"]
+
+def test_unrequested_variant_is_penalised():
+    query = TrackQuery.from_track({"track_name": "Layla", "artist": "Eric Clapton"})
+    candidates = [_candidate("Layla - Acoustic", "Eric Clapton"), _candidate("Layla", "Eric Clapton")]
+    assert best_match(query, candidates)["title"] == "Layla"
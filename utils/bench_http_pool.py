@@ -0,0 +1,121 @@
+"""
+Benchmark: fresh httpx.AsyncClient per request vs the shared pooled client.
+
+Starts a local stand-in for the Spotify search endpoint (plain HTTP/1.1 with
+keep-alive and an optional simulated handshake delay per new connection), then
+runs the same fan-out of searches both ways and reports wall time and the number
+of TCP connections the server accepted.
+
+Usage:
+    python utils/bench_http_pool.py --requests 50 --concurrency 15 --handshake-ms 40
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import httpx
+
+from app.services import http_client
+
+SEARCH_BODY = json.dumps({"tracks": {"items": []}}).encode()
+
+class StandInServer:
+    """Minimal keep-alive HTTP server that counts accepted connections"""
+
+    def __init__(self, handshake_delay: float, response_delay: float):
+        self.handshake_delay = handshake_delay
+        self.response_delay = response_delay
+        self.connections = 0
+        self.requests = 0
+        self.server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        # Simulate the extra round trips of a TCP+TLS handshake on a fresh connection
+        await asyncio.sleep(self.handshake_delay)
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                if not head:
+                    break
+                self.requests += 1
+                await asyncio.sleep(self.response_delay)
+                # HEAD (used by connection warmup) gets headers only
+                body = b"" if head.startswith(b"HEAD ") else SEARCH_BODY
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\n"
+                    b"Content-Type: application/json\r\n"
+                    b"Connection: keep-alive\r\n"
+                    b"Content-Length: " + str(len(SEARCH_BODY)).encode() + b"\r\n\r\n" + body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self) -> int:
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+async def _run(label: str, server: StandInServer, url: str, total: int, concurrency: int, fresh: bool):
+    server.connections = 0
+    server.requests = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            params = {"q": f"track {i}", "type": "track", "limit": 10}
+            if fresh:
+                async with httpx.AsyncClient() as client:
+                    response = await client.get(url, params=params)
+            else:
+                response = await http_client.get_http_client().get(url, params=params)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {elapsed * 1000:8.1f} ms  {server.connections:4d} connections  {server.requests:4d} requests")
+    return elapsed
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50, help="searches per simulated playlist generation")
+    parser.add_argument("--concurrency", type=int, default=15, help="searches in flight at once")
+    parser.add_argument("--rounds", type=int, default=3, help="simulated generations to run")
+    parser.add_argument("--handshake-ms", type=float, default=40.0, help="simulated handshake cost per new connection")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="simulated server time per request")
+    args = parser.parse_args()
+
+    server = StandInServer(args.handshake_ms / 1000, args.latency_ms / 1000)
+    port = await server.start()
+    url = f"http://127.0.0.1:{port}/v1/search"
+
+    print(f"{args.rounds} rounds x {args.requests} requests, concurrency {args.concurrency}, "
+          f"handshake {args.handshake_ms}ms, latency {args.latency_ms}ms\n")
+
+    fresh_total = 0.0
+    pooled_total = 0.0
+    await http_client.warmup_http_client([url], connections=args.concurrency)
+    for round_no in range(1, args.rounds + 1):
+        fresh_total += await _run(f"round {round_no} fresh", server, url, args.requests, args.concurrency, fresh=True)
+        pooled_total += await _run(f"round {round_no} pooled", server, url, args.requests, args.concurrency, fresh=False)
+
+    print(f"\nfresh clients: {fresh_total * 1000:.1f} ms total")
+    print(f"shared pool:   {pooled_total * 1000:.1f} ms total ({fresh_total / pooled_total:.2f}x faster)")
+
+    await http_client.close_http_client()
+    await server.stop()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,136 @@
+"""
+Load benchmark: concurrent track generations against a local fake OpenAI endpoint.
+
+Starts a stand-in for POST /v1/chat/completions that answers after a fixed delay
+with a JSON array of tracks, points OpenAIService at it via OPENAI_BASE_URL and
+runs N generations at once. Reports throughput and the worst event-loop stall seen
+by a 10ms ticker running alongside; a blocking client shows up as a stall roughly
+equal to the full completion time.
+
+Usage:
+    python utils/bench_openai_load.py --concurrency 1 4 16 32 --delay-ms 500
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+def _completion_body(track_count: int) -> bytes:
+    tracks = [
+        {"track_name": f"Song {i}", "artist": f"Artist {i}", "album": f"Album {i}", "release_year": 2000 + i % 20}
+        for i in range(track_count)
+    ]
+    return json.dumps({
+        "id": "chatcmpl-bench",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": "gpt-4o-mini",
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": json.dumps(tracks)},
+            "finish_reason": "stop"
+        }],
+        "usage": {"prompt_tokens": 300, "completion_tokens": track_count * 30, "total_tokens": 300 + track_count * 30}
+    }).encode()
+
+class FakeOpenAIServer:
+    """Keep-alive HTTP server answering every request with a canned chat completion"""
+
+    def __init__(self, delay: float, track_count: int):
+        self.delay = delay
+        self.body = _completion_body(track_count)
+        self.requests = 0
+        self.server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":", 1)[1])
+                if length:
+                    await reader.readexactly(length)
+                self.requests += 1
+                await asyncio.sleep(self.delay)
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\n"
+                    b"Content-Type: application/json\r\n"
+                    b"Connection: keep-alive\r\n"
+                    b"Content-Length: " + str(len(self.body)).encode() + b"\r\n\r\n" + self.body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self) -> int:
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+async def _ticker(stop: asyncio.Event, stalls: list):
+    """Measure how late a 10ms sleep wakes up; large values mean the loop was blocked"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        stalls.append(time.perf_counter() - start - 0.01)
+
+async def _run(concurrency: int, generations: int, track_count: int):
+    from app.services.openai_service import OpenAIService
+
+    stop = asyncio.Event()
+    stalls: list = []
+    ticker = asyncio.create_task(_ticker(stop, stalls))
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            service = OpenAIService()
+            return await service.generate_track_suggestions(f"benchmark query {i}", count=track_count, use_cache=False)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one(i) for i in range(generations)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await ticker
+
+    ok = sum(1 for r in results if r)
+    print(f"concurrency {concurrency:3d}: {generations} generations in {elapsed:6.2f}s "
+          f"= {generations / elapsed:6.2f}/s, ok={ok}, max loop stall {max(stalls, default=0) * 1000:7.1f} ms")
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 32])
+    parser.add_argument("--generations", type=int, default=32, help="generations per concurrency level")
+    parser.add_argument("--delay-ms", type=float, default=500.0, help="simulated completion latency")
+    parser.add_argument("--tracks", type=int, default=35)
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(args.delay_ms / 1000, args.tracks)
+    port = await server.start()
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{port}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+
+    print(f"fake endpoint latency {args.delay_ms}ms, {args.tracks} tracks per completion, "
+          f"OPENAI_MAX_CONCURRENCY={os.getenv('OPENAI_MAX_CONCURRENCY', '16')}\n")
+    for concurrency in args.concurrency:
+        await _run(concurrency, args.generations, args.tracks)
+
+    from app.services.openai_client_pool import close_openai_clients
+    await close_openai_clients()
+    await server.stop()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,159 @@
+"""
+Benchmark the playlist pipeline end to end with stand-in OpenAI and Spotify services.
+
+The stand-ins model latency only: the LLM streams one suggestion every
+--token-ms, Spotify searches take --search-ms with a --slow-rate fraction
+taking --slow-ms (the tail that matters for p95), and --hit-rate of
+suggestions resolve to a track. Reports p50/p95 total latency and time to the
+first track_found event over --runs runs, plus average per-stage timings.
+
+Usage:
+    python utils/bench_pipeline.py --runs 20 --suggestions 35 --hit-rate 0.8
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+from typing import Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+# Keep benchmark runs out of the on-disk track catalog
+os.environ.setdefault("TRACK_CATALOG_PATH", "")
+
+class FakeOpenAIService:
+    def __init__(self, suggestions: int, token_delay: float, title_delay: float):
+        self.suggestions = suggestions
+        self.token_delay = token_delay
+        self.title_delay = title_delay
+
+    def _tracks(self, prefix: str, count: int):
+        return [{"track_name": f"{prefix} Song {i}", "artist": f"{prefix} Artist {i}", "album": "Unknown Album"}
+                for i in range(count)]
+
+    async def stream_track_suggestions(self, query: str, count=None, use_cache: bool = True):
+        for track in self._tracks(query, self.suggestions):
+            await asyncio.sleep(self.token_delay)
+            yield track
+
+    async def generate_track_suggestions(self, query: str, count=None, use_cache: bool = True):
+        await asyncio.sleep(self.token_delay * self.suggestions)
+        return self._tracks(query, self.suggestions)
+
+    async def _generate_additional_tracks(self, query: str, existing_tracks, count: int):
+        await asyncio.sleep(self.token_delay * count)
+        return self._tracks(f"{query} extra", count)
+
+    async def generate_playlist_title(self, query: str) -> str:
+        await asyncio.sleep(self.title_delay)
+        return "Benchmark Playlist"
+
+class FakeSpotifyService:
+    def __init__(self, hit_rate: float, search_delay: float, slow_rate: float, slow_delay: float, seed: int):
+        self.hit_rate = hit_rate
+        self.search_delay = search_delay
+        self.slow_rate = slow_rate
+        self.slow_delay = slow_delay
+        self.random = random.Random(seed)
+        self.searches = 0
+
+    async def search_track(self, query: str, limit: int = 20, market: Optional[str] = None):
+        self.searches += 1
+        slow = self.random.random() < self.slow_rate
+        await asyncio.sleep(self.slow_delay if slow else self.search_delay)
+        if self.random.random() >= self.hit_rate:
+            return []
+        # Echo the query so the match scorer accepts the result
+        return [{
+            "spotify_id": f"id-{abs(hash(query))}",
+            "title": query,
+            "artist": query,
+            "album": "Album",
+            "album_art": None,
+            "preview_url": None
+        }]
+
+class SearchFailures(logging.Handler):
+    """
+    Collects the search failures the pipeline logs and swallows: a fake that stops
+    matching SpotifyService would otherwise turn every run into a fast no-match run
+    """
+
+    def __init__(self):
+        super().__init__(logging.WARNING)
+        self.messages = []
+
+    def emit(self, record):
+        message = record.getMessage()
+        if "search failed" in message:
+            self.messages.append(message)
+
+def _percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--suggestions", type=int, default=35)
+    parser.add_argument("--token-ms", type=float, default=40.0, help="delay between streamed suggestions")
+    parser.add_argument("--title-ms", type=float, default=600.0)
+    parser.add_argument("--search-ms", type=float, default=150.0)
+    parser.add_argument("--slow-ms", type=float, default=1500.0)
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--hit-rate", type=float, default=0.8)
+    parser.add_argument("--bulk", action="store_true", help="one bulk suggestion call instead of streaming")
+    parser.add_argument("--race", action="store_true", help="race the fallback search strategies")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    from app.services.app_config import get_app_config
+    from app.services.playlist_pipeline import PlaylistPipeline, get_pipeline_stats
+
+    # Pipeline warnings reach the failure collector; the console still shows errors only
+    failures = SearchFailures()
+    logging.getLogger().handlers[0].setLevel(logging.ERROR)
+    pipeline_logger = logging.getLogger("app.services.playlist_pipeline")
+    pipeline_logger.setLevel(logging.WARNING)
+    pipeline_logger.addHandler(failures)
+
+    settings = get_app_config().pipeline._replace(stream_suggestions=not args.bulk, race_search_strategies=args.race)
+    totals, first_tracks, searches = [], [], []
+    for run in range(args.runs):
+        openai_service = FakeOpenAIService(args.suggestions, args.token_ms / 1000, args.title_ms / 1000)
+        spotify_service = FakeSpotifyService(args.hit_rate, args.search_ms / 1000, args.slow_rate, args.slow_ms / 1000, run)
+        start = time.perf_counter()
+        first = []
+
+        def hook(event):
+            if event["type"] == "track_found" and not first:
+                first.append(time.perf_counter() - start)
+
+        pipeline = PlaylistPipeline(openai_service, spotify_service, f"query {run}", use_cache=False,
+                                    settings=settings, progress_hook=hook)
+        await pipeline.run()
+        totals.append(time.perf_counter() - start)
+        first_tracks.append(first[0] if first else totals[-1])
+        searches.append(spotify_service.searches)
+        if failures.messages:
+            sys.exit(f"{len(failures.messages)} searches failed in run {run}, first: {failures.messages[0]}")
+
+    print(f"{args.runs} runs, {args.suggestions} suggestions, hit rate {args.hit_rate}, "
+          f"search {args.search_ms}ms ({args.slow_rate:.0%} at {args.slow_ms}ms), "
+          f"search_concurrency {settings.search_concurrency}, {'bulk' if args.bulk else 'streaming'}"
+          f"{', racing strategies' if args.race else ''}")
+    print(f"total        p50 {statistics.median(totals):6.2f}s  p95 {_percentile(totals, 0.95):6.2f}s")
+    print(f"first track  p50 {statistics.median(first_tracks):6.2f}s  p95 {_percentile(first_tracks, 0.95):6.2f}s")
+    print(f"spotify searches per run: {statistics.mean(searches):.1f}")
+    stats = get_pipeline_stats()
+    for stage, seconds in stats["avg_stage_seconds"].items():
+        print(f"  {stage:20s} {seconds:6.3f}s")
+    for strategy, counts in stats["search_strategies"].items():
+        print(f"  {strategy:20s} attempts {counts['attempts']:5d}  hits {counts['hits']:5d}  "
+              f"wins {counts['wins']:5d}  cancelled {counts['cancelled']:5d}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
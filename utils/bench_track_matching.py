@@ -0,0 +1,92 @@
+"""
+Compare Spotify match selection: the old album-word heuristic vs the normalized scorer.
+
+Each fixture case is one LLM suggestion, the candidates a search returned and
+the spotify_ids that count as a correct pick (empty = none of them is the
+suggested song, so the right answer is no match). Reports accuracy for both
+selectors and the cost per scored candidate.
+
+Usage:
+    python utils/bench_track_matching.py --repeat 2000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.track_matching import TrackQuery, best_match, fold, normalize_title
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "track_matching.json")
+
+def legacy_pick(suggestion, candidates):
+    """Selection as it was before the scorer: album substring, then album word overlap, else first result"""
+    if not candidates:
+        return None
+    album = suggestion.get("album", "")
+    if album and album != "Unknown Album":
+        for result in candidates:
+            if result.get("album") and album.lower() in result["album"].lower():
+                return result
+        album_words = set(album.lower().split())
+        best, best_score = None, 0
+        for result in candidates:
+            if result.get("album"):
+                common = album_words & set(result["album"].lower().split())
+                meaningful = common - {"the", "a", "an", "and", "or", "of", "in", "on", "at", "to", "for",
+                                       "soundtrack", "greatest", "hits", "best", "collection"}
+                if len(meaningful) > best_score:
+                    best_score, best = len(meaningful), result
+        return best or candidates[0]
+    return candidates[0]
+
+def scored_pick(suggestion, candidates, min_score):
+    return best_match(TrackQuery.from_track(suggestion), candidates, min_score)
+
+def evaluate(cases, pick):
+    correct, failures = 0, []
+    for case in cases:
+        match = pick(case["suggestion"], case["candidates"])
+        chosen = match["spotify_id"] if match else None
+        if (chosen in case["expected"]) if case["expected"] else chosen is None:
+            correct += 1
+        else:
+            failures.append((case["suggestion"]["track_name"], chosen, case["expected"]))
+    return correct, failures
+
+def timed(cases, pick, repeat, clear_caches=False):
+    candidates = sum(len(case["candidates"]) for case in cases) * repeat
+    start = time.perf_counter()
+    for _ in range(repeat):
+        if clear_caches:
+            fold.cache_clear()
+            normalize_title.cache_clear()
+        for case in cases:
+            pick(case["suggestion"], case["candidates"])
+    return (time.perf_counter() - start) / candidates * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", default=FIXTURES)
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--min-score", type=float, default=0.65)
+    parser.add_argument("-v", "--verbose", action="store_true", help="list the cases each selector gets wrong")
+    args = parser.parse_args()
+
+    with open(args.fixtures) as f:
+        cases = json.load(f)
+    scorer = lambda suggestion, candidates: scored_pick(suggestion, candidates, args.min_score)
+
+    print(f"{len(cases)} cases, {sum(len(case['candidates']) for case in cases)} candidates, min_score {args.min_score}")
+    for name, pick, cold in (("legacy", legacy_pick, False), ("scorer", scorer, False), ("scorer (cold)", scorer, True)):
+        correct, failures = evaluate(cases, pick)
+        cost = timed(cases, pick, args.repeat, clear_caches=cold)
+        print(f"{name:14s} accuracy {correct:3d}/{len(cases)} ({correct / len(cases):6.1%})  {cost:6.2f}us/candidate")
+        if args.verbose and not cold:
+            for title, chosen, expected in failures:
+                print(f"    {title!r}: picked {chosen}, expected {expected or 'no match'}")
+
+if __name__ == "__main__":
+    main()